@@ -10,11 +10,12 @@
 
 
 import omni.ext
-import asyncio
 import omni.ui as ui
 import logging
 import carb
 from .window import UsdSearchWindow
+from .utils import ngc_connect
+from .utils.task_group import TaskGroup
 from omni.kit.menu.utils import MenuItemDescription
 
 logger = logging.getLogger(__name__)
@@ -38,6 +39,7 @@ class UsdSearchWindowExtension(omni.ext.IExt):
         logger.info("Starting Up")
         self._window = None
         self._menu = None
+        self._tasks = TaskGroup("omni.kit.window.usd_search")
         self._ext_name = omni.ext.get_extension_name(ext_id)
         self._open_pref_name = "start_window_open"
         self._settings = carb.settings.get_settings()
@@ -78,7 +80,7 @@ class UsdSearchWindowExtension(omni.ext.IExt):
 
     def toggle_window(self, toggled, startup=False):
         """Main function to toggle window and update preferences."""
-        asyncio.ensure_future(self._toggle_window_async(toggled, startup))
+        self._tasks.create_task(self._toggle_window_async(toggled, startup), "toggle_window")
 
     async def _toggle_window_async(self, toggled, startup=False):
         """Toggle window if it exists or build if necessary."""
@@ -109,6 +111,8 @@ class UsdSearchWindowExtension(omni.ext.IExt):
         self._menu = None
         self._app_ready_sub = None
         self._setings = None
+        self._tasks.destroy()
         if self._window:
             self._window.destroy()
             self._window = None
+        ngc_connect.shutdown()
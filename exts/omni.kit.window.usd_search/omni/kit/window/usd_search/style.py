@@ -8,4 +8,6 @@ ICON_PATH = CURRENT_PATH.parent.parent.parent.parent.joinpath("data")
 WINDOW_STYLE = {
     "CheckBox": {"background_color": 0xFF9A9A9A, "border_radius": 0},
     "Field::scene_url:disabled": {"color": 0xFF50504E},
+    "Label::suggestion": {"color": 0xFFB6B6B6},
+    "Label::suggestion:hovered": {"color": 0xFFFFFFFF},
 }
\ No newline at end of file
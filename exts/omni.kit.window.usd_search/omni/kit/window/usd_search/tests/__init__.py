@@ -14,3 +14,11 @@
 
 
 from .test_hello_world import *
+from .test_image_handler import *
+from .test_local_index import *
+from .test_ngc_connect import *
+from .test_result_filter import *
+from .test_result_set import *
+from .test_single_flight import *
+from .test_soak import *
+from .test_thumbnail_atlas import *
@@ -0,0 +1,65 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: LicenseRef-NvidiaProprietary
+#
+# NVIDIA CORPORATION, its affiliates and licensors retain all intellectual
+# property and proprietary rights in and to this material, related
+# documentation and any modifications thereto. Any use, reproduction,
+# disclosure or distribution of this material and related documentation
+# without an express license agreement from NVIDIA CORPORATION or
+# its affiliates is strictly prohibited.
+
+
+import base64
+import tempfile
+from io import BytesIO
+
+import omni.kit.test
+from PIL import Image
+
+from omni.kit.window.usd_search.utils.image_handler import ImageHandler
+
+
+class _TempImageHandler(ImageHandler):
+    """Keeps its thumbnail pack in a temporary directory instead of the shared cache."""
+    def __init__(self, directory: str):
+        self._directory = directory
+        super().__init__()
+
+    def get_thumbnail_directory(self):
+        return self._directory
+
+
+def _encode(image: Image.Image, format: str) -> str:
+    data = BytesIO()
+    image.save(data, format)
+    return base64.b64encode(data.getvalue()).decode()
+
+
+class TestImageHandler(omni.kit.test.AsyncTestCase):
+    async def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self._image_handler = _TempImageHandler(self._directory.name)
+        # Red square in the middle of a transparent background.
+        self._image = Image.new("RGBA", (64, 64), (0, 0, 0, 0))
+        self._image.paste((255, 0, 0, 255), (16, 16, 48, 48))
+
+    async def tearDown(self):
+        self._image_handler.destroy()
+        self._directory.cleanup()
+
+    async def test_transparent_png_round_trip(self):
+        for size in (None, 32):
+            thumbnail = self._image_handler.load_thumbnail(
+                self._image_handler.generate_image_from_string(_encode(self._image, "PNG"), size)
+            )
+            self.assertEqual(thumbnail.size, (size or 64, size or 64))
+            # The background stays transparent, not black.
+            self.assertEqual(thumbnail.getpixel((1, 1))[3], 0)
+            center = (size or 64) // 2
+            self.assertEqual(thumbnail.getpixel((center, center)), (255, 0, 0, 255))
+
+    async def test_opaque_thumbnails_are_downscaled_to_jpeg(self):
+        image_string = _encode(self._image.convert("RGB"), "PNG")
+        key = self._image_handler.generate_image_from_string(image_string, 32)
+        data = self._image_handler._thumbnail_pack.get(key[len(ImageHandler.THUMBNAIL_SCHEME):])
+        self.assertEqual(Image.open(BytesIO(data)).format, "JPEG")
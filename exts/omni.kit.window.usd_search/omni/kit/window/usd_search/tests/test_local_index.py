@@ -0,0 +1,79 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: LicenseRef-NvidiaProprietary
+#
+# NVIDIA CORPORATION, its affiliates and licensors retain all intellectual
+# property and proprietary rights in and to this material, related
+# documentation and any modifications thereto. Any use, reproduction,
+# disclosure or distribution of this material and related documentation
+# without an express license agreement from NVIDIA CORPORATION or
+# its affiliates is strictly prohibited.
+
+import os
+import shutil
+import tempfile
+
+import omni.kit.test
+
+from omni.kit.window.usd_search.utils.local_index import LocalIndex, tokenize
+
+
+class TestLocalIndex(omni.kit.test.AsyncTestCase):
+    async def setUp(self):
+        self._directory = tempfile.mkdtemp()
+        self._root = os.path.join(self._directory, "library").replace("\\", "/")
+        for path in ("Props/OfficeChair_02.usd", "Props/Tables/RoundTable.usda", "Props/.thumbs/hidden.usd",
+                     "Warehouse/Shelf_Metal.usdc", "Warehouse/readme.txt"):
+            self._write(path)
+        self._index = LocalIndex(os.path.join(self._directory, "local_index.db"), [self._root], max_subscriptions=0)
+
+    async def tearDown(self):
+        self._index.destroy()
+        shutil.rmtree(self._directory, ignore_errors=True)
+
+    def _write(self, path: str, content: str = "#usda 1.0\n"):
+        path = os.path.join(self._root, path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(content)
+
+    def _names(self, text: str) -> list:
+        return [model.asset_name for model in self._index.search(text)]
+
+    async def test_tokenize(self):
+        self.assertEqual(tokenize("OfficeChair_02"), ["officechair", "office", "chair", "02"])
+
+    async def test_crawl_and_search(self):
+        self.assertEqual(await self._index.crawl_async(), 3)
+        self.assertEqual(self._names("chair"), ["OfficeChair_02.usd"])
+        self.assertEqual(self._names("warehouse shelf"), ["Shelf_Metal.usdc"])
+        # No asset matches every word, any word then does.
+        self.assertCountEqual(self._names("metal table"), ["Shelf_Metal.usdc", "RoundTable.usda"])
+        self.assertEqual(self._names("hidden"), [])
+
+    async def test_recrawl_only_applies_changes(self):
+        await self._index.crawl_async()
+        self.assertEqual(await self._index.crawl_async(), 0)
+
+        shutil.rmtree(os.path.join(self._root, "Props", "Tables"))
+        self._write("Warehouse/Crate.usd")
+        self.assertEqual(await self._index.crawl_async(), 2)
+        self.assertEqual(self._names("table"), [])
+        self.assertEqual(self._names("crate"), ["Crate.usd"])
+        self.assertEqual(self._index.count, 3)
+
+    async def test_crawl_stops_at_max_depth(self):
+        self._index.destroy()
+        self._index = LocalIndex(
+            os.path.join(self._directory, "local_index.db"), [self._root], max_subscriptions=0, max_depth=1
+        )
+        self.assertEqual(await self._index.crawl_async(), 2)
+        self.assertEqual(self._names("table"), [])
+
+    async def test_crawl_visits_linked_directories_once(self):
+        try:
+            os.symlink(self._root, os.path.join(self._root, "Props", "Library"), target_is_directory=True)
+        except (OSError, NotImplementedError):
+            self.skipTest("Symbolic links are not supported")
+        # The link back to the root would be crawled forever.
+        self.assertEqual(await self._index.crawl_async(), 3)
+        self.assertEqual(self._index.count, 3)
@@ -0,0 +1,174 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: LicenseRef-NvidiaProprietary
+#
+# NVIDIA CORPORATION, its affiliates and licensors retain all intellectual
+# property and proprietary rights in and to this material, related
+# documentation and any modifications thereto. Any use, reproduction,
+# disclosure or distribution of this material and related documentation
+# without an express license agreement from NVIDIA CORPORATION or
+# its affiliates is strictly prohibited.
+
+import json
+import tempfile
+
+import omni.kit.test
+
+from omni.kit.window.usd_search.utils.http_cache import HttpCache
+from omni.kit.window.usd_search.utils.ngc_connect import NgcConnect, _is_replica_failure, estimate_link
+from omni.kit.window.usd_search.utils.rate_limiter import Priority
+from omni.kit.window.usd_search.utils.replica_set import ReplicaSet
+from omni.kit.window.usd_search.utils.transport import FakeTransport
+
+SEARCH_URL = "http://usd-search.test/search"
+
+
+class TestNgcConnect(omni.kit.test.AsyncTestCase):
+    def _connect(self, transport, description):
+        ngc_connect = NgcConnect(transport=transport)
+        ngc_connect.set_payload({"description": description, "limit": 30, "return_images": True})
+        return ngc_connect
+
+    async def test_search_over_fake_transport(self):
+        def handler(method, url, headers, data):
+            payload = json.loads(data)
+            return 200, [
+                {"url": f"s3://deepsearch-demo-content/{payload['description']}.usd", "score": 0.5, "extra": 1}
+            ]
+
+        transport = FakeTransport(handler)
+        ngc_connect = self._connect(transport, "fake transport box")
+        result = await ngc_connect.send_api_request_async(SEARCH_URL, priority=Priority.INTERACTIVE)
+
+        self.assertEqual(len(transport.requests), 1)
+        self.assertEqual(transport.requests[0][:2], ("POST", SEARCH_URL))
+        self.assertEqual(result, [{
+            "url": "https://omniverse-content-production.s3.us-west-2.amazonaws.com/fake transport box.usd",
+            "score": 0.5,
+        }])
+
+    async def test_error_status_returns_error(self):
+        ngc_connect = self._connect(FakeTransport(lambda *args: (503, "unavailable")), "fake transport error")
+        result = await ngc_connect.send_api_request_async(SEARCH_URL, priority=Priority.INTERACTIVE)
+        self.assertIn("error", result)
+        self.assertEqual(result["status"], 503)
+
+        # GET searches fail the same way.
+        with tempfile.TemporaryDirectory() as directory:
+            ngc_connect._http_cache = HttpCache(directory)
+            result = await ngc_connect.send_url_request_async(SEARCH_URL, priority=Priority.INTERACTIVE)
+        self.assertIn("error", result)
+        self.assertEqual(result["status"], 503)
+
+    async def test_payload_without_optional_fields(self):
+        transport = FakeTransport(lambda *args: (200, []))
+        ngc_connect = NgcConnect(transport=transport)
+        ngc_connect.set_payload({"description": "box"})
+        result = await ngc_connect.send_api_request_async(SEARCH_URL, priority=Priority.INTERACTIVE)
+
+        self.assertEqual(result, [])
+        self.assertEqual(json.loads(transport.requests[0][3]), {"description": "box"})
+
+    async def test_only_server_errors_fail_over_replicas(self):
+        replicas = ["http://replica-a.test/search", "http://replica-b.test/search"]
+        for status, failed_over in [(401, False), (403, False), (400, False), (429, True), (503, True)]:
+            transport = FakeTransport(lambda method, url, *args: (status, []) if url == replicas[0] else (200, []))
+            ngc_connect = NgcConnect(transport=transport)
+            replica_set = ReplicaSet(replicas)
+            result = await replica_set.request(
+                lambda url: ngc_connect._post_once_async(url, {}, json.dumps({"description": "box"}), None),
+                is_failure=_is_replica_failure,
+            )
+
+            self.assertEqual(len(transport.requests), 2 if failed_over else 1, status)
+            self.assertEqual(replica_set.replicas[0].consecutive_failures, 1 if failed_over else 0, status)
+            if failed_over:
+                self.assertEqual(result, [])
+            else:
+                self.assertEqual(result["status"], status)
+
+    async def test_open_replicas_are_skipped(self):
+        replicas = ["http://replica-a.test/search", "http://replica-b.test/search"]
+        down = set(replicas[:1])
+        transport = FakeTransport(lambda method, url, *args: (503, "down") if url in down else (200, []))
+        ngc_connect = NgcConnect(transport=transport)
+        replica_set = ReplicaSet(replicas, failure_threshold=1, open_duration=60.0)
+
+        def send(url):
+            return ngc_connect._post_once_async(url, {}, json.dumps({"description": "box"}), None)
+
+        for _ in range(3):
+            self.assertEqual(await replica_set.request(send, is_failure=_is_replica_failure), [])
+        # Only the first request reached the failing replica, its circuit then stayed open.
+        self.assertEqual([request[1] for request in transport.requests].count(replicas[0]), 1)
+        self.assertEqual(replica_set.replicas[0].state, "open")
+
+        # Once every circuit is open, requests still go out as a last resort.
+        down.add(replicas[1])
+        self.assertIn("error", await replica_set.request(send, is_failure=_is_replica_failure))
+        self.assertEqual(len(replica_set.ranked()), 2)
+        down.clear()
+        self.assertEqual(await replica_set.request(send, is_failure=_is_replica_failure), [])
+
+    async def test_fetches_measure_the_asset_link(self):
+        asset_url = "https://assets-link.test/props/box.usd"
+        # Nothing measured yet: the given defaults.
+        self.assertEqual(estimate_link(asset_url, 1e9, 9.0)[1], 9.0)
+
+        transport = FakeTransport(lambda *args: (200, b"x" * 64 * 1024), latency=0.01, bandwidth=1e6)
+        ngc_connect = NgcConnect(transport=transport)
+        self.assertIsNotNone(await ngc_connect.fetch_async("https://assets-link.test/props/.thumbs/box.png"))
+
+        bandwidth, rtt = estimate_link(asset_url, 1e9, 9.0)
+        self.assertLess(bandwidth, 1e9)
+        self.assertLess(rtt, 9.0)
+
+    async def test_get_search_is_canonical_and_cached(self):
+        etag = '"v1"'
+
+        def handler(method, url, headers, data):
+            if headers.get("If-None-Match") == etag:
+                return 304, b"", {"ETag": etag, "Cache-Control": "max-age=60"}
+            return 200, [{"url": "omniverse://host/box.usd", "score": 0.5}], {"ETag": etag, "Cache-Control": "no-cache"}
+
+        transport = FakeTransport(handler)
+        with tempfile.TemporaryDirectory() as directory:
+            http_cache = HttpCache(directory)
+            ngc_connect = NgcConnect(transport=transport, http_cache=http_cache)
+            ngc_connect.set_payload({
+                "description": "red box & chair",
+                "limit": 30,
+                "return_images": True,
+                "cutoff_threshold": 1.05,
+                "search_in_scene": "omniverse://host/scene.usd",
+            })
+            results = [await ngc_connect.send_url_request_async(SEARCH_URL) for _ in range(3)]
+
+        expected_url = (
+            f"{SEARCH_URL}?cutoff_threshold=1.05&description=red%20box%20%26%20chair&limit=30&return_images=true"
+            "&search_in_scene=omniverse%3A%2F%2Fhost%2Fscene.usd"
+        )
+        # The first response must be revalidated (no-cache), the 304 then makes it fresh for a minute.
+        self.assertEqual([request[1] for request in transport.requests], [expected_url, expected_url])
+        self.assertNotIn("If-None-Match", transport.requests[0][2])
+        self.assertEqual(transport.requests[1][2]["If-None-Match"], etag)
+        self.assertEqual(http_cache.revalidated, 1)
+        for result in results:
+            self.assertEqual(result, [{"url": "omniverse://host/box.usd", "score": 0.5}])
+
+    async def test_federated_text_search_uses_the_cache(self):
+        transport = FakeTransport(
+            lambda *args: (200, [{"url": "omniverse://host/box.usd", "score": 0.5}], {"Cache-Control": "max-age=60"})
+        )
+        endpoints = [SEARCH_URL, "http://usd-search-2.test/search"]
+        with tempfile.TemporaryDirectory() as directory:
+            ngc_connect = NgcConnect(transport=transport, http_cache=HttpCache(directory))
+            ngc_connect.set_payload({"description": "box", "limit": 30, "return_images": True})
+            for _ in range(2):
+                results = [
+                    result async for result in ngc_connect.send_federated_request_async(endpoints, use_url=True)
+                ]
+                self.assertEqual(len(results), 2)
+
+        # The second search is answered by the cache.
+        self.assertEqual(len(transport.requests), 2)
+        self.assertEqual({request[0] for request in transport.requests}, {"GET"})
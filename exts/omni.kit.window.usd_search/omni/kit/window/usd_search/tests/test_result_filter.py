@@ -0,0 +1,56 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: LicenseRef-NvidiaProprietary
+#
+# NVIDIA CORPORATION, its affiliates and licensors retain all intellectual
+# property and proprietary rights in and to this material, related
+# documentation and any modifications thereto. Any use, reproduction,
+# disclosure or distribution of this material and related documentation
+# without an express license agreement from NVIDIA CORPORATION or
+# its affiliates is strictly prohibited.
+
+import omni.kit.test
+
+from omni.kit.window.usd_search.utils.result_filter import ResultFilter
+from omni.kit.window.usd_search.utils.result_set import ResultSet
+
+
+class TestResultFilter(omni.kit.test.AsyncTestCase):
+    async def setUp(self):
+        self._results = ResultSet()
+        self._results.append("", "s3://bucket/props/box.usd", score=0.8, bbox_dimension=[10, 10, 10])
+        self._results.append("", "s3://bucket/props/chair.usd", score=0.5, bbox_dimension=[50, 90, 50])
+        self._results.append("", "s3://bucket/env/shelf.usd", score=0.9)
+        self._results.append("", "s3://bucket/env/table.usd")
+
+    def _apply(self, result_filter: ResultFilter) -> list:
+        return result_filter.apply(self._results).tolist()
+
+    async def test_sorts_by_score_keeping_unscored_last(self):
+        self.assertEqual(self._apply(ResultFilter()), [1, 0, 2, 3])
+
+    async def test_score_cutoff(self):
+        result_filter = ResultFilter()
+        result_filter.max_score = 0.85
+        self.assertEqual(self._apply(result_filter), [1, 0, 3])
+
+    async def test_path_prefixes(self):
+        result_filter = ResultFilter()
+        result_filter.path_prefixes = ["S3://bucket/env/"]
+        self.assertEqual(self._apply(result_filter), [2, 3])
+
+    async def test_bbox_range_keeps_unknown_dimensions(self):
+        result_filter = ResultFilter()
+        result_filter.bbox_max = (None, 50, None)
+        self.assertEqual(self._apply(result_filter), [0, 2, 3])
+
+    async def test_load_cost_sort_and_cutoff(self):
+        for model, load_seconds in zip(self._results, [3.0, 40.0, None, 0.5]):
+            model.load_seconds = load_seconds
+        result_filter = ResultFilter()
+        result_filter.sort_by_load_cost = True
+        self.assertEqual(self._apply(result_filter), [3, 0, 1, 2])
+        result_filter.max_load_seconds = 10.0
+        self.assertEqual(self._apply(result_filter), [3, 0, 2])
+
+    async def test_empty(self):
+        self.assertEqual(ResultFilter().apply(ResultSet()).tolist(), [])
@@ -0,0 +1,73 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: LicenseRef-NvidiaProprietary
+#
+# NVIDIA CORPORATION, its affiliates and licensors retain all intellectual
+# property and proprietary rights in and to this material, related
+# documentation and any modifications thereto. Any use, reproduction,
+# disclosure or distribution of this material and related documentation
+# without an express license agreement from NVIDIA CORPORATION or
+# its affiliates is strictly prohibited.
+
+import omni.kit.test
+
+from omni.kit.window.usd_search.utils.result_set import ResultSet
+from omni.kit.window.usd_search.utils.search_models import USDSearchModel
+
+
+class TestResultSet(omni.kit.test.AsyncTestCase):
+    async def setUp(self):
+        self._results = ResultSet(capacity=1)
+        self._results.append("a.png", "s3://bucket/props/box.usd", score=0.8, bbox_dimension=[1, 2, 3])
+        self._results.append(None, "s3://bucket/props/chair.usd")
+        self._results.append(None, "s3://bucket/env/shelf.usd")
+
+    async def test_models_are_row_views(self):
+        box, chair = self._results[0], self._results[1]
+        self.assertEqual(box.asset_url, "s3://bucket/props/box.usd")
+        self.assertEqual(box.asset_name, "box.usd")
+        self.assertEqual(box.bbox_dimension, [1.0, 2.0, 3.0])
+        self.assertIsNone(chair.score)
+        chair.load_seconds = 2.5
+        chair.stale = True
+        self.assertEqual(self._results.load_seconds[1], 2.5)
+        self.assertEqual(self._results.rows_with_flag(ResultSet.STALE).tolist(), [1])
+        # Directories are stored once.
+        self.assertEqual(self._results.prefixes, ["s3://bucket/props/", "s3://bucket/env/"])
+
+    async def test_prefix_match(self):
+        self.assertEqual(self._results.match_prefixes(["S3://bucket/PROPS"]).tolist(), [True, True, False])
+        self.assertEqual(self._results.match_prefixes(["s3://bucket/props/ch"]).tolist(), [False, True, False])
+
+    async def test_concatenation_remaps_prefixes(self):
+        other = ResultSet()
+        other.append(None, "s3://bucket/env/table.usd").local = True
+        self._results.set_flag(0, ResultSet.SELECTED)
+        combined = other + self._results
+        self.assertEqual(combined.asset_urls(), ["s3://bucket/env/table.usd"] + self._results.asset_urls())
+        self.assertEqual(combined.prefixes, ["s3://bucket/env/", "s3://bucket/props/"])
+        self.assertTrue(combined[0].local)
+        self.assertEqual(combined[1].score, 0.8)
+        self.assertEqual(len(combined.rows_with_flag(ResultSet.SELECTED)), 0)
+        view = combined.view([3, 0])
+        self.assertEqual(view.asset_urls(), ["s3://bucket/env/shelf.usd", "s3://bucket/env/table.usd"])
+
+    async def test_standalone_models_are_copied_in(self):
+        box = USDSearchModel.from_values("box.png", "s3://bucket/props/box.usd", "box.usd", score=0.5)
+        self.assertEqual(box.asset_name, "box.usd")
+        self.assertEqual(box.score, 0.5)
+        chair = self._results[1]
+        chair.size = 1024
+
+        results = ResultSet.from_models([box, chair])
+        self.assertEqual(results.asset_urls(), ["s3://bucket/props/box.usd", "s3://bucket/props/chair.usd"])
+        self.assertEqual(results.images, ["box.png", None])
+        self.assertEqual(results[1].size, 1024)
+
+    async def test_model_constructor_is_unchanged(self):
+        box = USDSearchModel("box.png", "s3://bucket/props/box.usd", "box.usd")
+        self.assertEqual(box.image_url, "box.png")
+        self.assertEqual(box.asset_url, "s3://bucket/props/box.usd")
+        self.assertEqual(box.asset_name, "box.usd")
+        self.assertIsNone(box.score)
+        box.size = 1024
+        self.assertEqual(ResultSet.from_models([box])[0].size, 1024)
@@ -0,0 +1,57 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: LicenseRef-NvidiaProprietary
+#
+# NVIDIA CORPORATION, its affiliates and licensors retain all intellectual
+# property and proprietary rights in and to this material, related
+# documentation and any modifications thereto. Any use, reproduction,
+# disclosure or distribution of this material and related documentation
+# without an express license agreement from NVIDIA CORPORATION or
+# its affiliates is strictly prohibited.
+
+import asyncio
+
+import omni.kit.test
+
+from omni.kit.window.usd_search.utils.single_flight import SingleFlight
+
+
+class TestSingleFlight(omni.kit.test.AsyncTestCase):
+    async def setUp(self):
+        self._calls = 0
+
+    async def _operation(self):
+        self._calls += 1
+        await asyncio.sleep(0.1)
+        return self._calls
+
+    async def test_concurrent_calls_share_one_operation(self):
+        single_flight = SingleFlight()
+        results = await asyncio.gather(
+            single_flight.do("key", self._operation), single_flight.do("key", self._operation)
+        )
+        self.assertEqual(results, [1, 1])
+        self.assertEqual(single_flight.in_flight, 0)
+
+    async def test_cancelled_caller_does_not_abort_others(self):
+        single_flight = SingleFlight()
+        first = asyncio.ensure_future(single_flight.do("key", self._operation))
+        second = asyncio.ensure_future(single_flight.do("key", self._operation))
+        await asyncio.sleep(0.02)
+        first.cancel()
+        self.assertEqual(await second, 1)
+
+    async def test_operation_cancelled_without_callers(self):
+        single_flight = SingleFlight(grace_period=0.01)
+        caller = asyncio.ensure_future(single_flight.do("key", self._operation))
+        await asyncio.sleep(0.02)
+        caller.cancel()
+        await asyncio.sleep(0.05)
+        self.assertEqual(single_flight.in_flight, 0)
+
+    async def test_restart_within_grace_period_rejoins(self):
+        single_flight = SingleFlight(grace_period=0.5)
+        caller = asyncio.ensure_future(single_flight.do("key", self._operation))
+        await asyncio.sleep(0.02)
+        caller.cancel()
+        self.assertEqual(await single_flight.do("key", self._operation), 1)
+        self.assertEqual(self._calls, 1)
@@ -0,0 +1,256 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: LicenseRef-NvidiaProprietary
+#
+# NVIDIA CORPORATION, its affiliates and licensors retain all intellectual
+# property and proprietary rights in and to this material, related
+# documentation and any modifications thereto. Any use, reproduction,
+# disclosure or distribution of this material and related documentation
+# without an express license agreement from NVIDIA CORPORATION or
+# its affiliates is strictly prohibited.
+
+"""
+Long-session soak test: drives many searches through the window against a local mock server and checks that
+memory, widgets, file handles, model callbacks, disk usage and asyncio tasks stay bounded.
+
+Set USD_SEARCH_SOAK_ITERATIONS to run thousands of searches (ie: nightly), and USD_SEARCH_SOAK_REPORT to choose
+where the JSON report is written, to compare it across versions.
+"""
+
+import asyncio
+import base64
+import gc
+import io
+import json
+import logging
+import os
+import socket
+import sys
+import tempfile
+import time
+
+import carb.settings
+import omni.kit.app
+import omni.kit.test
+from aiohttp import web
+from PIL import Image
+
+from omni.kit.window.usd_search.utils import ngc_connect
+from omni.kit.window.usd_search.utils.animate_widget import AnimateWindget
+from omni.kit.window.usd_search.utils.image_widget import USDSearchImageWidget
+from omni.kit.window.usd_search.window import UsdSearchWindow
+
+logger = logging.getLogger(__name__)
+
+SETTINGS_PREFIX = "/exts/omni.kit.window.usd_search"
+RESULTS_PER_SEARCH = 30
+WARMUP_ITERATIONS = 20
+THUMBNAIL_PACK_MAX_MB = 8
+
+# Allowed growth between the end of the warm-up and the end of the soak.
+MAX_RSS_GROWTH_MB = 100.0
+MAX_OPEN_FILES_GROWTH = 8
+MAX_ASYNCIO_TASKS_GROWTH = 4
+# The grid and spinner being shown, plus the ones they just replaced.
+MAX_LIVE_WIDGETS = 2
+# The thumbnail pack while it compacts, plus the result index.
+MAX_CACHE_DISK_MB = THUMBNAIL_PACK_MAX_MB * 2 + 32
+
+
+def _rss_mb() -> float:
+    try:
+        import psutil
+
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+
+    # Peak rather than current, still catches unbounded growth.
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss / (1024 * 1024) if sys.platform == "darwin" else maxrss / 1024
+
+
+def _open_files() -> int:
+    try:
+        import psutil
+
+        process = psutil.Process()
+        return process.num_handles() if sys.platform == "win32" else process.num_fds()
+    except ImportError:
+        pass
+    try:
+        return len(os.listdir("/proc/self/fd"))
+    except OSError:
+        return -1
+
+
+def _disk_mb(directory: str) -> float:
+    total = 0
+    for root, _, files in os.walk(directory):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total / (1024 * 1024)
+
+
+def _count_instances(cls) -> int:
+    return sum(1 for obj in gc.get_objects() if isinstance(obj, cls))
+
+
+def _make_images(count: int = 8) -> list:
+    images = []
+    for i in range(count):
+        buffer = io.BytesIO()
+        Image.new("RGB", (256, 256), (i * 30 % 256, 128, 255 - i * 30 % 256)).save(buffer, format="JPEG")
+        images.append(base64.b64encode(buffer.getvalue()).decode("ascii"))
+    return images
+
+
+class TestSoak(omni.kit.test.AsyncTestCase):
+    async def setUp(self):
+        self._app = omni.kit.app.get_app()
+        self._settings = carb.settings.get_settings()
+        self._images = _make_images()
+        self._searches = 0
+        self._cache_directory = tempfile.TemporaryDirectory()
+
+        app = web.Application()
+        app.router.add_post("/search", self._on_search)
+        app.router.add_route("*", "/assets/{name}", self._on_asset)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.bind(("127.0.0.1", 0))
+        await web.SockSite(self._runner, sock).start()
+        self._base_url = f"http://127.0.0.1:{sock.getsockname()[1]}"
+
+        self._saved_settings = {}
+        for key, value in {
+            "host_url": f"{self._base_url}/search",
+            "host_urls": [],
+            "host_url_replicas": [],
+            "require_authorization": False,
+            "rate_limit_per_second": 0.0,
+            "thumbnail_pack_max_mb": THUMBNAIL_PACK_MAX_MB,
+            # Measure the cache of this test only, not the one shared with other Kit instances.
+            "cache_directory": self._cache_directory.name,
+        }.items():
+            self._saved_settings[key] = self._settings.get(f"{SETTINGS_PREFIX}/{key}")
+            self._settings.set(f"{SETTINGS_PREFIX}/{key}", value)
+        # Picks up the unlimited rate from the settings above.
+        ngc_connect._rate_limiter = None
+
+        self._window = UsdSearchWindow("USD Search Soak", width=416, height=562)
+        for _ in range(100):
+            await self._app.next_update_async()
+            if self._window._animate_widget is not None:
+                break
+
+    async def tearDown(self):
+        self._window.destroy()
+        self._window = None
+        await self._runner.cleanup()
+        for key, value in self._saved_settings.items():
+            if value is not None:
+                self._settings.set(f"{SETTINGS_PREFIX}/{key}", value)
+        ngc_connect._rate_limiter = None
+        self._cache_directory.cleanup()
+
+    async def _on_search(self, request: web.Request) -> web.Response:
+        payload = await request.json()
+        self._searches += 1
+        results = [
+            {
+                "url": f"{self._base_url}/assets/{payload['description'].replace(' ', '_')}_{i}.usd",
+                "image": self._images[(self._searches + i) % len(self._images)],
+                "score": 0.5 + i / 100.0,
+            }
+            for i in range(RESULTS_PER_SEARCH)
+        ]
+        return web.json_response(results)
+
+    async def _on_asset(self, request: web.Request) -> web.Response:
+        return web.Response(body=b"#usda 1.0\n", content_type="application/octet-stream")
+
+    async def _search(self, query: str):
+        self._window._query_model.set_value(query)
+        self._window._query()
+        await self._window._query_future
+        await asyncio.gather(*self._window._thumbnail_futures, *self._window._stat_futures, return_exceptions=True)
+        for _ in range(1000):
+            await self._app.next_update_async()
+            if self._window._frame_scheduler.pending == 0:
+                break
+
+    def _sample(self) -> dict:
+        gc.collect()
+        return {
+            "rss_mb": _rss_mb(),
+            "open_files": _open_files(),
+            "image_widgets": _count_instances(USDSearchImageWidget),
+            "spinners": _count_instances(AnimateWindget),
+            "model_callbacks": self._window.model_callback_count,
+            "cache_disk_mb": _disk_mb(self._window._image_handler.get_cache_directory()),
+            "asyncio_tasks": len(asyncio.all_tasks()),
+            "window_tasks": self._window.task_stats["live"],
+        }
+
+    def _write_report(self, report: dict) -> str:
+        path = os.environ.get("USD_SEARCH_SOAK_REPORT") or os.path.join(
+            tempfile.gettempdir(), "usd_search_soak_report.json"
+        )
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+        return path
+
+    async def test_repeated_searches_stay_bounded(self):
+        iterations = int(os.environ.get("USD_SEARCH_SOAK_ITERATIONS", 200))
+        sample_every = max(1, iterations // 20)
+        start = time.monotonic()
+
+        for i in range(WARMUP_ITERATIONS):
+            await self._search(f"warmup {i}")
+        baseline = self._sample()
+
+        samples = []
+        for i in range(iterations):
+            await self._search(f"soak {i}")
+            if (i + 1) % sample_every == 0:
+                samples.append(dict(self._sample(), iteration=i + 1))
+        final = self._sample()
+
+        extension_manager = self._app.get_extension_manager()
+        ext_id = extension_manager.get_enabled_extension_id("omni.kit.window.usd_search")
+        report = {
+            "extension": ext_id,
+            "iterations": iterations,
+            "results_per_search": RESULTS_PER_SEARCH,
+            "server_requests": self._searches,
+            "duration_s": time.monotonic() - start,
+            "baseline": baseline,
+            "final": final,
+            "samples": samples,
+            "task_stats": self._window.task_stats,
+            "frame_scheduler": self._window._frame_scheduler.stats,
+        }
+        logger.info(f"Soak report written to {self._write_report(report)}")
+
+        self.assertEqual(self._searches, WARMUP_ITERATIONS + iterations)
+        self.assertLessEqual(final["rss_mb"] - baseline["rss_mb"], MAX_RSS_GROWTH_MB)
+        if baseline["open_files"] >= 0:
+            self.assertLessEqual(final["open_files"] - baseline["open_files"], MAX_OPEN_FILES_GROWTH)
+        self.assertLessEqual(final["image_widgets"], MAX_LIVE_WIDGETS)
+        self.assertLessEqual(final["spinners"], MAX_LIVE_WIDGETS)
+        self.assertEqual(final["model_callbacks"], baseline["model_callbacks"])
+        self.assertLessEqual(final["cache_disk_mb"], MAX_CACHE_DISK_MB)
+        self.assertLessEqual(final["asyncio_tasks"] - baseline["asyncio_tasks"], MAX_ASYNCIO_TASKS_GROWTH)
+        self.assertEqual(final["window_tasks"], 0)
@@ -0,0 +1,91 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: LicenseRef-NvidiaProprietary
+#
+# NVIDIA CORPORATION, its affiliates and licensors retain all intellectual
+# property and proprietary rights in and to this material, related
+# documentation and any modifications thereto. Any use, reproduction,
+# disclosure or distribution of this material and related documentation
+# without an express license agreement from NVIDIA CORPORATION or
+# its affiliates is strictly prohibited.
+
+import omni.kit.app
+import omni.kit.test
+import omni.ui as ui
+from PIL import Image
+
+from omni.kit.window.usd_search.utils.thumbnail_atlas import ThumbnailAtlas
+
+
+class _SolidThumbnails:
+    """Stands in for the ImageHandler, every thumbnail is a red 32x16 image."""
+    def load_thumbnail(self, image: str):
+        return Image.new("RGBA", (32, 16), (255, 0, 0, 255))
+
+
+class TestThumbnailAtlas(omni.kit.test.AsyncTestCase):
+    async def setUp(self):
+        # 2 x 2 cells of 16 pixels per page.
+        self._atlas = ThumbnailAtlas(_SolidThumbnails(), 16, page_pixels=40, max_pages=2)
+        self._window = ui.Window("Thumbnail Atlas Test", width=200, height=200)
+
+    async def tearDown(self):
+        self._atlas.destroy()
+        self._window.destroy()
+
+    def _build(self, keys: list) -> list:
+        with self._window.frame:
+            with ui.VStack():
+                return [self._atlas.build_image(key, 16, 16) for key in keys]
+
+    async def test_cells_are_shared_and_reused(self):
+        images = self._build([f"asset{i}" for i in range(9)])
+        self.assertEqual(self._atlas.capacity, 8)
+        self.assertEqual(self._atlas.page_count, 2)
+        # Beyond capacity tiles get their own texture.
+        self.assertIsNone(images[8])
+        self.assertEqual(len(self._atlas), 8)
+
+        self._atlas.retain(["asset0", "asset1"])
+        self.assertEqual(len(self._atlas), 2)
+        self.assertIsNotNone(self._build(["asset8"])[0])
+        self.assertEqual(self._atlas.page_count, 2)
+
+    def _copy(self, keys: list):
+        """Copies thumbnails into the cells of `keys` like the decode tasks do, all within the current frame."""
+        for key in keys:
+            self._atlas._contents[key] = "thumbnail-pack:0"
+            self._atlas._copy(key, self._atlas._slots[key], "thumbnail-pack:0")
+            self._atlas._schedule_upload()
+
+    async def _next_frames(self, count: int = 3):
+        for _ in range(count):
+            await omni.kit.app.get_app().next_update_async()
+
+    async def test_thumbnails_are_uploaded_once_per_frame(self):
+        # Three cells of the first page changed in one frame: one upload.
+        self._build(["asset0", "asset1", "asset2"])
+        self._copy(["asset0", "asset1", "asset2"])
+        await self._next_frames()
+        self.assertEqual(self._atlas.uploads, 1)
+        # Filled to the width and centered.
+        page = self._atlas._pages[0].pixels
+        self.assertEqual(tuple(page[8, 8]), (255, 0, 0, 255))
+        self.assertEqual(tuple(page[2, 8]), (0, 0, 0, 0))
+
+        # Cells of both pages changed in one frame: one upload per page.
+        self._build(["asset3", "asset4"])
+        self.assertEqual(self._atlas.page_count, 2)
+        self._copy(["asset3", "asset4"])
+        await self._next_frames()
+        self.assertEqual(self._atlas.uploads, 3)
+
+        # Nothing changed: no upload.
+        await self._next_frames()
+        self.assertEqual(self._atlas.uploads, 3)
+
+    async def test_decoded_thumbnails_are_uploaded(self):
+        self._build(["asset0"])
+        self._atlas.set_image("asset0", "thumbnail-pack:0")
+        await self._next_frames(10)
+        self.assertEqual(tuple(self._atlas._pages[0].pixels[8, 8]), (255, 0, 0, 255))
+        self.assertGreaterEqual(self._atlas.uploads, 1)
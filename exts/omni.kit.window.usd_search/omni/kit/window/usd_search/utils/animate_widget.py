@@ -1,4 +1,4 @@
-import asyncio
+from typing import Optional
 
 import omni.kit.app
 import omni.ui as ui
@@ -6,12 +6,14 @@ from omni.ui import color as cl
 from omni.ui import scene as sc
 
 from ..style import ICON_PATH
+from .task_group import TaskGroup
 
 
 class AnimateWindget():
-    def __init__(self, visible: bool = True):
+    def __init__(self, visible: bool = True, task_group: Optional[TaskGroup] = None):
         self._build_ui()
 
+        self._task_group = task_group or TaskGroup("animate_widget")
         self._rotate_future = None
         self.visible = visible
 
@@ -26,9 +28,12 @@ class AnimateWindget():
     def visible(self, value: bool) -> None:
         self._frame.visible = value
         if value:
-            self._rotate_future = asyncio.ensure_future(self._rotate())
+            # Showing an already visible spinner must not start a second rotation.
+            if self._rotate_future is None or self._rotate_future.done():
+                self._rotate_future = self._task_group.create_task(self._rotate(), "spinner")
         elif self._rotate_future:
             self._rotate_future.cancel()
+            self._rotate_future = None
 
     def _build_ui(self) -> None:
         with ui.Frame() as self._frame:
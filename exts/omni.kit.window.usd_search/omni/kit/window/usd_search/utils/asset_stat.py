@@ -0,0 +1,174 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: LicenseRef-NvidiaProprietary
+#
+# NVIDIA CORPORATION, its affiliates and licensors retain all intellectual
+# property and proprietary rights in and to this material, related
+# documentation and any modifications thereto. Any use, reproduction,
+# disclosure or distribution of this material and related documentation
+# without an express license agreement from NVIDIA CORPORATION or
+# its affiliates is strictly prohibited.
+
+__all__ = ["AssetStat", "AssetStatCache", "format_size", "format_seconds"]
+
+import asyncio
+import logging
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+import omni.client
+
+logger = logging.getLogger(__name__)
+
+
+def format_size(size: int) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024.0
+
+
+def format_seconds(seconds: float) -> str:
+    if seconds < 1:
+        return "<1 s"
+    if seconds < 60:
+        return f"~{seconds:.0f} s"
+    return f"~{seconds / 60:.0f} min"
+
+
+class AssetStat:
+    """
+    Download size of a result asset, optionally including the layers it depends on.
+    """
+    def __init__(self, url: str, size: int, dependency_size: int = 0, dependency_count: int = 0):
+        self.url = url
+        self.size = size
+        self.dependency_size = dependency_size
+        self.dependency_count = dependency_count
+        self.fetched_at = time.monotonic()
+
+    @property
+    def total_size(self) -> int:
+        return self.size + self.dependency_size
+
+    def estimate_load_seconds(self, bandwidth: float, rtt: float) -> float:
+        """
+        Args:
+            bandwidth (float): Bytes per second to the asset server.
+            rtt (float): Round-trip time in seconds, paid once per file.
+
+        Returns:
+            float: Rough time to fetch the asset and its dependencies.
+        """
+        return self.total_size / max(bandwidth, 1.0) + rtt * (1 + self.dependency_count)
+
+
+class AssetStatCache:
+    """
+    Stats result assets with `omni.client.stat_async` at bounded concurrency and remembers the outcome.
+
+    With dependency discovery on, the asset's root layer is also opened to find sublayers, references and
+    payloads, which are stat'ed and added to its size. That is only one level deep, and costs reading the root
+    layer, so it is off by default.
+    """
+    def __init__(
+        self, max_concurrent: int = 8, discover_dependencies: bool = False, max_dependencies: int = 64,
+        ttl: float = 600.0,
+    ):
+        """
+        Args:
+            max_concurrent (int): Stat requests in flight at once.
+            discover_dependencies (bool): Add the size of layers the asset depends on.
+            max_dependencies (int): Dependencies stat'ed per asset.
+            ttl (float): Seconds a cached stat stays valid.
+        """
+        self._max_concurrent = max_concurrent
+        self._discover_dependencies = discover_dependencies
+        self._max_dependencies = max_dependencies
+        self._ttl = ttl
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._cache: Dict[str, AssetStat] = {}
+
+    def get(self, url: str) -> Optional[AssetStat]:
+        """
+        Returns:
+            AssetStat: The cached stat of `url`, None if not known or expired.
+        """
+        stat = self._cache.get(url)
+        if stat is not None and time.monotonic() - stat.fetched_at > self._ttl:
+            del self._cache[url]
+            return None
+        return stat
+
+    def clear(self):
+        self._cache.clear()
+
+    async def _stat_size_async(self, url: str) -> Optional[int]:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self._max_concurrent)
+        async with self._semaphore:
+            result, entry = await omni.client.stat_async(url)
+        if result != omni.client.Result.OK:
+            logger.info(f"Failed to stat {url}: {result}")
+            return None
+        return entry.size
+
+    def _list_dependencies(self, url: str) -> List[str]:
+        from pxr import Sdf
+
+        layer = Sdf.Layer.FindOrOpen(url)
+        if layer is None:
+            return []
+        if hasattr(layer, "GetCompositionAssetDependencies"):
+            dependencies = layer.GetCompositionAssetDependencies()
+        else:
+            dependencies = layer.GetExternalReferences()
+        urls = [omni.client.combine_urls(url, dependency) for dependency in dependencies if dependency]
+        return list(dict.fromkeys(urls))[:self._max_dependencies]
+
+    async def stat_async(self, url: str) -> Optional[AssetStat]:
+        """
+        Args:
+            url (str): Asset URL.
+
+        Returns:
+            AssetStat: Size of the asset, None if it could not be stat'ed.
+        """
+        stat = self.get(url)
+        if stat is not None:
+            return stat
+
+        size = await self._stat_size_async(url)
+        if size is None:
+            return None
+
+        dependency_size = 0
+        dependency_count = 0
+        if self._discover_dependencies:
+            try:
+                # Layers open through the resolver, keep it off the main thread.
+                loop = asyncio.get_event_loop()
+                dependencies = await loop.run_in_executor(None, self._list_dependencies, url)
+            except Exception as e:
+                logger.info(f"Failed to list dependencies of {url}: {e}")
+                dependencies = []
+            sizes = await asyncio.gather(*[self._stat_size_async(dependency) for dependency in dependencies])
+            sizes = [size for size in sizes if size is not None]
+            dependency_size = sum(sizes)
+            dependency_count = len(sizes)
+
+        stat = AssetStat(url, size, dependency_size, dependency_count)
+        self._cache[url] = stat
+        return stat
+
+    async def stat_all_async(self, urls: Iterable[str], on_stat: Callable[[AssetStat], None]):
+        """
+        Stats every URL concurrently, calling `on_stat` as each one completes.
+
+        Args:
+            urls (Iterable[str]): Asset URLs.
+            on_stat (Callable): Called with each AssetStat, in completion order.
+        """
+        for future in asyncio.as_completed([self.stat_async(url) for url in dict.fromkeys(urls)]):
+            stat = await future
+            if stat is not None:
+                on_stat(stat)
@@ -0,0 +1,206 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: LicenseRef-NvidiaProprietary
+#
+# NVIDIA CORPORATION, its affiliates and licensors retain all intellectual
+# property and proprietary rights in and to this material, related
+# documentation and any modifications thereto. Any use, reproduction,
+# disclosure or distribution of this material and related documentation
+# without an express license agreement from NVIDIA CORPORATION or
+# its affiliates is strictly prohibited.
+
+__all__ = ["ContactSheet"]
+
+import asyncio
+import logging
+import math
+import re
+from typing import Dict, List, Optional, Sequence
+
+import carb.events
+import omni.client
+import omni.kit.app
+import omni.usd
+from pxr import Gf, Sdf, Usd, UsdGeom
+
+from .task_group import TaskGroup
+
+logger = logging.getLogger(__name__)
+
+
+class ContactSheet:
+    """
+    Lays out a whole result set in the stage as a grid of payloads that start unloaded.
+
+    Payloads are loaded on demand as the viewport camera approaches them, and unloaded again once it moves well
+    away. Asset files are fetched ahead of the load at bounded concurrency, so the synchronous payload load on the
+    main thread only composes layers already in the client cache.
+    """
+    def __init__(
+        self, load_distance: float = 500.0, max_concurrent_loads: int = 4, default_size: float = 100.0,
+        spacing: float = 1.25, task_group: Optional[TaskGroup] = None,
+    ):
+        """
+        Args:
+            load_distance (float): Camera distance in stage units under which a payload is loaded.
+            max_concurrent_loads (int): Assets fetched at once.
+            default_size (float): Cell size used for results without bounding box dimensions.
+            spacing (float): Cell size relative to the asset bounding box.
+            task_group (TaskGroup): Owner of the payload load tasks.
+        """
+        self._load_distance = load_distance
+        self._max_concurrent_loads = max_concurrent_loads
+        self._default_size = default_size
+        self._spacing = spacing
+        self._task_group = task_group or TaskGroup("contact_sheet")
+        self._stage = None
+        self._root_path: Optional[Sdf.Path] = None
+        # prim path -> (cell center, asset url)
+        self._cells: Dict[Sdf.Path, tuple] = {}
+        self._loading = set()
+        self._failed = set()
+        self._semaphore = None
+        self._update_sub = None
+        self._frame = 0
+
+    def destroy(self):
+        self._update_sub = None
+        self._task_group.cancel("load_payload")
+        self._cells.clear()
+        self._stage = None
+
+    @staticmethod
+    def _prim_name(asset_name: str, index: int) -> str:
+        name = re.sub(r"\W", "_", asset_name.rsplit(".", 1)[0]) or "asset"
+        if name[0].isdigit():
+            name = "_" + name
+        return f"{name}_{index}"
+
+    def _cell_size(self, model) -> List[float]:
+        if model.bbox_dimension is None:
+            return [self._default_size] * 3
+        return [max(float(d), 1e-3) * self._spacing for d in model.bbox_dimension]
+
+    def build(self, stage: Usd.Stage, models: Sequence, root_path: str = "/USDSearchResults") -> Sdf.Path:
+        """
+        Creates the grid of unloaded payloads, replacing a previous one at `root_path`.
+
+        Args:
+            stage (Usd.Stage): Stage to lay the results out in.
+            models (Sequence): USDSearchModel results, ie: the ResultView on display.
+            root_path (str): Prim holding the grid, made unique if taken by something else.
+
+        Returns:
+            Sdf.Path: Path of the grid root prim.
+        """
+        self._stage = stage
+        self._cells.clear()
+        self._loading.clear()
+        self._failed.clear()
+        if self._root_path is None or self._root_path != Sdf.Path(root_path):
+            root_path = omni.usd.get_stage_next_free_path(stage, root_path, False)
+        self._root_path = Sdf.Path(root_path)
+        stage.RemovePrim(self._root_path)
+
+        # Nothing under the grid loads until the camera gets close.
+        rules = stage.GetLoadRules()
+        rules.AddRule(self._root_path, Usd.StageLoadRules.NoneRule)
+        stage.SetLoadRules(rules)
+
+        up_axis = UsdGeom.GetStageUpAxis(stage)
+        columns = max(1, math.ceil(math.sqrt(len(models))))
+        # Each row is as deep as its largest asset, each asset as wide as its own bounding box.
+        sizes = [self._cell_size(model) for model in models]
+
+        with Sdf.ChangeBlock():
+            UsdGeom.Xform.Define(stage, self._root_path)
+            depth_offset = 0.0
+            for row_start in range(0, len(models), columns):
+                row = range(row_start, min(row_start + columns, len(models)))
+                row_depth = max(sizes[i][2 if up_axis == UsdGeom.Tokens.y else 1] for i in row)
+                width_offset = 0.0
+                for i in row:
+                    model = models[i]
+                    width = sizes[i][0]
+                    if up_axis == UsdGeom.Tokens.y:
+                        center = Gf.Vec3d(width_offset + width / 2, 0, depth_offset + row_depth / 2)
+                    else:
+                        center = Gf.Vec3d(width_offset + width / 2, depth_offset + row_depth / 2, 0)
+                    width_offset += width
+
+                    prim_path = self._root_path.AppendChild(self._prim_name(model.asset_name, i))
+                    prim = UsdGeom.Xform.Define(stage, prim_path).GetPrim()
+                    prim.GetPayloads().AddPayload(model.asset_url)
+                    prim.SetCustomDataByKey("usdsearch:asset_url", model.asset_url)
+                    UsdGeom.XformCommonAPI(prim).SetTranslate(center)
+                    self._cells[prim_path] = (center, model.asset_url)
+                depth_offset += row_depth
+
+        logger.info(f"Laid out {len(models)} results as unloaded payloads under {self._root_path}")
+        return self._root_path
+
+    def start_streaming(self):
+        """Starts loading payloads near the viewport camera, and unloading far ones, every few frames."""
+        self._semaphore = asyncio.Semaphore(self._max_concurrent_loads)
+        self._update_sub = omni.kit.app.get_app().get_update_event_stream().create_subscription_to_pop(
+            self._on_update, name="omni.kit.window.usd_search contact sheet"
+        )
+
+    def _camera_position(self) -> Optional[Gf.Vec3d]:
+        from omni.kit.viewport.utility import get_active_viewport
+
+        viewport_api = get_active_viewport()
+        if viewport_api is None:
+            return None
+        camera = self._stage.GetPrimAtPath(viewport_api.camera_path)
+        if not camera:
+            return None
+        transform = UsdGeom.Xformable(camera).ComputeLocalToWorldTransform(Usd.TimeCode.Default())
+        return transform.ExtractTranslation()
+
+    def _on_update(self, event: carb.events.IEvent):
+        self._frame += 1
+        # Distances don't need checking every frame.
+        if self._frame % 10 or not self._cells:
+            return
+        if self._stage is None or not self._stage.GetPrimAtPath(self._root_path):
+            self.destroy()
+            return
+        camera_position = self._camera_position()
+        if camera_position is None:
+            return
+
+        root_transform = UsdGeom.Xformable(self._stage.GetPrimAtPath(self._root_path)).ComputeLocalToWorldTransform(
+            Usd.TimeCode.Default()
+        )
+        nearby = []
+        for prim_path, (center, asset_url) in self._cells.items():
+            distance = (root_transform.Transform(center) - camera_position).GetLength()
+            loaded = self._stage.GetPrimAtPath(prim_path).IsLoaded()
+            if (
+                distance < self._load_distance and not loaded
+                and prim_path not in self._loading and prim_path not in self._failed
+            ):
+                nearby.append((distance, prim_path, asset_url))
+            elif distance > self._load_distance * 2 and loaded:
+                # Hysteresis, so payloads at the edge don't flip between loaded and unloaded.
+                self._stage.Unload(prim_path)
+
+        for _, prim_path, asset_url in sorted(nearby):
+            self._loading.add(prim_path)
+            self._task_group.create_task(self._load_async(prim_path, asset_url), "load_payload")
+
+    async def _load_async(self, prim_path: Sdf.Path, asset_url: str):
+        try:
+            async with self._semaphore:
+                if self._stage is None:
+                    return
+                # Warm the client cache off the main thread, then compose on it.
+                result, _, _ = await omni.client.read_file_async(asset_url)
+                if result != omni.client.Result.OK:
+                    logger.warning(f"Failed to fetch {asset_url}: {result}")
+                    self._failed.add(prim_path)
+                    return
+                if self._stage is not None and self._stage.GetPrimAtPath(prim_path):
+                    self._stage.Load(prim_path)
+        finally:
+            self._loading.discard(prim_path)
@@ -0,0 +1,143 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: LicenseRef-NvidiaProprietary
+#
+# NVIDIA CORPORATION, its affiliates and licensors retain all intellectual
+# property and proprietary rights in and to this material, related
+# documentation and any modifications thereto. Any use, reproduction,
+# disclosure or distribution of this material and related documentation
+# without an express license agreement from NVIDIA CORPORATION or
+# its affiliates is strictly prohibited.
+
+__all__ = ["VariantGrouper", "dhash", "hamming_distances", "url_stem"]
+
+import logging
+import re
+from typing import List, Optional, Sequence
+
+import numpy as np
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+Resampling = getattr(Image, "Resampling", Image)
+
+# Set bits of every byte value
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+# Suffixes naming a level of detail or a version of the same asset, ie: chair_LOD1.usdc, chair_v2.usd
+_VARIANT_SUFFIX = re.compile(r"([_\-.](lod\d*|low|mid|high|proxy|render|v\d+))+$", re.IGNORECASE)
+
+
+def url_stem(url: str) -> str:
+    """
+    Returns:
+        str: The asset URL without its USD format extension and variant suffixes, lower case, so .usd / .usda /
+            .usdc / .usdz copies and LODs of one asset share a stem.
+    """
+    directory, _, name = url.rpartition("/")
+    base, dot, extension = name.rpartition(".")
+    if dot and extension.lower().startswith("usd"):
+        name = base
+    return f"{directory}/{_VARIANT_SUFFIX.sub('', name)}".lower()
+
+
+def dhash(images: Sequence[Image.Image]) -> np.ndarray:
+    """
+    Difference hashes of a batch of images: each image is reduced to 9x8 gray pixels and every bit tells whether
+    a pixel is brighter than its left neighbour, so the hash survives scaling, compression and small color changes.
+
+    Args:
+        images (Sequence[Image.Image]): The images, any size and mode.
+
+    Returns:
+        np.ndarray: One uint64 hash per image.
+    """
+    if not images:
+        return np.zeros(0, dtype=np.uint64)
+    pixels = np.stack(
+        [np.asarray(image.convert("L").resize((9, 8), Resampling.BILINEAR), dtype=np.int16) for image in images]
+    )
+    bits = pixels[:, :, 1:] > pixels[:, :, :-1]
+    return np.packbits(bits.reshape(len(images), 64), axis=1).view(">u8").ravel().astype(np.uint64)
+
+
+def hamming_distances(image_hash: int, hashes: np.ndarray) -> np.ndarray:
+    """
+    Args:
+        image_hash (int): A uint64 hash.
+        hashes (np.ndarray): N uint64 hashes.
+
+    Returns:
+        np.ndarray: Number of bits differing between `image_hash` and each of `hashes`, one row at a time so memory
+            stays linear in N.
+    """
+    xor = np.ascontiguousarray(hashes, dtype=np.uint64) ^ np.uint64(image_hash)
+    return _POPCOUNT[xor.view(np.uint8)].reshape(len(xor), 8).sum(axis=1, dtype=np.int32)
+
+
+class VariantGrouper:
+    """
+    Groups near-identical results, ie: format copies, LODs and material variants of the same prop.
+
+    Two results are variants when they share a URL stem, or when they sit in the same directory and their
+    thumbnail hashes differ by at most `max_distance` bits. Grouping is transitive.
+    """
+    def __init__(self, max_distance: int = 6):
+        """
+        Args:
+            max_distance (int): Differing hash bits (out of 64) still considered the same image.
+        """
+        self.max_distance = max_distance
+
+    def group(self, urls: Sequence[str], hashes: Sequence[Optional[int]]) -> List[List[int]]:
+        """
+        Args:
+            urls (Sequence[str]): Asset URLs in display order.
+            hashes (Sequence[Optional[int]]): Thumbnail hash of each result, None if unknown.
+
+        Returns:
+            List[List[int]]: Indices of each group, in display order of their first member, which comes first.
+        """
+        count = len(urls)
+        if count == 0:
+            return []
+        parent = list(range(count))
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        def union(i, j):
+            i, j = find(i), find(j)
+            if i != j:
+                # The earlier result stays the representative.
+                parent[max(i, j)] = min(i, j)
+
+        first_by_stem = {}
+        for i, url in enumerate(urls):
+            stem = url_stem(url)
+            if stem in first_by_stem:
+                union(first_by_stem[stem], i)
+            else:
+                first_by_stem[stem] = i
+
+        # Thumbnails are only compared within a directory.
+        by_directory = {}
+        for i, image_hash in enumerate(hashes):
+            if image_hash is not None:
+                by_directory.setdefault(urls[i].rpartition("/")[0], []).append(i)
+        for indices in by_directory.values():
+            if len(indices) < 2:
+                continue
+            directory_hashes = np.array([hashes[i] for i in indices], dtype=np.uint64)
+            for a in range(len(indices) - 1):
+                distances = hamming_distances(directory_hashes[a], directory_hashes[a + 1:])
+                for b in np.flatnonzero(distances <= self.max_distance):
+                    union(indices[a], indices[a + 1 + b])
+
+        groups = {}
+        for i in range(count):
+            groups.setdefault(find(i), []).append(i)
+        return list(groups.values())
@@ -0,0 +1,140 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: LicenseRef-NvidiaProprietary
+#
+# NVIDIA CORPORATION, its affiliates and licensors retain all intellectual
+# property and proprietary rights in and to this material, related
+# documentation and any modifications thereto. Any use, reproduction,
+# disclosure or distribution of this material and related documentation
+# without an express license agreement from NVIDIA CORPORATION or
+# its affiliates is strictly prohibited.
+
+__all__ = ["FrameScheduler"]
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Callable, Hashable, Optional
+
+import omni.kit.app
+
+from .task_group import TaskGroup
+
+logger = logging.getLogger(__name__)
+
+
+class FrameScheduler:
+    """
+    Spreads small pieces of UI work (building tiles, handing textures over) across frames.
+
+    Queued work runs on the main loop in submission order, each frame running items until the per-frame budget is
+    spent, so a large result set never stalls a single frame. At least one item runs per frame, so an item longer
+    than the budget still makes progress.
+    """
+    def __init__(self, budget_ms: float = 4.0, task_group: Optional[TaskGroup] = None):
+        """
+        Args:
+            budget_ms (float): Milliseconds of work allowed per frame.
+            task_group (TaskGroup): Owner of the task running the queue.
+        """
+        self.budget_ms = budget_ms
+        self._task_group = task_group or TaskGroup("frame_scheduler")
+        self._queue = deque()
+        self._task: Optional[asyncio.Future] = None
+        self._reset_stats()
+
+    def destroy(self):
+        self._queue.clear()
+        if self._task and not self._task.done():
+            self._task.cancel()
+        self._task = None
+
+    def _reset_stats(self):
+        self._frames = 0
+        self._items = 0
+        self._used_ms = 0.0
+        self._max_used_ms = 0.0
+        self._overruns = 0
+
+    @property
+    def pending(self) -> int:
+        """
+        Returns:
+            int: Number of queued work items.
+        """
+        return len(self._queue)
+
+    @property
+    def stats(self) -> dict:
+        """
+        Budget usage since the queue last ran dry, to tune `budget_ms`.
+
+        Returns:
+            dict: frames, items, average and max milliseconds used per frame, average budget utilization and
+                frames that went over budget.
+        """
+        frames = max(1, self._frames)
+        return {
+            "frames": self._frames,
+            "items": self._items,
+            "pending": len(self._queue),
+            "avg_used_ms": self._used_ms / frames,
+            "max_used_ms": self._max_used_ms,
+            "utilization": self._used_ms / frames / self.budget_ms if self.budget_ms > 0 else 0.0,
+            "overruns": self._overruns,
+        }
+
+    def schedule(self, fn: Callable, *args, tag: Hashable = None):
+        """
+        Queues `fn(*args)` to run in a later frame.
+
+        Args:
+            fn (Callable): The work item.
+            tag (Hashable): Optional tag to cancel a group of items with.
+        """
+        self._queue.append((tag, fn, args))
+        if self._task is None or self._task.done():
+            self._reset_stats()
+            self._task = self._task_group.create_task(self._run(), "frame_scheduler")
+
+    def cancel(self, tag: Hashable = None):
+        """
+        Drops queued work.
+
+        Args:
+            tag (Hashable): Only drop items with this tag, all items if None.
+        """
+        if tag is None:
+            self._queue.clear()
+        else:
+            self._queue = deque(item for item in self._queue if item[0] != tag)
+
+    async def _run(self):
+        app = omni.kit.app.get_app()
+        while self._queue:
+            await app.next_update_async()
+            start = time.perf_counter()
+            deadline = start + self.budget_ms / 1000.0
+            ran = 0
+            while self._queue and (ran == 0 or time.perf_counter() < deadline):
+                _, fn, args = self._queue.popleft()
+                try:
+                    fn(*args)
+                except Exception as e:
+                    logger.error(f"Scheduled UI work failed: {e}")
+                ran += 1
+
+            used_ms = (time.perf_counter() - start) * 1000.0
+            self._frames += 1
+            self._items += ran
+            self._used_ms += used_ms
+            self._max_used_ms = max(self._max_used_ms, used_ms)
+            if used_ms > self.budget_ms:
+                self._overruns += 1
+
+        stats = self.stats
+        logger.info(
+            f"UI work done: {stats['items']} items over {stats['frames']} frames, "
+            f"avg {stats['avg_used_ms']:.2f} ms / {self.budget_ms:.2f} ms budget "
+            f"(max {stats['max_used_ms']:.2f} ms, {stats['overruns']} over budget)"
+        )
@@ -0,0 +1,338 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: LicenseRef-NvidiaProprietary
+#
+# NVIDIA CORPORATION, its affiliates and licensors retain all intellectual
+# property and proprietary rights in and to this material, related
+# documentation and any modifications thereto. Any use, reproduction,
+# disclosure or distribution of this material and related documentation
+# without an express license agreement from NVIDIA CORPORATION or
+# its affiliates is strictly prohibited.
+
+__all__ = ["CachedResponse", "HttpCache", "canonical_query", "parse_cache_control"]
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Mapping, Optional
+from urllib.parse import quote, urlencode
+
+from .shared_cache import atomic_write
+from .transport import TransportResponse
+
+logger = logging.getLogger(__name__)
+
+# Share of the time since Last-Modified a response without explicit freshness stays fresh (RFC 9111 4.2.2)
+HEURISTIC_FRESHNESS_FRACTION = 0.1
+HEURISTIC_FRESHNESS_MAX = 24 * 3600.0
+
+# Headers of a 304 that describe its own (empty) body and must not replace the stored ones (RFC 9111 3.2)
+_NOT_UPDATED_BY_304 = {"content-length", "content-encoding", "content-range", "transfer-encoding"}
+
+
+def canonical_query(params: Mapping) -> str:
+    """
+    Args:
+        params (Mapping): Query parameters. None and empty values are left out, booleans are sent as true / false
+            and lists as repeated parameters.
+
+    Returns:
+        str: The URL encoded query string with parameters sorted by name, so equal searches always share one URL
+            (and one cache entry, here and in proxies).
+    """
+    items = []
+    for name in sorted(params):
+        value = params[name]
+        for item in value if isinstance(value, (list, tuple)) else [value]:
+            if item is None or item == "":
+                continue
+            if isinstance(item, bool):
+                item = "true" if item else "false"
+            items.append((name, str(item)))
+    return urlencode(items, quote_via=quote, safe="*")
+
+
+def parse_cache_control(value: Optional[str]) -> Dict[str, Optional[str]]:
+    """
+    Returns:
+        Dict[str, Optional[str]]: Cache-Control directives by lower case name, with their argument if any.
+    """
+    directives = {}
+    for part in (value or "").split(","):
+        name, _, argument = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = argument.strip().strip('"') if argument else None
+    return directives
+
+
+def _parse_seconds(value: Optional[str]) -> Optional[float]:
+    try:
+        return max(0.0, float(int(value)))
+    except (TypeError, ValueError):
+        return None
+
+
+def _parse_date(value: Optional[str]) -> Optional[float]:
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return None
+
+
+def _header(headers: Mapping[str, str], name: str) -> Optional[str]:
+    for key, value in headers.items():
+        if key.lower() == name:
+            return value
+    return None
+
+
+class CachedResponse:
+    """
+    A stored response with what is needed to compute its age and revalidate it, following RFC 9111.
+    """
+    def __init__(
+        self, url: str, status: int, headers: Dict[str, str], body: bytes, request_time: float, response_time: float,
+        vary: Dict[str, Optional[str]],
+    ):
+        """
+        Args:
+            url (str): Requested URL.
+            status (int): HTTP status code.
+            headers (Dict[str, str]): Response headers, names lower case.
+            body (bytes): Response body.
+            request_time (float): Wall clock time the request was sent.
+            response_time (float): Wall clock time the response was received.
+            vary (Dict[str, Optional[str]]): Values of the request headers named by Vary, names lower case.
+        """
+        self.url = url
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.request_time = request_time
+        self.response_time = response_time
+        self.vary = vary
+
+    @property
+    def cache_control(self) -> Dict[str, Optional[str]]:
+        return parse_cache_control(self.headers.get("cache-control"))
+
+    def freshness_lifetime(self) -> float:
+        """
+        Returns:
+            float: Seconds the response is fresh for: max-age, else Expires, else a share of the time since
+                Last-Modified.
+        """
+        max_age = _parse_seconds(self.cache_control.get("max-age"))
+        if max_age is not None:
+            return max_age
+        date = _parse_date(self.headers.get("date")) or self.response_time
+        if "expires" in self.headers:
+            # An invalid Expires, ie: "0", means already expired.
+            expires = _parse_date(self.headers["expires"])
+            return max(0.0, expires - date) if expires is not None else 0.0
+        last_modified = _parse_date(self.headers.get("last-modified"))
+        if last_modified is not None and last_modified < date:
+            return min(HEURISTIC_FRESHNESS_MAX, (date - last_modified) * HEURISTIC_FRESHNESS_FRACTION)
+        return 0.0
+
+    def current_age(self, now: Optional[float] = None) -> float:
+        """
+        Returns:
+            float: Seconds since the origin server generated the response, including time spent in proxies.
+        """
+        now = time.time() if now is None else now
+        date = _parse_date(self.headers.get("date"))
+        apparent_age = max(0.0, self.response_time - date) if date is not None else 0.0
+        response_delay = self.response_time - self.request_time
+        corrected_age = (_parse_seconds(self.headers.get("age")) or 0.0) + response_delay
+        return max(apparent_age, corrected_age) + max(0.0, now - self.response_time)
+
+    def is_fresh(self, now: Optional[float] = None) -> bool:
+        """
+        Returns:
+            bool: Whether the response can be used without asking the server.
+        """
+        if "no-cache" in self.cache_control:
+            return False
+        return self.freshness_lifetime() > self.current_age(now)
+
+    def conditional_headers(self) -> Dict[str, str]:
+        """
+        Returns:
+            Dict[str, str]: If-None-Match / If-Modified-Since headers asking the server to answer 304 Not Modified
+                if the stored response is still current.
+        """
+        headers = {}
+        if "etag" in self.headers:
+            headers["If-None-Match"] = self.headers["etag"]
+        if "last-modified" in self.headers:
+            headers["If-Modified-Since"] = self.headers["last-modified"]
+        return headers
+
+
+class HttpCache:
+    """
+    Private HTTP cache of GET responses on disk, one file per URL.
+
+    Responses are stored when Cache-Control allows it and they have either an explicit lifetime or a validator
+    (ETag / Last-Modified). Fresh responses are served without a request, stale ones are revalidated with a
+    conditional request and reused on 304 Not Modified. The least recently used entries are evicted beyond
+    `max_bytes`.
+    """
+    def __init__(self, directory: str, max_bytes: int = 64 * 1024 * 1024):
+        """
+        Args:
+            directory (str): Where entries are stored, created if missing.
+            max_bytes (int): Disk budget of all entries.
+        """
+        self._directory = directory
+        self._max_bytes = max_bytes
+        self._size = None
+        # Lookups and stores run in executor threads.
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, url: str) -> str:
+        return os.path.join(self._directory, hashlib.sha256(url.encode("utf-8")).hexdigest())
+
+    def lookup(self, url: str, request_headers: Mapping[str, str]) -> Optional[CachedResponse]:
+        """
+        Args:
+            url (str): Request URL.
+            request_headers (Mapping[str, str]): Headers the request will be sent with, to match Vary.
+
+        Returns:
+            CachedResponse: The stored response, fresh or not, None if nothing matching is stored.
+        """
+        path = self._path(url)
+        try:
+            with open(path, "rb") as f:
+                meta = json.loads(f.readline())
+                body = f.read()
+            os.utime(path)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        cached = CachedResponse(
+            meta["url"], meta["status"], meta["headers"], body, meta["request_time"], meta["response_time"],
+            meta["vary"],
+        )
+        if cached.url != url or any(_header(request_headers, name) != value for name, value in cached.vary.items()):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return cached
+
+    def store(
+        self, url: str, request_headers: Mapping[str, str], response: TransportResponse, request_time: float
+    ) -> Optional[CachedResponse]:
+        """
+        Args:
+            url (str): Request URL.
+            request_headers (Mapping[str, str]): Headers the request was sent with.
+            response (TransportResponse): The response.
+            request_time (float): Wall clock time the request was sent.
+
+        Returns:
+            CachedResponse: The stored response, None if it may not be stored.
+        """
+        cache_control = parse_cache_control(response.headers.get("cache-control"))
+        vary = [name.strip().lower() for name in response.headers.get("vary", "").split(",") if name.strip()]
+        if response.status not in (200, 203) or "no-store" in cache_control or "*" in vary:
+            return None
+        has_validator = "etag" in response.headers or "last-modified" in response.headers
+        has_lifetime = "max-age" in cache_control or "expires" in response.headers
+        if not has_validator and not has_lifetime:
+            return None
+        cached = CachedResponse(
+            url, response.status, dict(response.headers), response.body, request_time, time.time(),
+            {name: _header(request_headers, name) for name in vary},
+        )
+        self._write(cached)
+        return cached
+
+    def revalidate(self, cached: CachedResponse, response: TransportResponse, request_time: float) -> CachedResponse:
+        """
+        Updates a stored response from the 304 Not Modified answer to its conditional request.
+
+        Returns:
+            CachedResponse: The stored response with fresh headers and age.
+        """
+        self.revalidated += 1
+        headers = dict(cached.headers)
+        headers.update({k: v for k, v in response.headers.items() if k not in _NOT_UPDATED_BY_304})
+        cached = CachedResponse(
+            cached.url, cached.status, headers, cached.body, request_time, time.time(), cached.vary
+        )
+        self._write(cached)
+        return cached
+
+    def _write(self, cached: CachedResponse):
+        meta = {
+            "url": cached.url,
+            "status": cached.status,
+            "headers": cached.headers,
+            "request_time": cached.request_time,
+            "response_time": cached.response_time,
+            "vary": cached.vary,
+        }
+        path = self._path(cached.url)
+        try:
+            old_size = os.path.getsize(path) if os.path.exists(path) else 0
+            # Other Kit instances sharing the directory read either the old entry or the new one.
+            atomic_write(path, json.dumps(meta).encode("utf-8") + b"\n" + cached.body)
+        except OSError as e:
+            logger.warning(f"Failed to cache {cached.url}: {e}")
+            return
+        with self._lock:
+            if self._size is None:
+                self._size = self._disk_size()
+            else:
+                self._size += os.path.getsize(path) - old_size
+            if self._size > self._max_bytes:
+                self._evict()
+
+    def _entries(self):
+        entries = []
+        for entry in os.scandir(self._directory):
+            if entry.is_file() and not entry.name.endswith(".tmp"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def _disk_size(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def _evict(self):
+        """Removes least recently used entries until a quarter of the budget is free again."""
+        for _, size, path in sorted(self._entries()):
+            if self._size <= self._max_bytes * 0.75:
+                break
+            try:
+                os.remove(path)
+                self._size -= size
+            except OSError:
+                pass
+
+    def clear(self):
+        with self._lock:
+            for _, _, path in self._entries():
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self._size = 0
+
+    @property
+    def stats(self) -> dict:
+        """
+        Returns:
+            dict: hits (stored response found, fresh or not), misses and revalidated (304) counts.
+        """
+        return {"hits": self.hits, "misses": self.misses, "revalidated": self.revalidated}
@@ -12,29 +12,76 @@
 import base64
 from PIL import Image
 from io import BytesIO
-import omni.kit
 import os
 from datetime import datetime
-from .io import IoHelper
+from .shared_cache import get_shared_cache_directory
+from .single_flight import SingleFlight
+from .thumbnail_pack import ThumbnailPack
 import asyncio
+import ctypes
+import hashlib
 import uuid
 import logging
 
+import numpy as np
+
 logger = logging.getLogger(__name__)
 
+# Image.ANTIALIAS and friends were removed in Pillow 10, Image.Resampling was added in 9.1
+Resampling = getattr(Image, "Resampling", Image)
+
+# Concurrent decodes of the same thumbnail, ie: from coalesced searches, share one decode.
+_decode_flights = SingleFlight(grace_period=0)
+
 
 class ImageHandler:
     # max size of image dimensions in pixels
     # current AI Playground limit is 1000
     MAX_SIZE = 1000
-
-    def __init__(self) -> None:
+    # current AI Playground limit on the base64 encoded image
+    MAX_PAYLOAD_BYTES = 200 * 1024
+    # JPEG quality range searched when encoding a query image
+    MIN_QUALITY = 20
+    MAX_QUALITY = 90
+    # size of the low-res placeholder shown until the full thumbnail is decoded
+    PLACEHOLDER_SIZE = 24
+    # bytes of encoded thumbnails kept in the pack, least recently used ones are evicted
+    THUMBNAIL_PACK_MAX_BYTES = 128 * 1024 * 1024
+    # prefix of thumbnail references stored in the pack rather than as files
+    THUMBNAIL_SCHEME = "thumbnail-pack:"
+    # formats stored in the pack as the server sent them when no downscale is needed
+    THUMBNAIL_FORMATS = ("JPEG", "PNG", "WEBP")
+    # seconds a viewport capture is kept, other instances sharing the cache may still be using newer ones
+    CAPTURE_MAX_AGE = 24 * 3600
+    # seconds to wait for the viewport capture, it never completes when the renderer is not ready
+    CAPTURE_TIMEOUT = 10.0
+
+    def __init__(self, thumbnail_pack_max_bytes=THUMBNAIL_PACK_MAX_BYTES) -> None:
         self.clear_resized_image_directory()
+        # decoded thumbnails, keyed by image hash and size
+        self._thumbnail_pack = ThumbnailPack(self.get_thumbnail_directory(), max_bytes=thumbnail_pack_max_bytes)
+
+    def destroy(self):
+        self._thumbnail_pack.close()
 
     # image needs to be resized to meet AI Playground size limit (currently 200 kb, 1000x1000 pixels)
     def resize_image(self, input_image_path, resized_url, size=MAX_SIZE):
         image = Image.open(input_image_path)
+        with open(resized_url, "wb") as fh:
+            fh.write(self.encode_query_image(image, size=size))
 
+    def encode_query_image(self, image, max_bytes=MAX_PAYLOAD_BYTES, size=MAX_SIZE):
+        """
+        Fit an image within the API size limits as a JPEG.
+
+        Args:
+            image (PIL.Image.Image): The image to encode.
+            max_bytes (int): Limit on the base64 encoded image.
+            size (int): Limit on the image dimensions in pixels.
+
+        Returns:
+            bytes: The JPEG data.
+        """
         # If the image has an alpha channel, convert it to RGB and replace the alpha channel with a white background
         if image.mode == 'RGBA':
             # Create a blank background image with a white background
@@ -43,19 +90,67 @@ class ImageHandler:
             # 3 is the index of the alpha channel
             background.paste(image, mask=image.split()[3])
             image = background
-
-        width, height = image.size
-
-        if width > height:
-            max_size = (size, int((height / width) * size))
         else:
-            max_size = (int((width / height) * size), size)
-
-        # resize image based on max_size
-        resized_image = image.resize(max_size, Image.ANTIALIAS)
-        # quality value of 85 should get image under 200kb limit
-        # TODO: Loop optmizations until it's below limit
-        resized_image.save(resized_url, "JPEG", quality=85, optimize=True)
+            image = image.convert("RGB")
+
+        image.thumbnail((size, size), Resampling.LANCZOS)
+        # base64 grows the payload by a third
+        limit = max_bytes * 3 // 4
+
+        while True:
+            data, smallest = self._encode_jpeg_under(image, limit)
+            if data is not None:
+                return data
+            # Even the lowest quality is too big, shrink the image by the missing ratio and try again.
+            scale = (limit / smallest) ** 0.5 * 0.95
+            width, height = image.size
+            image = image.resize((max(1, int(width * scale)), max(1, int(height * scale))), Resampling.LANCZOS)
+
+    def _encode_jpeg_under(self, image, limit):
+        """
+        Find the best JPEG quality that fits `limit` bytes in as few encodes as possible.
+
+        JPEG size falls roughly linearly with quality, so each step predicts the quality hitting the limit by
+        interpolating the encodes done so far, which usually lands within one or two passes.
+
+        Returns:
+            tuple: The best JPEG data under the limit (None if there is none) and the smallest size encoded.
+        """
+        def encode(quality):
+            buffer = BytesIO()
+            image.save(buffer, "JPEG", quality=quality, optimize=True)
+            return buffer.getvalue()
+
+        data = encode(self.MAX_QUALITY)
+        if len(data) <= limit:
+            return data, len(data)
+
+        best = None
+        ok_quality, ok_size = None, None
+        big_quality, big_size = self.MAX_QUALITY, len(data)
+        for _ in range(6):
+            if ok_quality is None:
+                quality = int(big_quality * limit / big_size)
+            else:
+                quality = ok_quality + int((big_quality - ok_quality) * (limit - ok_size) / (big_size - ok_size))
+            quality = max(self.MIN_QUALITY, min(big_quality - 1, quality))
+            if ok_quality is not None:
+                quality = max(ok_quality + 1, quality)
+                if quality >= big_quality:
+                    break
+
+            data = encode(quality)
+            if len(data) <= limit:
+                best, ok_quality, ok_size = data, quality, len(data)
+                # close enough to the limit, more passes would gain little
+                if ok_size >= limit * 0.9:
+                    break
+            else:
+                big_quality, big_size = quality, len(data)
+                if quality == self.MIN_QUALITY:
+                    break
+
+        return best, big_size if best is None else len(best)
 
     def save_image(self):
         image_path = self.get_image_directory()
@@ -68,20 +163,113 @@ class ImageHandler:
         with open(url, "rb") as image:
             return base64.b64encode(image.read()).decode()
 
-    def generate_image_from_string(self, image_string):
-        image_data = base64.b64decode(image_string.encode('utf-8'))
-        image_bytes = BytesIO(image_data)
-        image = Image.open(image_bytes)
+    def generate_image_from_string(self, image_string, size=None):
+        """
+        Decode a base64 thumbnail into the thumbnail pack.
+        Decoded thumbnails are cached, so the same image at the same size is only decoded once.
 
-        # saving out image as workaround for now
-        random_str = str(uuid.uuid4())[:8]
-        captured_stage_images_directory = os.path.join(self.get_image_directory(), random_str + ".jpg")
-        image.save(captured_stage_images_directory)
+        Args:
+            image_string (str): base64 encoded image returned by the server.
+            size (int): Optional bounding size in pixels, larger images are downscaled to fit it.
 
-        # use this to pass along raw bytes in the future
-        # pixels = [int(c) for p in image.getdata() for c in p]
+        Returns:
+            str: Thumbnail reference, see load_thumbnail.
+        """
+        key = f"{hashlib.sha1(image_string.encode('utf-8')).hexdigest()}-{size or 0}"
+        if key in self._thumbnail_pack:
+            return self.THUMBNAIL_SCHEME + key
 
-        return captured_stage_images_directory
+        image_data = base64.b64decode(image_string.encode('utf-8'))
+        image_bytes = BytesIO(image_data)
+        image = Image.open(image_bytes)
+        original_size = image.size
+        if size:
+            # let the JPEG decoder skip pixels we would throw away anyway
+            image.draft("RGB", (size, size))
+            # reducing_gap does most of the downscale with a cheap box reduce before filtering
+            image.thumbnail((size, size), Resampling.BILINEAR, reducing_gap=2.0)
+
+        if image.size == original_size and image.format in self.THUMBNAIL_FORMATS:
+            # already small enough, keep the server's bytes as they are
+            self._thumbnail_pack.put(key, image_data)
+            return self.THUMBNAIL_SCHEME + key
+
+        encoded = BytesIO()
+        if self._has_alpha(image):
+            # JPEG has no alpha channel, transparent backgrounds would turn black
+            image.convert("RGBA").save(encoded, "PNG", compress_level=1)
+        else:
+            image.convert("RGB").save(encoded, "JPEG", quality=90)
+        self._thumbnail_pack.put(key, encoded.getvalue())
+        return self.THUMBNAIL_SCHEME + key
+
+    @staticmethod
+    def _has_alpha(image):
+        return image.mode in ("RGBA", "LA", "PA", "RGBa", "La") or "transparency" in image.info
+
+    def is_thumbnail(self, image):
+        """
+        Returns:
+            bool: True if `image` is a thumbnail reference rather than a file path.
+        """
+        return isinstance(image, str) and image.startswith(self.THUMBNAIL_SCHEME)
+
+    def load_thumbnail(self, image):
+        """
+        Decode a thumbnail from the pack.
+
+        Args:
+            image (str): Thumbnail reference returned by generate_image_from_string.
+
+        Returns:
+            PIL.Image.Image: The RGBA thumbnail, None if it was evicted.
+        """
+        data = self._thumbnail_pack.get(image[len(self.THUMBNAIL_SCHEME):])
+        if data is None:
+            return None
+        return Image.open(BytesIO(data)).convert("RGBA")
+
+    def set_provider_image(self, provider, image):
+        """
+        Upload a thumbnail to a ui.ByteImageProvider.
+
+        Returns:
+            bool: False if the thumbnail is no longer in the pack.
+        """
+        thumbnail = self.load_thumbnail(image)
+        if thumbnail is None:
+            return False
+        if hasattr(provider, "set_data_array"):
+            provider.set_data_array(np.asarray(thumbnail), list(thumbnail.size))
+        else:
+            provider.set_bytes_data(list(thumbnail.tobytes()), list(thumbnail.size))
+        return True
+
+    async def generate_image_from_string_async(self, image_string, size=None):
+        """Same as generate_image_from_string, decoding on a worker thread."""
+        loop = asyncio.get_event_loop()
+        key = (hashlib.sha1(image_string.encode('utf-8')).hexdigest(), size)
+        return await _decode_flights.do(
+            key, lambda: loop.run_in_executor(None, self.generate_image_from_string, image_string, size)
+        )
+
+    def generate_placeholder_from_string(self, image_string):
+        """
+        Decode a tiny version of a base64 thumbnail to show until the full one is ready.
+        For JPEG this only decodes a fraction of the pixels (see PIL draft mode).
+        """
+        return self.generate_image_from_string(image_string, size=self.PLACEHOLDER_SIZE)
+
+    async def generate_placeholder_from_string_async(self, image_string):
+        """Same as generate_placeholder_from_string, decoding on a worker thread."""
+        return await self.generate_image_from_string_async(image_string, size=self.PLACEHOLDER_SIZE)
+
+    def get_asset_thumbnail_url(self, asset_url):
+        """
+        URL of the thumbnail Nucleus generates next to an asset, used when results come without inline images.
+        """
+        directory, _, name = asset_url.rpartition("/")
+        return f"{directory}/.thumbs/256x256/{name}.png"
 
     def prep_image_string(self, input_image_path):
         resized_url = self.get_resized_image_url()
@@ -94,57 +282,123 @@ class ImageHandler:
         return (self.generate_image_string(resized_url), resized_url)
 
     def get_image_directory(self):
-        extension_path = IoHelper.get_extension_path()
-        return os.path.join(extension_path, "captures/")
+        return get_shared_cache_directory("captures") + "/"
 
     def get_asset_directory(self):
-        extension_path = IoHelper.get_extension_path()
-        return os.path.join(extension_path, "assets/")
+        return get_shared_cache_directory("assets") + "/"
+
+    def get_cache_directory(self):
+        """
+        User-level cache shared by every Kit app running the extension, see get_shared_cache_directory.
+        """
+        return get_shared_cache_directory()
+
+    def get_thumbnail_directory(self):
+        return os.path.join(self.get_cache_directory(), "thumbnails")
 
     def get_resized_image_url(self):
-        # randomize image name
+        # randomize image name, unique across the instances sharing the directory
         current_datetime = datetime.now().strftime("%Y-%m-%d %H-%M-%S")
-        captured_stage_images_directory = os.path.join(self.get_image_directory(), current_datetime + ".jpg")
+        file_name = f"{current_datetime} {uuid.uuid4().hex[:8]}.jpg"
+        captured_stage_images_directory = os.path.join(self.get_image_directory(), file_name)
 
         return captured_stage_images_directory
 
-    # clear image directory on extension launch to prevent images from accumulating
-    def clear_resized_image_directory(self):
+    # clear old images on extension launch to prevent images from accumulating
+    def clear_resized_image_directory(self, max_age=CAPTURE_MAX_AGE):
+        """
+        Delete captures older than `max_age` seconds. Newer ones are left alone, another Kit instance sharing the
+        cache directory may be using them.
+        """
         directory_path = self.get_image_directory()
+        now = datetime.now().timestamp()
         try:
             files = os.listdir(directory_path)
             for file in files:
                 file_path = os.path.join(directory_path, file)
-                if os.path.isfile(file_path):
+                if os.path.isfile(file_path) and now - os.path.getmtime(file_path) > max_age:
                     os.remove(file_path)
         except OSError:
             logger.error("Error occurred while deleting files.")
 
-    # capture screenshot and return base64 encoded string
-    async def on_capture_screenshot(self):
-        event = asyncio.Event()
+    async def capture_viewport_async(self, timeout=CAPTURE_TIMEOUT):
+        """
+        Capture the active viewport into memory.
 
-        menu_action_success = False
-        capture_screenshot_filepath = None
+        Args:
+            timeout (float): Seconds to wait for the capture.
 
-        def on_capture_callback(success: bool, captured_image_path: str) -> None:
-            nonlocal menu_action_success, capture_screenshot_filepath
-            menu_action_success = success
-            capture_screenshot_filepath = captured_image_path
-            event.set()
+        Returns:
+            PIL.Image.Image: The captured image, None on failure or timeout.
+        """
+        from omni.kit.viewport.utility import capture_viewport_to_buffer, get_active_viewport
 
-        # capture the screenshot
-        omni.kit.actions.core.execute_action("omni.kit.menu.edit", "capture_screenshot", on_capture_callback)
+        viewport_api = get_active_viewport()
+        if viewport_api is None:
+            logger.error("No active viewport to capture")
+            return None
 
-        # wait for event to complete
-        await event.wait()
-        # give it an extra buffer to finish up
-        await asyncio.sleep(delay=1.0)
+        loop = asyncio.get_event_loop()
+        future = loop.create_future()
+
+        def set_result(image):
+            if not future.done():
+                future.set_result(image)
+
+        def on_capture_completed(buffer, buffer_size, width, height, format):
+            image = None
+            try:
+                # buffer is a PyCapsule wrapping the raw RGBA pixels
+                ctypes.pythonapi.PyCapsule_GetPointer.restype = ctypes.POINTER(ctypes.c_byte * buffer_size)
+                ctypes.pythonapi.PyCapsule_GetPointer.argtypes = [ctypes.py_object, ctypes.c_char_p]
+                content = ctypes.pythonapi.PyCapsule_GetPointer(buffer, None)
+                image = Image.frombytes("RGBA", (width, height), bytes(content.contents))
+            except Exception as e:
+                logger.error(f"error while reading viewport capture: {e}")
+            loop.call_soon_threadsafe(set_result, image)
+
+        capture_viewport_to_buffer(viewport_api, on_capture_completed)
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            logger.error(f"Viewport capture did not complete within {timeout} s")
+            return None
 
-        if menu_action_success:
-            logger.info(f"screenshot successful {capture_screenshot_filepath}")
-            return self.prep_image_string(capture_screenshot_filepath)
+    async def capture_query_image_async(self, max_bytes=MAX_PAYLOAD_BYTES, timeout=CAPTURE_TIMEOUT):
+        """
+        Capture the active viewport in memory and encode it for an image query.
 
-        else:
+        Args:
+            max_bytes (int): Limit on the base64 encoded image.
+            timeout (float): Seconds to wait for the capture.
+
+        Returns:
+            str: The base64 encoded JPEG, None on failure.
+        """
+        image = await self.capture_viewport_async(timeout)
+        if image is None:
             logger.error("error while completing screenshot")
             return None
+
+        # encoding can take a few passes over a large image, keep it off the main loop
+        loop = asyncio.get_event_loop()
+        data = await loop.run_in_executor(None, self.encode_query_image, image, max_bytes)
+        logger.info(f"screenshot encoded for query ({len(data)} bytes)")
+        return base64.b64encode(data).decode()
+
+    # capture screenshot and return base64 encoded string and the path of the resized image
+    async def on_capture_screenshot(self):
+        image_string = await self.capture_query_image_async()
+        if image_string is None:
+            return None
+
+        resized_url = self.get_resized_image_url()
+
+        def write():
+            os.makedirs(os.path.dirname(resized_url), exist_ok=True)
+            with open(resized_url, "wb") as f:
+                f.write(base64.b64decode(image_string))
+
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(None, write)
+        return (image_string, resized_url)
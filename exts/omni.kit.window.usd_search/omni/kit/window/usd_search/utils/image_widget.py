@@ -10,13 +10,20 @@
 
 __all__ = ["USDSearchImageWidget"]
 
-import asyncio
 import logging
-from typing import List
+from typing import Callable, Optional
 
+import numpy as np
 import omni.ui as ui
 from omni.ui import color as cl
 
+from .frame_scheduler import FrameScheduler
+from .image_handler import ImageHandler
+from .result_set import ResultSet, ResultView
+from .search_models import USDSearchModel
+from .task_group import TaskGroup
+from .thumbnail_atlas import ThumbnailAtlas
+
 logger = logging.getLogger(__name__)
 
 # Define colors
@@ -34,23 +41,67 @@ class USDSearchImageWidget:
     """
     Creates an image widget grid array for USD Search Results.
     """
+    # Width and height of a result tile in pixels
+    TILE_SIZE = 162
+    PADDING = 4
+
+    @classmethod
+    def get_image_pixel_size(cls) -> int:
+        """
+        Returns:
+            int: Size in physical pixels of a thumbnail inside a tile, taking DPI scaling into account.
+        """
+        return int(round((cls.TILE_SIZE - cls.PADDING * 2) * ui.Workspace.get_dpi_scale()))
+
     def __init__(
-        self, query: str, service_url, images: List[str], usd_paths: List[str], bounding_boxs: List[list] = [], status=None, *args, **kwargs
+        self, query: str, service_url, results: Optional[ResultView] = None, status=None,
+        scheduler: Optional[FrameScheduler] = None, image_handler: Optional[ImageHandler] = None,
+        info_fn: Optional[Callable[[USDSearchModel], str]] = None, task_group: Optional[TaskGroup] = None,
+        on_toggle_variants: Optional[Callable[[str], None]] = None, atlas: Optional[ThumbnailAtlas] = None,
+        *args, **kwargs
     ):
+        """
+        Args:
+            results (ResultView): Results to show, one tile per row in view order. The widget reads the shared result
+                set directly and keeps the selection in its SELECTED flags, nothing is copied.
+            info_fn (Callable): Optional short text shown at the top of a tile, ie: download size.
+            task_group (TaskGroup): Owner of the widget's background tasks.
+            on_toggle_variants (Callable): Called with the asset URL of a tile when its variant badge is clicked.
+            scheduler (FrameScheduler): Optional scheduler to spread tile construction and thumbnail swaps across
+                frames, tiles are built immediately without one.
+            image_handler (ImageHandler): Required to show thumbnails stored in the thumbnail pack.
+            atlas (ThumbnailAtlas): Optional atlas shared by the tiles showing pack thumbnails, each tile gets its
+                own texture without one.
+        """
         self._frame = ui.Frame(*args, **kwargs)
+        self._scheduler = scheduler
+        self._task_group = task_group or TaskGroup("image_widget")
+        self._image_handler = image_handler
+        # Tiles showing pack thumbnails draw from a byte provider that is updated in place.
+        self._image_providers = {}
+        # Or from a cell of the atlas, for the indices in _atlas_tiles.
+        self._atlas = atlas
+        self._atlas_tiles = set()
+        self._view = results if results is not None else ResultSet().view()
+        self._results = self._view.results
+        self._rows = self._view.rows
+        # Row -> tile index
+        self._tiles = {int(row): index for index, row in enumerate(self._rows)}
+        if atlas is not None:
+            atlas.retain(self._view.asset_urls())
         self._query = query
         self._service_url = service_url
         self._image_preview = None
-        self._images = images
-        self._usd_paths = usd_paths
-        self._bounding_boxs = bounding_boxs
-        self._selected_items = set()
         self._image_frames = {}
+        self._image_widgets = {}
+        self._info_fn = info_fn
+        self._info_labels = {}
+        self._on_toggle_variants = on_toggle_variants
         self._status = status
 
-        self._w = 162
-        self._h = 162
-        self._pad = 4
+        self._w = self.TILE_SIZE
+        self._h = self.TILE_SIZE
+        self._pad = self.PADDING
         self._results_label = None
 
         self._build_ui()
@@ -60,8 +111,8 @@ class USDSearchImageWidget:
             with ui.VStack(height=16):
                 ui.Spacer(height=self._pad)
                 # Make results / status label.
-                if len(self._images) > 0:
-                    results_text = f'Found {len(self._images)} Assets for "{self._query}"\nfrom {self._service_url}'
+                if len(self._rows) > 0:
+                    results_text = f'Found {len(self._rows)} Assets for "{self._query}"\nfrom {self._service_url}'
                 else:
                     results_text = f'No matches for "{self._query}" - try warehouse terms.'
 
@@ -73,13 +124,25 @@ class USDSearchImageWidget:
                 # Make image item grid.
                 ui.Spacer(height=self._pad)
                 with ui.VGrid(height=0, column_width=self._w, row_height=self._h, spacing=self._pad * 4, padding=0) as self._grid:
-                    for i, image in enumerate(self._images):
-                        self._build_image_item(i, image)
+                    if self._scheduler is None:
+                        for i in range(len(self._rows)):
+                            self._build_image_item(i)
                 # Deselect all trigger.
                 self._grid.set_mouse_released_fn(self._on_background_click)
 
-    def _build_image_item(self, index: int, image: str):
+        if self._scheduler is not None:
+            for i in range(len(self._rows)):
+                self._scheduler.schedule(self._build_scheduled_item, i, tag=self)
+
+    def _build_scheduled_item(self, index: int):
+        with self._grid:
+            self._build_image_item(index)
+
+    def _build_image_item(self, index: int):
+        model = self._view[index]
         with ui.ZStack(content_clipping=True, selected=False) as frame:
+            # Selection is kept in the result set, so it survives re-filtering.
+            frame.checked = model.results.has_flag(model.row, ResultSet.SELECTED)
             self._image_frames[index] = frame
             ui.Rectangle(
                 style={
@@ -97,10 +160,13 @@ class USDSearchImageWidget:
                     ui.Spacer(width=self._pad)
                     # ZStack with label above image
                     with ui.ZStack(style={"Tooltip": {"background_color": cl.tool_bg}}):
-                        file_url = self._usd_paths[index]
-                        short_url = file_url.split("/")[-1].rsplit(".", 1)[0]
+                        file_url = model.asset_url
+                        short_url = model.asset_name.rsplit(".", 1)[0]
                         # Create thumbnail
-                        img = ui.Image(image, width=self._w - self._pad * 2, height=self._h - self._pad * 2)
+                        img = self._create_image(
+                            index, model.image_url or "", width=self._w - self._pad * 2, height=self._h - self._pad * 2
+                        )
+                        self._image_widgets[index] = img
                         img.set_mouse_released_fn(lambda x, y, b, m, idx=index: self._on_image_click(x, y, idx, b, m))
                         self._set_drag_fn(img, index)
                         # Shorten url  to keep label from overflowing
@@ -111,11 +177,102 @@ class USDSearchImageWidget:
                             f"{short_url}", style={"font_size": 14, "color": cl.label},
                             tooltip=file_url, alignment=ui.Alignment.CENTER_BOTTOM
                         )
+                        # Info at the top of item
+                        self._info_labels[index] = ui.Label(
+                            self._info_fn(model) if self._info_fn else "", style={"font_size": 12, "color": cl.item_dim},
+                            alignment=ui.Alignment.RIGHT_TOP
+                        )
+                        with ui.VStack(height=0):
+                            variant_count = model.variant_count
+                            if variant_count:
+                                with ui.HStack(height=0):
+                                    ui.Label(
+                                        f"+{variant_count}", width=0, style={"font_size": 14, "color": cl.label},
+                                        tooltip=f"{variant_count} near-identical variants, click to show or hide them",
+                                        mouse_pressed_fn=lambda x, y, b, m, path=file_url: self._toggle_variants(path, b)
+                                    )
+                                    ui.Spacer()
+                            if model.stale:
+                                ui.Label(
+                                    "cached", style={"font_size": 12, "color": cl.item_dim},
+                                    tooltip="From a previous search, the server has not confirmed it yet",
+                                    alignment=ui.Alignment.LEFT_TOP
+                                )
+                            elif model.local:
+                                ui.Label(
+                                    "local", style={"font_size": 12, "color": cl.item_dim},
+                                    tooltip="Found by name in the local index, not by the search service",
+                                    alignment=ui.Alignment.LEFT_TOP
+                                )
                     # Right Padding
                     ui.Spacer(width=self._pad)
                 # Bottom Padding
                 ui.Spacer(height=self._pad)
 
+    def _create_image(self, index: int, image: str, **kwargs):
+        if self._image_handler is None:
+            return ui.Image(image, **kwargs)
+        is_thumbnail = self._image_handler.is_thumbnail(image)
+        # Tiles without image yet are waiting for a fetched thumbnail, which lands in the pack too.
+        if self._atlas is not None and (is_thumbnail or not image):
+            asset_url = self._results.asset_url(self._rows[index])
+            img = self._atlas.build_image(asset_url, kwargs["width"], kwargs["height"])
+            if img is not None:
+                self._atlas_tiles.add(index)
+                if is_thumbnail:
+                    self._atlas.set_image(asset_url, image)
+                return img
+        if not is_thumbnail:
+            return ui.Image(image, **kwargs)
+        provider = ui.ByteImageProvider()
+        self._image_handler.set_provider_image(provider, image)
+        self._image_providers[index] = provider
+        return ui.ImageWithProvider(provider, fill_policy=ui.IwpFillPolicy.IWP_PRESERVE_ASPECT_FIT, **kwargs)
+
+    def _get_tile(self, model: USDSearchModel) -> Optional[int]:
+        """Index of the tile showing `model`, None if it is not shown, ie: results of an older search."""
+        return self._tiles.get(model.row) if model.results is self._results else None
+
+    def refresh_image(self, model: USDSearchModel):
+        """
+        Show the current thumbnail of a result, ie: the full image that replaced its placeholder.
+
+        Args:
+            model (USDSearchModel): The result.
+        """
+        index = self._get_tile(model)
+        if index is not None and index in self._image_widgets:
+            if self._scheduler is None:
+                self._set_image_source(index)
+            else:
+                # Texture loads are spread across frames too.
+                self._scheduler.schedule(self._set_image_source, index, tag=self)
+
+    def refresh_info(self, model: USDSearchModel):
+        """
+        Update the text shown at the top of the tile of a result, ie: once its download size is known.
+
+        Args:
+            model (USDSearchModel): The result.
+        """
+        index = self._get_tile(model)
+        if index is not None and index in self._info_labels and self._info_fn:
+            self._info_labels[index].text = self._info_fn(self._view[index])
+
+    def _toggle_variants(self, usd_path: str, button: int):
+        if button == 0 and self._on_toggle_variants:
+            self._on_toggle_variants(usd_path)
+
+    def _set_image_source(self, index: int):
+        image = self._results.images[self._rows[index]] or ""
+        if index in self._atlas_tiles:
+            if self._image_handler.is_thumbnail(image):
+                self._atlas.set_image(self._results.asset_url(self._rows[index]), image)
+        elif index in self._image_providers and self._image_handler.is_thumbnail(image):
+            self._image_handler.set_provider_image(self._image_providers[index], image)
+        else:
+            self._image_widgets[index].source_url = image
+
     def _on_image_click(self, x, y, index: int, button: int, modifier):
         # Handle item selection and context menu
         if button == 0:  # Left click
@@ -125,11 +282,7 @@ class USDSearchImageWidget:
                 and frame.screen_position_y < y < frame.screen_position_y + frame.computed_content_height
             ):
                 self._image_frames[index].checked = not self._image_frames[index].checked
-                if self._image_frames[index].checked:
-                    self._selected_items.add(index)
-                else:
-                    if index in self._selected_items:
-                        self._selected_items.remove(index)
+                self._results.set_flag(self._rows[index], ResultSet.SELECTED, self._image_frames[index].checked)
 
         elif button == 1:  # Right click
             self._show_context_menu(index)
@@ -142,30 +295,41 @@ class USDSearchImageWidget:
         ):
 
             if button == 0:  # Left click
-                import copy
-                _selections = copy.copy(self._selected_items)
+                _selections = self._get_selected_rows()
 
                 async def __delay_unselect():
                     import omni.kit.app
                     await omni.kit.app.get_app().next_update_async()
                     # Only deselect all if no selection changed
-                    if self._selected_items == _selections:
-                        for index in range(len(self._image_frames)):
-                            self._image_frames[index].checked = False
+                    if np.array_equal(self._get_selected_rows(), _selections):
+                        for frame in self._image_frames.values():
+                            frame.checked = False
+
+                        self._results.set_flag(self._rows, ResultSet.SELECTED, False)
 
-                        self._selected_items.clear()
+                self._task_group.create_task(__delay_unselect(), "delay_unselect")
 
-                asyncio.ensure_future(__delay_unselect())
+    def _get_selected_rows(self) -> np.ndarray:
+        """
+        Returns:
+            np.ndarray: Rows of the selected results on display, in display order.
+        """
+        return self._rows[(self._results.flags[self._rows] & ResultSet.SELECTED) != 0]
+
+    def _get_selected_urls(self, index: int) -> list:
+        """The asset URLs of the selection, or of the tile at `index` if nothing is selected."""
+        rows = self._get_selected_rows()
+        return self._results.asset_urls(rows if len(rows) else [self._rows[index]])
 
     def _set_drag_fn(self, image_widget: ui.Image, index: int):
         def _get_drag_data(index):
-            thumbnail = self._images[index]
-            ui.ImageWithProvider(thumbnail, width=self._w, height=self._h)
+            if index in self._atlas_tiles:
+                self._atlas.build_image(self._results.asset_url(self._rows[index]), self._w, self._h)
+            else:
+                thumbnail = self._image_providers.get(index, self._results.images[self._rows[index]] or "")
+                ui.ImageWithProvider(thumbnail, width=self._w, height=self._h)
 
-            selected_urls = (
-                [self._usd_paths[i] for i in self._selected_items] if self._selected_items else [self._usd_paths[index]]
-            )
-            return "\n".join(selected_urls)
+            return "\n".join(self._get_selected_urls(index))
 
         image_widget.set_drag_fn(lambda: _get_drag_data(index))
 
@@ -183,7 +347,7 @@ class USDSearchImageWidget:
     def _copy_url(self, index: int):
         import omni.kit.clipboard as clipboard
 
-        urls = [self._usd_paths[i] for i in self._selected_items] if self._selected_items else [self._usd_paths[index]]
+        urls = self._get_selected_urls(index)
         # print(f"Copying URLs: {urls}")
         # build a url string with the selected urls separated by new lines
         url = "\n".join(urls)
@@ -0,0 +1,470 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: LicenseRef-NvidiaProprietary
+#
+# NVIDIA CORPORATION, its affiliates and licensors retain all intellectual
+# property and proprietary rights in and to this material, related
+# documentation and any modifications thereto. Any use, reproduction,
+# disclosure or distribution of this material and related documentation
+# without an express license agreement from NVIDIA CORPORATION or
+# its affiliates is strictly prohibited.
+
+__all__ = ["LocalIndex", "tokenize"]
+
+import asyncio
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import omni.client
+
+from .result_set import ResultSet
+from .task_group import TaskGroup
+
+logger = logging.getLogger(__name__)
+
+ASSET_EXTENSIONS = (".usd", ".usda", ".usdc", ".usdz")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS assets (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL UNIQUE,
+    directory TEXT NOT NULL,
+    size INTEGER,
+    modified REAL
+);
+CREATE INDEX IF NOT EXISTS assets_directory ON assets(directory);
+CREATE TABLE IF NOT EXISTS directories (
+    url TEXT PRIMARY KEY,
+    parent TEXT
+);
+CREATE INDEX IF NOT EXISTS directories_parent ON directories(parent);
+CREATE VIRTUAL TABLE IF NOT EXISTS names USING fts5(name, path, prefix='2 3');
+"""
+
+_WORD = re.compile(r"[^\W_]+")
+_WORD_PART = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+|[^\W\d_A-Za-z]+")
+_URL_AUTHORITY = re.compile(r"^\w+://[^/]*")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Returns:
+        List[str]: Lower case words of a name or path, split at separators, case changes and digits, ie:
+            "OfficeChair_02" gives "officechair", "office", "chair" and "02".
+    """
+    tokens = []
+    for word in _WORD.findall(text):
+        parts = _WORD_PART.findall(word)
+        if len(parts) > 1:
+            tokens.append(word.lower())
+        tokens.extend(part.lower() for part in parts or [word])
+    return tokens
+
+
+def _resolve_directory(url: str) -> str:
+    """
+    Identity of a directory while crawling: file system links are resolved, so a link to an ancestor is not
+    crawled again.
+    """
+    url = omni.client.normalize_url(url)
+    parts = omni.client.break_url(url)
+    if parts.scheme in (None, "file") and parts.path:
+        path = parts.path
+        # file:/C:/dir on Windows
+        if re.match(r"^/[A-Za-z]:", path):
+            path = path[1:]
+        return os.path.realpath(path).replace("\\", "/")
+    return url.rstrip("/")
+
+
+def _prefix_after(prefix: str) -> str:
+    """Smallest string greater than every string starting with `prefix`, for indexed prefix range queries."""
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+class LocalIndex:
+    """
+    On-disk inverted index of the asset names under Nucleus or file system roots, to find assets by name when
+    the search service is unavailable.
+
+    Roots are crawled by a fixed pool of workers running `omni.client.list_async`, and only assets whose size or modification time
+    changed since the last crawl are re-indexed. Crawled directories are then watched with list subscriptions,
+    so created, updated and deleted assets reach the index without another crawl. Lookups are synchronous, a
+    single full-text query on the local database.
+    """
+    def __init__(
+        self, db_path: str, roots: Sequence[str], max_concurrent_lists: int = 8, max_subscriptions: int = 256,
+        extensions: Sequence[str] = ASSET_EXTENSIONS, task_group: Optional[TaskGroup] = None, max_depth: int = 32,
+    ):
+        """
+        Args:
+            db_path (str): SQLite database file, created if missing.
+            roots (Sequence[str]): Nucleus or file system directories to index, with everything below them.
+            max_concurrent_lists (int): Directories listed at once while crawling.
+            max_subscriptions (int): Directories watched for changes, the shallowest ones first. Changes deeper
+                down are picked up by the next crawl.
+            extensions (Sequence[str]): Extensions of the files to index.
+            task_group (TaskGroup): Owner of the crawl and update tasks.
+            max_depth (int): Directory levels crawled below a root, deeper directories are not indexed.
+        """
+        self._db_path = db_path
+        self._roots = [root.rstrip("/") for root in roots if root]
+        self._max_concurrent_lists = max_concurrent_lists
+        self._max_subscriptions = max_subscriptions
+        self._max_depth = max_depth
+        self._extensions = tuple(extension.lower() for extension in extensions)
+        self._task_group = task_group or TaskGroup("local_index")
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        # Directory URL -> list subscription request
+        self._subscriptions: Dict[str, object] = {}
+        self._lock = threading.Lock()
+        self._conn = None
+        try:
+            self._conn = sqlite3.connect(db_path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+        except sqlite3.Error as e:
+            logger.error(f"Failed to open local index {db_path}: {e}")
+            self._conn = None
+
+    def destroy(self):
+        self._task_group.cancel("local_index_crawl")
+        self._task_group.cancel("local_index_update")
+        for request in self._subscriptions.values():
+            request.stop()
+        self._subscriptions.clear()
+        with self._lock:
+            if self._conn:
+                self._conn.close()
+                self._conn = None
+
+    @property
+    def roots(self) -> List[str]:
+        return list(self._roots)
+
+    @property
+    def count(self) -> int:
+        """
+        Returns:
+            int: Number of indexed assets.
+        """
+        if not self._conn:
+            return 0
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM assets").fetchone()[0]
+
+    def search(self, text: str, limit: int = 100) -> ResultSet:
+        """
+        Assets whose name or directory contains every word of `text`, or failing that any of them, best matches
+        first. Name matches weigh more than directory matches.
+
+        Args:
+            text (str): The query description.
+            limit (int): Maximum number of results.
+
+        Returns:
+            ResultSet: Matching assets, without thumbnail or score.
+        """
+        tokens = list(dict.fromkeys(tokenize(text)))
+        if not self._conn or not tokens:
+            return ResultSet()
+        terms = [f'"{token}"*' for token in tokens]
+        rows = []
+        with self._lock:
+            try:
+                for expression in (" AND ".join(terms), " OR ".join(terms)):
+                    rows = self._conn.execute(
+                        """
+                        SELECT assets.url FROM names JOIN assets ON assets.id = names.rowid
+                        WHERE names MATCH ?
+                        ORDER BY bm25(names, 10.0, 1.0)
+                        LIMIT ?
+                        """,
+                        (expression, limit),
+                    ).fetchall()
+                    if rows or len(terms) == 1:
+                        break
+            except sqlite3.Error as e:
+                logger.warning(f"Local index lookup failed: {e}")
+                return ResultSet()
+        results = ResultSet(len(rows))
+        for url, in rows:
+            results.append(None, url)
+        return results
+
+    async def run_async(self, rescan_interval: float = 0.0):
+        """
+        Crawls every root, then again every `rescan_interval` seconds, if positive, to catch changes in
+        directories that are not watched.
+        """
+        while True:
+            await self.crawl_async()
+            if rescan_interval <= 0:
+                return
+            await asyncio.sleep(rescan_interval)
+
+    async def crawl_async(self) -> int:
+        """
+        Lists every directory under the roots, updates the index with what changed and watches the directories.
+
+        Returns:
+            int: Number of assets added, updated or removed.
+        """
+        if not self._conn:
+            return 0
+        start = time.monotonic()
+        crawled: List[str] = []
+        changes = await self._crawl_async([(root, None) for root in self._roots], crawled)
+        logger.info(
+            f"Crawled {len(crawled)} directories under {self._roots} in {time.monotonic() - start:.1f} s, "
+            f"{changes} assets changed"
+        )
+        self._subscribe(crawled)
+        return changes
+
+    def _depth(self, url: str) -> int:
+        """Directory levels between `url` and the root it is under."""
+        for root in self._roots:
+            if url == root or url.startswith(root + "/"):
+                return url[len(root):].count("/")
+        return 0
+
+    async def _crawl_async(self, directories: Sequence[Tuple[str, Optional[str]]], crawled: List[str]) -> int:
+        """
+        Crawls directories and everything below them with max_concurrent_lists workers sharing a queue, so the
+        number of pending listings stays bounded however wide or deep the tree is. Directories already visited in
+        this crawl, ie: through a link, and those more than max_depth levels below their root are skipped.
+
+        Args:
+            directories (Sequence[Tuple[str, Optional[str]]]): URL and parent URL of the directories to crawl.
+            crawled (List[str]): Directories listed successfully, appended to.
+
+        Returns:
+            int: Number of assets added, updated or removed.
+        """
+        queue = asyncio.Queue()
+        visited = set()
+        changes = 0
+
+        def enqueue(directory, parent, depth):
+            key = _resolve_directory(directory)
+            if key in visited:
+                logger.info(f"Not crawling {directory} again, it was reached through another path")
+                return
+            visited.add(key)
+            queue.put_nowait((directory, parent, depth))
+
+        async def work():
+            nonlocal changes
+            while True:
+                directory, parent, depth = await queue.get()
+                try:
+                    count, subdirectories = await self._crawl_directory_async(directory, parent, crawled)
+                    changes += count
+                    if depth < self._max_depth:
+                        for subdirectory in subdirectories:
+                            enqueue(subdirectory, directory, depth + 1)
+                    elif subdirectories:
+                        logger.info(f"Not crawling below {directory}, local_index_max_depth is {self._max_depth}")
+                except Exception as e:
+                    logger.warning(f"Failed to crawl {directory}: {e!r}")
+                finally:
+                    queue.task_done()
+
+        for directory, parent in directories:
+            enqueue(directory, parent, self._depth(directory))
+        workers = TaskGroup("local_index_crawl")
+        for _ in range(max(1, self._max_concurrent_lists)):
+            workers.create_task(work(), "worker")
+        try:
+            await queue.join()
+        finally:
+            workers.cancel()
+        return changes
+
+    async def _crawl_directory_async(
+        self, directory: str, parent: Optional[str], crawled: List[str]
+    ) -> Tuple[int, List[str]]:
+        """
+        Lists one directory and applies the listing to the index.
+
+        Returns:
+            Tuple[int, List[str]]: Number of assets added, updated or removed, and the subdirectories to crawl.
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self._max_concurrent_lists)
+        async with self._semaphore:
+            result, entries = await omni.client.list_async(directory)
+        if result != omni.client.Result.OK:
+            # Keep what was indexed, the directory may only be unreachable for now.
+            logger.warning(f"Failed to list {directory}: {result}")
+            return 0, []
+        crawled.append(directory)
+
+        assets = []
+        subdirectories = []
+        for entry in entries:
+            name = entry.relative_path.rstrip("/")
+            url = f"{directory}/{name}"
+            if entry.flags & omni.client.ItemFlags.CAN_HAVE_CHILDREN:
+                # Skip .thumbs and other hidden directories.
+                if not name.startswith("."):
+                    subdirectories.append(url)
+            elif name.lower().endswith(self._extensions):
+                assets.append((url, entry.size, self._timestamp(entry)))
+
+        loop = asyncio.get_event_loop()
+        changes = await loop.run_in_executor(
+            None, self._update_directory, directory, parent, assets, subdirectories
+        )
+        return changes, subdirectories
+
+    @staticmethod
+    def _timestamp(entry) -> Optional[float]:
+        return entry.modified_time.timestamp() if entry.modified_time else None
+
+    def _insert_asset(self, url: str, directory: str, size: Optional[int], modified: Optional[float]):
+        asset_id = self._conn.execute(
+            "INSERT INTO assets (url, directory, size, modified) VALUES (?, ?, ?, ?)", (url, directory, size, modified)
+        ).lastrowid
+        stem = url.rsplit("/", 1)[-1].rsplit(".", 1)[0]
+        self._conn.execute(
+            "INSERT INTO names (rowid, name, path) VALUES (?, ?, ?)",
+            (asset_id, " ".join(tokenize(stem)), " ".join(tokenize(_URL_AUTHORITY.sub("", directory)))),
+        )
+
+    def _delete_assets(self, asset_ids: List[int]):
+        self._conn.executemany("DELETE FROM names WHERE rowid = ?", [(i,) for i in asset_ids])
+        self._conn.executemany("DELETE FROM assets WHERE id = ?", [(i,) for i in asset_ids])
+
+    def _delete_tree(self, url: str) -> int:
+        """Removes a directory and everything below it, returns the number of assets removed."""
+        prefix = url + "/"
+        asset_ids = [row[0] for row in self._conn.execute(
+            "SELECT id FROM assets WHERE url >= ? AND url < ?", (prefix, _prefix_after(prefix))
+        )]
+        self._delete_assets(asset_ids)
+        self._conn.execute(
+            "DELETE FROM directories WHERE url = ? OR (url >= ? AND url < ?)", (url, prefix, _prefix_after(prefix))
+        )
+        return len(asset_ids)
+
+    def _update_directory(
+        self, directory: str, parent: Optional[str], assets: List[Tuple[str, Optional[int], Optional[float]]],
+        subdirectories: List[str],
+    ) -> int:
+        """Applies a fresh listing of `directory`, returns the number of assets added, updated or removed."""
+        with self._lock:
+            if not self._conn:
+                return 0
+            with self._conn:
+                known = {
+                    url: (asset_id, size, modified)
+                    for asset_id, url, size, modified in self._conn.execute(
+                        "SELECT id, url, size, modified FROM assets WHERE directory = ?", (directory,)
+                    )
+                }
+                changes = 0
+                for url, size, modified in assets:
+                    previous = known.pop(url, None)
+                    if previous is not None:
+                        if previous[1:] == (size, modified):
+                            continue
+                        self._delete_assets([previous[0]])
+                    self._insert_asset(url, directory, size, modified)
+                    changes += 1
+                # Assets no longer listed were deleted.
+                self._delete_assets([asset_id for asset_id, _, _ in known.values()])
+                changes += len(known)
+
+                known_subdirectories = {
+                    row[0] for row in self._conn.execute("SELECT url FROM directories WHERE parent = ?", (directory,))
+                }
+                for subdirectory in known_subdirectories.difference(subdirectories):
+                    changes += self._delete_tree(subdirectory)
+                self._conn.execute(
+                    "INSERT OR IGNORE INTO directories (url, parent) VALUES (?, ?)", (directory, parent)
+                )
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO directories (url, parent) VALUES (?, ?)",
+                    [(subdirectory, directory) for subdirectory in subdirectories],
+                )
+            return changes
+
+    def _subscribe(self, directories: List[str]):
+        """Watches the shallowest directories not watched yet, up to max_subscriptions."""
+        loop = asyncio.get_event_loop()
+        unwatched = [directory for directory in directories if directory not in self._subscriptions]
+        for directory in sorted(unwatched, key=lambda url: url.count("/")):
+            if len(self._subscriptions) >= self._max_subscriptions:
+                logger.info(f"Watching {self._max_subscriptions} directories, deeper changes wait for the next crawl")
+                break
+
+            def on_event(result, event, entry, directory=directory):
+                # Called from an omni.client thread.
+                if result == omni.client.Result.OK:
+                    loop.call_soon_threadsafe(self._on_list_event, directory, event, entry)
+
+            self._subscriptions[directory] = omni.client.list_subscribe_with_callback(
+                directory, lambda result, entries: None, on_event
+            )
+
+    def _unsubscribe_tree(self, url: str):
+        prefix = url + "/"
+        for directory in [d for d in self._subscriptions if d == url or d.startswith(prefix)]:
+            self._subscriptions.pop(directory).stop()
+
+    def _on_list_event(self, directory: str, event: omni.client.ListEvent, entry):
+        if not self._conn:
+            return
+        name = entry.relative_path.rstrip("/")
+        url = f"{directory}/{name}"
+        if event == omni.client.ListEvent.DELETED:
+            self._unsubscribe_tree(url)
+            self._task_group.create_task(self._write_async(self._remove, url), "local_index_update")
+        elif event in (omni.client.ListEvent.CREATED, omni.client.ListEvent.UPDATED):
+            if entry.flags & omni.client.ItemFlags.CAN_HAVE_CHILDREN:
+                if event == omni.client.ListEvent.CREATED and not name.startswith("."):
+                    self._task_group.create_task(self._crawl_subtree_async(url, directory), "local_index_crawl")
+            elif name.lower().endswith(self._extensions):
+                self._task_group.create_task(
+                    self._write_async(self._update_asset, url, directory, entry.size, self._timestamp(entry)),
+                    "local_index_update",
+                )
+
+    async def _write_async(self, fn, *args):
+        loop = asyncio.get_event_loop()
+        try:
+            await loop.run_in_executor(None, fn, *args)
+        except sqlite3.Error as e:
+            logger.warning(f"Local index update failed: {e}")
+
+    async def _crawl_subtree_async(self, url: str, parent: str):
+        crawled: List[str] = []
+        changes = await self._crawl_async([(url, parent)], crawled)
+        logger.info(f"Indexed new directory {url}, {changes} assets")
+        self._subscribe(crawled)
+
+    def _update_asset(self, url: str, directory: str, size: Optional[int], modified: Optional[float]):
+        with self._lock:
+            if not self._conn:
+                return
+            with self._conn:
+                row = self._conn.execute("SELECT id FROM assets WHERE url = ?", (url,)).fetchone()
+                if row:
+                    self._delete_assets([row[0]])
+                self._insert_asset(url, directory, size, modified)
+
+    def _remove(self, url: str):
+        with self._lock:
+            if not self._conn:
+                return
+            with self._conn:
+                row = self._conn.execute("SELECT id FROM assets WHERE url = ?", (url,)).fetchone()
+                if row:
+                    self._delete_assets([row[0]])
+                self._delete_tree(url)
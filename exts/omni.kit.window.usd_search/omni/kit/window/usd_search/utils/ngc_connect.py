@@ -8,14 +8,27 @@
 # without an express license agreement from NVIDIA CORPORATION or
 # its affiliates is strictly prohibited.
 
+import asyncio
+import hashlib
 import json
 import logging
+import time
+from typing import AsyncIterator, Dict, List, Optional, Tuple, Union
+from urllib.parse import urlsplit
 
-import aiohttp
 import carb.settings
 import omni.client
 from async_lru import alru_cache
 
+from .http_cache import CachedResponse, HttpCache, canonical_query
+from .rate_limiter import Priority, RateLimiter
+from .replica_set import ReplicaSet
+from .shared_cache import get_shared_cache_directory
+from .single_flight import SingleFlight
+from .throughput import ThroughputEstimator
+from .task_group import TaskGroup
+from .transport import Transport, TransportError, create_transport
+
 
 @alru_cache(ttl=900)
 async def get_nucleus_server_token(nucleus_server: str):
@@ -24,111 +37,536 @@ async def get_nucleus_server_token(nucleus_server: str):
 
 logger = logging.getLogger(__name__)
 
+# Shared by every NgcConnect, so identical searches from the window and scripts share one request.
+_search_flights = SingleFlight()
+# Shared by every NgcConnect, since the quota applies to the whole client.
+_rate_limiter = None
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Returns the rate limiter for all outbound requests, configured from extension.toml."""
+    global _rate_limiter
+    if _rate_limiter is None:
+        settings = carb.settings.get_settings()
+        prefix = "/exts/omni.kit.window.usd_search/rate_limit"
+        _rate_limiter = RateLimiter(
+            rate=settings.get(f"{prefix}_per_second") or 0,
+            burst=settings.get(f"{prefix}_burst") or 1,
+            background_max_wait=settings.get(f"{prefix}_background_max_wait") or 10.0,
+            background_max_queued=settings.get(f"{prefix}_background_max_queued") or 32,
+        )
+    return _rate_limiter
+
+
+# Shared by every NgcConnect without a transport of its own and by replica probes, so connections are reused.
+_transport = None
+# Owns replica probes and closes transports, which may outlive the window.
+_tasks = TaskGroup("ngc_connect")
+
+
+def get_transport() -> Transport:
+    """Returns the transport chosen by the transport setting, shared by all requests."""
+    global _transport
+    if _transport is None:
+        settings = carb.settings.get_settings()
+        _transport = create_transport(
+            settings.get("/exts/omni.kit.window.usd_search/transport") or "aiohttp",
+            connections_per_host=settings.get("/exts/omni.kit.window.usd_search/connections_per_endpoint") or 4,
+        )
+    return _transport
+
+
+# Endpoint -> replicas serving it, shared so replica health is tracked across every NgcConnect.
+_replica_sets: Dict[str, ReplicaSet] = {}
+
+
+def get_replica_set(url: str) -> Optional[ReplicaSet]:
+    """Returns the replica set routing requests for an endpoint, None if it has no replicas configured."""
+    if url in _replica_sets:
+        return _replica_sets[url]
+
+    settings = carb.settings.get_settings()
+    prefix = "/exts/omni.kit.window.usd_search"
+    replica_set = None
+    replicas = list(settings.get(f"{prefix}/host_url_replicas") or [])
+    if replicas and url == settings.get(f"{prefix}/host_url"):
+        replica_set = ReplicaSet(
+            [url] + replicas,
+            task_group=_tasks,
+            failure_threshold=settings.get(f"{prefix}/replica_failure_threshold") or 3,
+            open_duration=settings.get(f"{prefix}/replica_open_duration") or 30.0,
+        )
+        probe_interval = settings.get(f"{prefix}/replica_probe_interval") or 0
+        if probe_interval > 0:
+            replica_set.start_probes(_probe_replica_async, probe_interval)
+    _replica_sets[url] = replica_set
+    return replica_set
+
+
+def _is_replica_failure_status(status: int) -> bool:
+    """Server errors and throttling mean the replica is unhealthy, other errors would fail on every replica."""
+    return status >= 500 or status == 429
+
+
+def _is_replica_failure(result) -> bool:
+    """
+    Whether a request result counts against the health of the replica that answered it: server errors,
+    throttling, timeouts and transport errors do, client errors (ie: 400, 401, 403) do not.
+    """
+    if not isinstance(result, dict) or "error" not in result:
+        return False
+    status = result.get("status")
+    return status is None or _is_replica_failure_status(status)
+
+
+async def _probe_replica_async(url: str) -> bool:
+    """A replica is healthy if it answers without a server error, the method itself may not be allowed."""
+    response = await get_transport().request("GET", url, timeout=5)
+    return not _is_replica_failure_status(response.status)
+
+
+# Endpoint -> how fast it answers, shared so every NgcConnect adapts from the same measurements.
+_throughput: Dict[str, ThroughputEstimator] = {}
+
+
+def get_throughput_estimator(url: str) -> ThroughputEstimator:
+    """Returns the rolling bandwidth and latency estimate of an endpoint."""
+    if url not in _throughput:
+        _throughput[url] = ThroughputEstimator()
+    return _throughput[url]
+
+
+def _origin(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def estimate_link(url: str, bandwidth: float, rtt: float) -> Tuple[float, float]:
+    """
+    Bandwidth and round-trip time to the server of `url`, from what was measured so far.
+
+    Thumbnails fetched from the same server measure both. Otherwise the bandwidth measured by the best sampled
+    search endpoint stands in for the speed of the client's link, while its latency, which includes the search
+    itself, does not stand in for a round-trip.
+
+    Args:
+        url (str): URL of an asset.
+        bandwidth (float): Bytes per second when nothing was measured.
+        rtt (float): Round-trip seconds when nothing was measured.
+
+    Returns:
+        Tuple[float, float]: Bytes per second and round-trip seconds.
+    """
+    estimator = _throughput.get(_origin(url))
+    if estimator is not None and estimator.samples:
+        if estimator.bandwidth_samples:
+            bandwidth = estimator.bandwidth
+        return bandwidth, estimator.latency
+    sampled = [estimator for estimator in _throughput.values() if estimator.bandwidth_samples]
+    if sampled:
+        bandwidth = max(sampled, key=lambda estimator: estimator.bandwidth_samples).bandwidth
+    return bandwidth, rtt
+
+
+# Shared by every NgcConnect, so GET searches from the window and scripts reuse each other's responses.
+_http_cache = None
+
+
+def get_http_cache() -> Optional[HttpCache]:
+    """Returns the HTTP cache of GET searches, None if disabled by http_cache_max_mb."""
+    global _http_cache
+    if _http_cache is None:
+        max_mb = carb.settings.get_settings().get("/exts/omni.kit.window.usd_search/http_cache_max_mb")
+        if max_mb is None:
+            max_mb = 64
+        if max_mb <= 0:
+            return None
+        _http_cache = HttpCache(get_shared_cache_directory("http"), max_bytes=int(max_mb * 1024 * 1024))
+    return _http_cache
+
+
+def shutdown():
+    """Stops background health probes and closes the shared transport."""
+    global _transport
+    for replica_set in _replica_sets.values():
+        if replica_set:
+            replica_set.destroy()
+    _replica_sets.clear()
+    if _transport is not None:
+        _tasks.create_task(_transport.close(), "close_transport")
+    _transport = None
+
+
+def _flight_key(url: str, payload: dict) -> str:
+    """Normalize a request so equivalent payloads map to the same key."""
+    normalized = dict(payload)
+    if isinstance(normalized.get("description"), str):
+        normalized["description"] = " ".join(normalized["description"].split())
+    data = json.dumps([url.rstrip("/"), normalized], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(data.encode("utf-8")).hexdigest()
+
 
 class NgcConnect:
     """
     Handle search API or URL requests and return JSON data.
     """
-    def __init__(self):
+    def __init__(
+        self, transport: Optional[Transport] = None, http_cache: Optional[HttpCache] = None,
+        task_group: Optional[TaskGroup] = None,
+    ):
+        """
+        Args:
+            transport (Transport): Sends the HTTP requests and is closed on destroy, by default the transport
+                shared by every NgcConnect (see get_transport).
+            http_cache (HttpCache): Caches GET searches, by default the one shared by every NgcConnect.
+            task_group (TaskGroup): Owner of the task closing the transport on destroy, which must outlive this
+                NgcConnect. By default the one shared by every NgcConnect.
+        """
         self._headers = None
         self._payload = None
         self._api_key = None
         self._response = None
         self._is_proper_instance = False
         self._settings = carb.settings.get_settings()
+        self._transport = transport
+        self._http_cache = http_cache
+        self._task_group = task_group or _tasks
+
+    def destroy(self):
+        if self._transport is not None:
+            self._task_group.create_task(self._transport.close(), "close_transport")
+        self._transport = None
+
+    def _get_transport(self) -> Transport:
+        """Transport shared by all requests of this NgcConnect, so connections to each endpoint are reused."""
+        return self._transport or get_transport()
+
+    def _resolve_api_key(self, is_proper_instance: bool):
+        if self._api_key is None:
+            settings = self._settings.get("/exts/omni.kit.window.usd_search/nvidia_api_key")
+            if settings:
+                self._api_key = settings
+            elif not is_proper_instance:
+                # Get from NVIDIA_API_KEY environment variable
+                import os
+
+                self._api_key = os.environ.get("NVIDIA_API_KEY")
+                if self._api_key is None:
+                    logger.error("NVIDIA_API_KEY is required for URL request")
 
     async def set_headers_async(self, url: str):
-        self._headers = {
+        self._headers = await self._get_headers_async(url, self._is_proper_instance)
+
+    async def _get_headers_async(self, url: str, is_proper_instance: bool) -> dict:
+        # Headers are built locally, requests to several endpoints can be in flight at once.
+        headers = {
             "Accept": "application/json",
             "Content-Type": "application/json",
         }
-        if self._is_proper_instance:
+        if is_proper_instance:
             require_authorization = self._settings.get("/exts/omni.kit.window.usd_search/require_authorization")
             if require_authorization:
                 if self._api_key:
-                    self._headers["x-api-key"] = self._api_key
+                    headers["x-api-key"] = self._api_key
                 else:
                     # Use Nucleus token
                     nucleus_server = self._settings.get("/exts/omni.kit.window.usd_search/nucleus_server")
                     if nucleus_server:
                         result, token = await get_nucleus_server_token(nucleus_server)
                         if result == omni.client.Result.OK:
-                            self._headers["Authorization"] = "Bearer {}".format(token)
+                            headers["Authorization"] = "Bearer {}".format(token)
                         else:
                             logger.error(f"Authorization is required for URL request but no API key and failed to get token from {nucleus_server} with error {result}")
         else:
-            self._headers["Authorization"] = "Bearer {}".format(self._api_key)
+            headers["Authorization"] = "Bearer {}".format(self._api_key)
+        return headers
 
     def set_payload(self, payload):
         self._payload = payload
 
-    async def send_api_request_async(self, url: str):
-        """Handle request via API - REQUIRES KEY"""
+    def _adapt_payload(self, url: str, payload: dict) -> dict:
+        """
+        Pick the page size and whether to inline images from the measured throughput of the endpoint, so results
+        arrive within the time_to_first_results target. The result_limit and inline_images settings, when set,
+        always win over the automatic choice. Thumbnail resolution cannot be requested, see ThroughputEstimator.plan.
+        """
+        prefix = "/exts/omni.kit.window.usd_search"
+        limit_override = self._settings.get(f"{prefix}/result_limit") or 0
+        inline_images = str(self._settings.get(f"{prefix}/inline_images") or "auto").lower()
+        target = self._settings.get(f"{prefix}/time_to_first_results") or 0
+        max_limit = payload.get("limit") or 30
 
-        if not self._payload.get("description", None):
-            return
+        payload = dict(payload)
+        forced_images = {"always": True, "never": False}.get(inline_images)
+        if target > 0:
+            min_limit = min(max_limit, self._settings.get(f"{prefix}/result_limit_min") or 10)
+            limit, return_images = get_throughput_estimator(url).plan(target, max_limit, min_limit, forced_images)
+            payload["limit"] = limit
+            payload["return_images"] = return_images
+        elif forced_images is not None:
+            payload["return_images"] = forced_images
+        if limit_override > 0:
+            payload["limit"] = limit_override
+        # Either may be missing when nothing was adapted, the server defaults then apply.
+        limit = payload.get("limit", max_limit)
+        return_images = payload.get("return_images", True)
+        if limit != max_limit or not return_images:
+            logger.info(f"Adapted to {url} throughput: limit {limit}, images {return_images}")
+        return payload
 
-        self._is_proper_instance = "ai.api.nvidia.com" not in url.lower()
+    async def send_api_request_async(
+        self, url: str, priority: Priority = Priority.BACKGROUND, timeout: Optional[float] = None
+    ):
+        """
+        Handle request via API - REQUIRES KEY
 
-        if self._api_key is None:
-            settings = self._settings.get("/exts/omni.kit.window.usd_search/nvidia_api_key")
-            if settings:
-                self._api_key = settings
-            elif not self._is_proper_instance:
-                # Get from NVIDIA_API_KEY environment variable
-                import os
+        Args:
+            url (str): USD Search API endpoint.
+            priority (Priority): INTERACTIVE for user initiated searches, they are served ahead of BACKGROUND ones.
+            timeout (float): Optional total timeout of the request in seconds.
+        """
 
-                self._api_key = os.environ.get("NVIDIA_API_KEY")
-                if self._api_key is None:
-                    logger.error("NVIDIA_API_KEY is required for URL request")
+        if not self._payload.get("description", None) and not self._payload.get("image_similarity_search", None):
+            return
+
+        is_proper_instance = "ai.api.nvidia.com" not in url.lower()
+        self._is_proper_instance = is_proper_instance
+        self._resolve_api_key(is_proper_instance)
 
-        await self.set_headers_async(url)
-        self._payload = json.dumps(self._payload)
+        headers = await self._get_headers_async(url, is_proper_instance)
+        self._headers = headers
+        adapted_payload = self._adapt_payload(url, self._payload)
+        payload = json.dumps(adapted_payload)
         logger.info(f"Invoked URL: {url}")
-        logger.info(f"Payload used: {self._payload}")
+        # Don't flood the log with base64 query images
+        logged_payload = {k: v for k, v in adapted_payload.items() if k != "image_similarity_search"}
+        logger.info(f"Payload used: {json.dumps(logged_payload)}")
+
+        inline_images = bool(adapted_payload.get("return_images", True))
+        return await _search_flights.do(
+            _flight_key(url, adapted_payload),
+            lambda: self._post_async(url, headers, payload, priority, timeout, inline_images),
+        )
+
+    async def send_federated_request_async(
+        self, urls: List[str], priority: Priority = Priority.BACKGROUND, timeout: Optional[float] = None,
+        use_url: bool = False,
+    ) -> AsyncIterator[Tuple[str, Union[list, dict, None]]]:
+        """
+        Send the payload to several USD Search endpoints concurrently.
+
+        Args:
+            urls (List[str]): USD Search API endpoints.
+            priority (Priority): Priority of the requests.
+            timeout (float): Optional timeout applied to each endpoint separately.
+            use_url (bool): Send GET requests with `send_url_request_async`, so repeated searches are served by the
+                HTTP cache. Image searches don't fit in a URL and must use the default POST requests.
 
+        Yields:
+            Tuple[str, Union[list, dict, None]]: Each endpoint and its results (or error) as soon as it answers,
+                so one slow endpoint never holds back the others.
+        """
+        send = self.send_url_request_async if use_url else self.send_api_request_async
+
+        async def request(url):
+            return url, await send(url, priority=priority, timeout=timeout)
+
+        requests = TaskGroup("federated_search")
+        tasks = [requests.create_task(request(url), url) for url in dict.fromkeys(urls)]
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url, headers=self._headers, data=self._payload) as response:
-                    response.raise_for_status()
-                    result = await response.json()
-                    filtered_result = self._process_json_data(result)
-                    return filtered_result
-        except aiohttp.ClientResponseError as e:
-            return {"error": f"API request failed: {str(e)}"}
+            for future in asyncio.as_completed(tasks):
+                yield await future
+        finally:
+            requests.cancel()
+
+    async def _post_async(
+        self, url: str, headers: dict, payload: str, priority: Priority, timeout: Optional[float],
+        inline_images: bool = True,
+    ):
+        if not await get_rate_limiter().acquire(priority):
+            return {"error": "API request dropped: client rate limit exceeded"}
+
+        replica_set = get_replica_set(url)
+        if replica_set is None:
+            return await self._post_once_async(url, headers, payload, timeout, inline_images)
+
+        # Route to the fastest healthy replica, failing over to the others.
+        if timeout is None:
+            timeout = self._settings.get("/exts/omni.kit.window.usd_search/endpoint_timeout") or None
+        return await replica_set.request(
+            lambda replica_url: self._post_once_async(replica_url, headers, payload, timeout, inline_images, url),
+            is_failure=_is_replica_failure,
+        )
+
+    async def _post_once_async(
+        self, url: str, headers: dict, payload: str, timeout: Optional[float], inline_images: bool = True,
+        endpoint: Optional[str] = None,
+    ):
+        """
+        Args:
+            inline_images (bool): Whether the payload asks for inline images, to learn the size of a result.
+            endpoint (str): Endpoint whose throughput estimate this request updates, `url` unless it is a replica.
+        """
+        try:
+            response = await self._get_transport().request("POST", url, headers=headers, data=payload, timeout=timeout)
+            response.raise_for_status()
+            result = response.json()
+            get_throughput_estimator(endpoint or url).record(
+                latency=response.latency,
+                nbytes=len(response.body),
+                transfer=response.transfer,
+                results=len(result) if isinstance(result, list) else 0,
+                inline_images=inline_images,
+            )
+            filtered_result = self._process_json_data(result)
+            return filtered_result
+        except asyncio.TimeoutError:
+            return {"error": f"API request to {url} timed out after {timeout} s"}
+        except TransportError as e:
+            return {"error": f"API request failed: {str(e)}", "status": e.status}
         except Exception as e:
             return {"error": f"API request failed: {str(e)}"}
 
 
-    async def send_url_request_async(self, url):
-        """Handle request via URL"""
+    async def send_url_request_async(
+        self, url: str, priority: Priority = Priority.BACKGROUND, timeout: Optional[float] = None
+    ):
+        """
+        Handle request via URL: the same search as `send_api_request_async`, sent as a GET request whose query
+        parameters are canonically ordered and URL encoded, so a repeated search is the same URL and can be served
+        by the HTTP cache (or a proxy) instead of the search server.
+
+        Args:
+            url (str): USD Search API endpoint.
+            priority (Priority): INTERACTIVE for user initiated searches, they are served ahead of BACKGROUND ones.
+            timeout (float): Optional total timeout of the request in seconds.
+        """
 
         if not self._payload.get("description", None):
             return
 
-        await self.set_headers_async(url)
-        logger.info(f"Headers used: {self._headers}")
+        is_proper_instance = "ai.api.nvidia.com" not in url.lower()
+        self._is_proper_instance = is_proper_instance
+        self._resolve_api_key(is_proper_instance)
+
+        headers = await self._get_headers_async(url, is_proper_instance)
+        headers.pop("Content-Type", None)
+        self._headers = headers
+        adapted_payload = self._adapt_payload(url, self._payload)
+        # Base64 query images don't fit in a URL, image searches need send_api_request_async.
+        params = {k: v for k, v in adapted_payload.items() if k != "image_similarity_search"}
+        request_url = f"{url}{'&' if '?' in url else '?'}{canonical_query(params)}"
+        logger.info(f"Invoked URL: {request_url}")
+
+        inline_images = bool(adapted_payload.get("return_images", True))
+        return await _search_flights.do(
+            _flight_key(request_url, {}),
+            lambda: self._get_async(request_url, headers, priority, timeout, inline_images, url),
+        )
 
-        # Construct the URL with query parameters
-        URLP = (url + "?")
-        URLP += f'description={self._payload.get("description", "")}&'
-        URLP += f'return_metadata={self._payload.get("return_metadata", "False")}&'
-        URLP += f'limit={self._payload.get("limit", "30")}&'
-        URLP += f'file_extension_include={self._payload.get("file_extension_include", "")}&'
-        URLP += f'return_images={self._payload.get("return_images", "True")}&'
+    async def _get_async(
+        self, url: str, headers: dict, priority: Priority, timeout: Optional[float], inline_images: bool,
+        endpoint: str,
+    ):
+        """
+        Args:
+            url (str): Full request URL, with its query.
+            inline_images (bool): Whether the query asks for inline images, to learn the size of a result.
+            endpoint (str): Endpoint whose throughput estimate this request updates, `url` starts with it.
+        """
+        http_cache = self._http_cache or get_http_cache()
+        loop = asyncio.get_event_loop()
+        cached = None
+        if http_cache is not None:
+            cached = await loop.run_in_executor(None, http_cache.lookup, url, headers)
+            if cached is not None and cached.is_fresh():
+                logger.info(f"Served from the HTTP cache: {url}")
+                return self._process_json_data(json.loads(cached.body))
 
+        if not await get_rate_limiter().acquire(priority):
+            return {"error": "API request dropped: client rate limit exceeded"}
+
+        replica_set = get_replica_set(endpoint)
+        if replica_set is None:
+            return await self._get_once_async(url, url, headers, timeout, inline_images, endpoint, cached)
+
+        # Same routing as POST searches, the query is moved over to the replica. The cache stays keyed by `url`.
+        if timeout is None:
+            timeout = self._settings.get("/exts/omni.kit.window.usd_search/endpoint_timeout") or None
+        query = url[len(endpoint):]
+        return await replica_set.request(
+            lambda replica_url: self._get_once_async(
+                replica_url + query, url, headers, timeout, inline_images, endpoint, cached
+            ),
+            is_failure=_is_replica_failure,
+        )
+
+    async def _get_once_async(
+        self, url: str, cache_url: str, headers: dict, timeout: Optional[float], inline_images: bool, endpoint: str,
+        cached: Optional[CachedResponse],
+    ):
+        """
+        Args:
+            url (str): Full request URL of the replica answering it.
+            cache_url (str): Full request URL of the endpoint, the response is cached for it.
+            cached (CachedResponse): Stale response to revalidate, if any.
+        """
+        http_cache = self._http_cache or get_http_cache()
+        loop = asyncio.get_event_loop()
+        request_headers = dict(headers)
+        if cached is not None:
+            request_headers.update(cached.conditional_headers())
+        request_time = time.time()
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(URLP, headers=self._headers) as response:
-                    response.raise_for_status()
-                    result = await response.json()
-                    filtered_result = self._process_json_data(result)
-                    return filtered_result
-        except aiohttp.ClientResponseError as e:
-            return {"error": f"API request failed: {str(e)}"}
+            response = await self._get_transport().request("GET", url, headers=request_headers, timeout=timeout)
+            if response.status == 304 and cached is not None:
+                cached = await loop.run_in_executor(None, http_cache.revalidate, cached, response, request_time)
+                return self._process_json_data(json.loads(cached.body))
+
+            response.raise_for_status()
+            result = response.json()
+            get_throughput_estimator(endpoint).record(
+                latency=response.latency,
+                nbytes=len(response.body),
+                transfer=response.transfer,
+                results=len(result) if isinstance(result, list) else 0,
+                inline_images=inline_images,
+            )
+            if http_cache is not None:
+                await loop.run_in_executor(None, http_cache.store, cache_url, headers, response, request_time)
+            return self._process_json_data(result)
+        except asyncio.TimeoutError:
+            return {"error": f"API request to {url} timed out after {timeout} s"}
+        except TransportError as e:
+            return {"error": f"API request failed: {str(e)}", "status": e.status}
         except Exception as e:
             return {"error": f"API request failed: {str(e)}"}
 
+    async def fetch_async(self, url: str, priority: Priority = Priority.BACKGROUND) -> Optional[bytes]:
+        """
+        Fetch a small resource for a tile (ie: a thumbnail) over the shared transport, so with HTTP/2 all of them
+        are multiplexed over one connection.
+
+        Returns:
+            bytes: The body, None on failure or when dropped by the rate limiter.
+        """
+        if not await get_rate_limiter().acquire(priority):
+            return None
+        try:
+            response = await self._get_transport().request("GET", url)
+            response.raise_for_status()
+            # Measures the link to the server of the assets, see estimate_link.
+            get_throughput_estimator(_origin(url)).record(
+                latency=response.latency, nbytes=len(response.body), transfer=response.transfer, results=0,
+                inline_images=False,
+            )
+            return response.body
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.info(f"Failed to fetch {url}: {e}")
+            return None
+
     def _process_json_data(self, json_data):
         """Process the JSON data returned by USD Search API."""
         for item in json_data:
@@ -151,21 +589,21 @@ class NgcConnect:
 
                 # Replace the base64 encoded image with the file path
                 item["image"] = full_path
-
-                if "bbox_dimension_x" in item:
-                    item["bbox_dimension"] = [
-                        item["bbox_dimension_x"],
-                        item["bbox_dimension_y"],
-                        item["bbox_dimension_z"],
-                    ]
             """
+            # bounding box dimensions are returned as metadata when return_metadata is set
+            if "bbox_dimension_x" in item:
+                item["bbox_dimension"] = [
+                    item["bbox_dimension_x"],
+                    item["bbox_dimension_y"],
+                    item["bbox_dimension_z"],
+                ]
 
         clean_json_data = []
         for item in json_data:
             new_item = {}
             # Remove any other keys that we dont care about
             for key in item.keys():
-                if key in ["url", "image", "bbox_dimension"]:
+                if key in ["url", "image", "bbox_dimension", "score"]:
                     new_item[key] = item[key]
 
             clean_json_data.append(new_item)
@@ -0,0 +1,136 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: LicenseRef-NvidiaProprietary
+#
+# NVIDIA CORPORATION, its affiliates and licensors retain all intellectual
+# property and proprietary rights in and to this material, related
+# documentation and any modifications thereto. Any use, reproduction,
+# disclosure or distribution of this material and related documentation
+# without an express license agreement from NVIDIA CORPORATION or
+# its affiliates is strictly prohibited.
+
+__all__ = ["Priority", "RateLimiter"]
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from enum import IntEnum
+
+logger = logging.getLogger(__name__)
+
+
+class Priority(IntEnum):
+    """Request priority classes, lower values are served first."""
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+
+class RateLimiter:
+    """
+    Token bucket limiting outbound requests, with a priority queue for requests waiting on the budget.
+
+    Interactive requests always wait for the next token, ahead of any background request. Background requests
+    are dropped instead of queued when the budget is exhausted for longer than `background_max_wait`, or when too
+    many of them are already waiting.
+    """
+    def __init__(self, rate: float, burst: int, background_max_wait: float = 10.0, background_max_queued: int = 32):
+        """
+        Args:
+            rate (float): Tokens added per second, 0 or less disables limiting.
+            burst (int): Bucket capacity.
+            background_max_wait (float): Seconds a background request may wait before it is dropped.
+            background_max_queued (int): Background requests allowed to wait at once.
+        """
+        self._rate = rate
+        self._burst = max(1, burst)
+        self._background_max_wait = background_max_wait
+        self._background_max_queued = background_max_queued
+        self._tokens = float(self._burst)
+        self._updated = time.monotonic()
+        self._waiters = []
+        self._counter = itertools.count()
+        self._wakeup = None
+        self.dropped = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._rate > 0
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self._burst, self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+
+    def _queued(self, priority: Priority) -> int:
+        return sum(1 for p, _, future in self._waiters if p == priority and not future.done())
+
+    def _estimated_wait(self) -> float:
+        """Seconds until a request queued now at the back would get its token."""
+        pending = sum(1 for _, _, future in self._waiters if not future.done())
+        return max(0.0, (pending + 1 - self._tokens) / self._rate)
+
+    async def acquire(self, priority: Priority = Priority.BACKGROUND) -> bool:
+        """
+        Waits for a request token.
+
+        Args:
+            priority (Priority): Priority class of the request.
+
+        Returns:
+            bool: True when the request may be sent, False when it was dropped.
+        """
+        if not self.enabled:
+            return True
+
+        self._refill()
+        if self._tokens >= 1 and not any(p <= priority and not f.done() for p, _, f in self._waiters):
+            self._tokens -= 1
+            return True
+
+        if priority != Priority.INTERACTIVE:
+            if (
+                self._queued(priority) >= self._background_max_queued
+                or self._estimated_wait() > self._background_max_wait
+            ):
+                self.dropped += 1
+                logger.info(f"Rate limit budget exhausted, dropping {priority.name.lower()} request")
+                return False
+
+        future = asyncio.get_event_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._counter), future))
+        self._schedule_wakeup()
+        try:
+            await future
+        except asyncio.CancelledError:
+            # Hand a token granted concurrently with the cancellation to the next waiter.
+            if future.done() and not future.cancelled():
+                self._tokens += 1
+                self._dispatch()
+            raise
+        return True
+
+    def _schedule_wakeup(self):
+        if self._wakeup is not None or not self._waiters:
+            return
+        delay = max(0.0, (1 - self._tokens) / self._rate)
+        self._wakeup = asyncio.get_event_loop().call_later(delay, self._on_wakeup)
+
+    def _on_wakeup(self):
+        self._wakeup = None
+        self._dispatch()
+
+    def _dispatch(self):
+        """Grants available tokens to waiters in priority order."""
+        self._refill()
+        while self._waiters:
+            _, _, future = self._waiters[0]
+            if future.done():
+                heapq.heappop(self._waiters)
+                continue
+            if self._tokens < 1:
+                break
+            heapq.heappop(self._waiters)
+            self._tokens -= 1
+            future.set_result(None)
+        self._schedule_wakeup()
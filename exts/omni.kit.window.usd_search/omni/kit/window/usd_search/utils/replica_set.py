@@ -0,0 +1,194 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: LicenseRef-NvidiaProprietary
+#
+# NVIDIA CORPORATION, its affiliates and licensors retain all intellectual
+# property and proprietary rights in and to this material, related
+# documentation and any modifications thereto. Any use, reproduction,
+# disclosure or distribution of this material and related documentation
+# without an express license agreement from NVIDIA CORPORATION or
+# its affiliates is strictly prohibited.
+
+__all__ = ["Replica", "ReplicaSet"]
+
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, List, Optional
+
+from .task_group import TaskGroup
+
+logger = logging.getLogger(__name__)
+
+
+class Replica:
+    """
+    Passive health of one replica: EWMA of request latency and error rate, plus a circuit breaker.
+
+    The circuit opens after `failure_threshold` consecutive failures. Once `open_duration` has passed it lets a
+    single trial request through (half-open); success closes the circuit, failure opens it again.
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, url: str, alpha: float = 0.3, failure_threshold: int = 3, open_duration: float = 30.0):
+        """
+        Args:
+            url (str): USD Search API endpoint of the replica.
+            alpha (float): EWMA smoothing factor, higher values react faster.
+            failure_threshold (int): Consecutive failures opening the circuit.
+            open_duration (float): Seconds the circuit stays open before a trial request.
+        """
+        self.url = url
+        self._alpha = alpha
+        self._failure_threshold = failure_threshold
+        self._open_duration = open_duration
+        self.latency: Optional[float] = None
+        self.error_rate = 0.0
+        self.consecutive_failures = 0
+        self.in_flight = 0
+        self.state = Replica.CLOSED
+        self._opened_at = 0.0
+
+    def _update(self, latency: float, error: bool):
+        if self.latency is None:
+            self.latency = latency
+        else:
+            self.latency += self._alpha * (latency - self.latency)
+        self.error_rate += self._alpha * ((1.0 if error else 0.0) - self.error_rate)
+
+    def record_success(self, latency: float):
+        self._update(latency, error=False)
+        self.consecutive_failures = 0
+        if self.state != Replica.CLOSED:
+            logger.info(f"Replica {self.url} recovered")
+        self.state = Replica.CLOSED
+
+    def record_failure(self, latency: float):
+        self._update(latency, error=True)
+        self.consecutive_failures += 1
+        if self.state == Replica.HALF_OPEN or self.consecutive_failures >= self._failure_threshold:
+            if self.state != Replica.OPEN:
+                logger.warning(f"Replica {self.url} is failing, opening circuit for {self._open_duration} s")
+            self.state = Replica.OPEN
+            self._opened_at = time.monotonic()
+
+    @property
+    def available(self) -> bool:
+        """
+        Returns:
+            bool: True if requests may be routed to this replica.
+        """
+        if self.state == Replica.OPEN and time.monotonic() - self._opened_at >= self._open_duration:
+            self.state = Replica.HALF_OPEN
+        if self.state == Replica.HALF_OPEN:
+            # Only one trial request at a time.
+            return self.in_flight == 0
+        return self.state == Replica.CLOSED
+
+    def cost(self) -> float:
+        """
+        Expected latency of the next request, penalized by error rate and queued requests. Replicas never measured
+        cost nothing, so each one gets tried.
+        """
+        if self.latency is None:
+            return 0.0
+        return self.latency * (1 + self.in_flight) / max(0.05, 1.0 - self.error_rate)
+
+
+class ReplicaSet:
+    """
+    Routes requests to the fastest healthy replica of a USD Search deployment and fails over to the next one.
+    """
+    def __init__(self, urls: List[str], task_group: Optional[TaskGroup] = None, **replica_kwargs):
+        """
+        Args:
+            urls (List[str]): Endpoints of the replicas serving the same content.
+            task_group (TaskGroup): Owner of the background probes.
+            replica_kwargs: Forwarded to Replica.
+        """
+        self.replicas = [Replica(url, **replica_kwargs) for url in dict.fromkeys(urls)]
+        self._task_group = task_group or TaskGroup("replica_set")
+        self._probe_task: Optional[asyncio.Future] = None
+
+    def destroy(self):
+        if self._probe_task and not self._probe_task.done():
+            self._probe_task.cancel()
+        self._probe_task = None
+
+    def ranked(self) -> List[Replica]:
+        """
+        Returns:
+            List[Replica]: Available replicas, cheapest first. Only when none is available, open-circuit replicas as
+                a last resort. A half-open replica whose trial request is in flight is never returned.
+        """
+        available = sorted((r for r in self.replicas if r.available), key=lambda r: r.cost())
+        if available:
+            return available
+        return sorted((r for r in self.replicas if r.state == Replica.OPEN), key=lambda r: r.cost())
+
+    async def request(self, send: Callable[[str], Awaitable], is_failure: Callable[[object], bool]):
+        """
+        Sends a request to the best replica, failing over to the next one when it fails.
+
+        Args:
+            send (Callable): Sends the request to a replica URL.
+            is_failure (Callable): Tells whether a result means the replica failed (ie: server error, throttling or
+                transport error). Other results, client errors included, are returned as they are: another replica
+                would answer the same.
+
+        Returns:
+            The first result that is not a failure, or the last failure if every replica failed.
+        """
+        result = None
+        for replica in self.ranked():
+            # Another request may have started the trial of a half-open replica while this one was failing over.
+            if replica.state == Replica.HALF_OPEN and replica.in_flight:
+                continue
+            replica.in_flight += 1
+            start = time.monotonic()
+            try:
+                result = await send(replica.url)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                result = {"error": f"API request failed: {str(e)}"}
+            finally:
+                replica.in_flight -= 1
+            latency = time.monotonic() - start
+            if is_failure(result):
+                replica.record_failure(latency)
+                logger.warning(f"Replica {replica.url} failed, trying next one")
+                continue
+            replica.record_success(latency)
+            return result
+        return result
+
+    def start_probes(self, probe: Callable[[str], Awaitable[bool]], interval: float):
+        """
+        Actively checks every replica in the background, so failing replicas are detected (and recovered ones
+        brought back) without routing user requests to them.
+
+        Args:
+            probe (Callable): Checks a replica URL, returns True if healthy.
+            interval (float): Seconds between probe rounds.
+        """
+        if self._probe_task is None or self._probe_task.done():
+            self._probe_task = self._task_group.create_task(self._probe_loop(probe, interval), "replica_probes")
+
+    async def _probe_loop(self, probe: Callable[[str], Awaitable[bool]], interval: float):
+        while True:
+            async def check(replica: Replica):
+                start = time.monotonic()
+                try:
+                    healthy = await probe(replica.url)
+                except Exception:
+                    healthy = False
+                latency = time.monotonic() - start
+                if healthy:
+                    replica.record_success(latency)
+                else:
+                    replica.record_failure(latency)
+
+            await asyncio.gather(*[check(replica) for replica in self.replicas])
+            await asyncio.sleep(interval)
@@ -0,0 +1,110 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: LicenseRef-NvidiaProprietary
+#
+# NVIDIA CORPORATION, its affiliates and licensors retain all intellectual
+# property and proprietary rights in and to this material, related
+# documentation and any modifications thereto. Any use, reproduction,
+# disclosure or distribution of this material and related documentation
+# without an express license agreement from NVIDIA CORPORATION or
+# its affiliates is strictly prohibited.
+
+__all__ = ["ResultFilter"]
+
+import logging
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from .result_set import ResultSet
+
+logger = logging.getLogger(__name__)
+
+
+class ResultFilter:
+    """
+    Re-rank and filter search results locally, so a large result set can be narrowed without another server
+    round-trip.
+
+    Scores follow the server's `cutoff_threshold` semantics: lower is a closer match. Results without a score,
+    bounding box dimensions or load estimate are never filtered out by those criteria, they simply sort last.
+    """
+    def __init__(self):
+        self.min_score: Optional[float] = None
+        self.max_score: Optional[float] = None
+        self.path_prefixes: List[str] = []
+        # Per-axis (x, y, z) bounds, None to leave an axis unbounded.
+        self.bbox_min: Optional[Sequence[Optional[float]]] = None
+        self.bbox_max: Optional[Sequence[Optional[float]]] = None
+        self.max_load_seconds: Optional[float] = None
+        self.sort_by_score = True
+        # Cheapest to load first, ahead of score ordering.
+        self.sort_by_load_cost = False
+
+    @property
+    def is_active(self) -> bool:
+        """
+        Returns:
+            bool: True if any filter criterion is set.
+        """
+        return (
+            self.min_score is not None
+            or self.max_score is not None
+            or bool(self.path_prefixes)
+            or self.bbox_min is not None
+            or self.bbox_max is not None
+            or self.max_load_seconds is not None
+            or self.sort_by_load_cost
+        )
+
+    def reset(self):
+        self.__init__()
+
+    def apply(self, results: ResultSet) -> np.ndarray:
+        """
+        Computes the rows of the results that pass the filter, in display order.
+
+        Args:
+            results (ResultSet): Results in server order.
+
+        Returns:
+            np.ndarray: Rows of `results`.
+        """
+        count = len(results)
+        if count == 0:
+            return np.zeros(0, dtype=np.int64)
+
+        scores = results.scores
+        mask = np.ones(count, dtype=bool)
+
+        if self.min_score is not None:
+            mask &= ~(scores < self.min_score)
+        if self.max_score is not None:
+            mask &= ~(scores > self.max_score)
+
+        if self.path_prefixes:
+            mask &= results.match_prefixes(self.path_prefixes)
+
+        if self.bbox_min is not None or self.bbox_max is not None:
+            bboxes = results.bboxes
+            # NaN compares False, so unknown dimensions pass.
+            if self.bbox_min is not None:
+                bounds = np.array([-np.inf if v is None else v for v in self.bbox_min], dtype=np.float64)
+                mask &= ~(bboxes < bounds).any(axis=1)
+            if self.bbox_max is not None:
+                bounds = np.array([np.inf if v is None else v for v in self.bbox_max], dtype=np.float64)
+                mask &= ~(bboxes > bounds).any(axis=1)
+
+        load_seconds = results.load_seconds
+        if self.max_load_seconds is not None:
+            mask &= ~(load_seconds > self.max_load_seconds)
+
+        indices = np.flatnonzero(mask)
+        if self.sort_by_load_cost and not np.isnan(load_seconds).all():
+            keys = np.where(np.isnan(load_seconds), np.inf, load_seconds)[indices]
+            indices = indices[np.argsort(keys, kind="stable")]
+        elif self.sort_by_score and not np.isnan(scores).all():
+            keys = np.where(np.isnan(scores), np.inf, scores)[indices]
+            # Stable sort keeps server order for equal (or missing) scores.
+            indices = indices[np.argsort(keys, kind="stable")]
+
+        return indices
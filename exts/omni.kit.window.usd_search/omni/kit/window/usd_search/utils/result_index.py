@@ -0,0 +1,286 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: LicenseRef-NvidiaProprietary
+#
+# NVIDIA CORPORATION, its affiliates and licensors retain all intellectual
+# property and proprietary rights in and to this material, related
+# documentation and any modifications thereto. Any use, reproduction,
+# disclosure or distribution of this material and related documentation
+# without an express license agreement from NVIDIA CORPORATION or
+# its affiliates is strictly prohibited.
+
+__all__ = ["ResultIndex"]
+
+import asyncio
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+from typing import List, Optional, Sequence
+
+from .result_set import ResultSet
+from .search_models import USDSearchModel
+from .task_group import TaskGroup
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS queries (
+    id INTEGER PRIMARY KEY,
+    query TEXT NOT NULL,
+    scene_url TEXT NOT NULL DEFAULT '',
+    last_used REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 1,
+    UNIQUE (query, scene_url)
+);
+CREATE TABLE IF NOT EXISTS results (
+    query_id INTEGER NOT NULL REFERENCES queries(id) ON DELETE CASCADE,
+    rank INTEGER NOT NULL,
+    url TEXT NOT NULL,
+    name TEXT NOT NULL,
+    image TEXT,
+    score REAL,
+    bbox TEXT,
+    PRIMARY KEY (query_id, rank)
+);
+CREATE INDEX IF NOT EXISTS queries_last_used ON queries(last_used);
+CREATE VIRTUAL TABLE IF NOT EXISTS suggestions USING fts5(text, query_id UNINDEXED, prefix='2 3');
+"""
+
+
+class ResultIndex:
+    """
+    Persistent local index of past queries and the assets they returned.
+
+    Reads are synchronous since they only touch the local database and are meant to run on every keystroke;
+    writes and compaction run on a worker thread so they never stall the UI.
+    """
+    def __init__(self, db_path: str, max_queries: int = 500, task_group: Optional[TaskGroup] = None):
+        """
+        Args:
+            db_path (str): SQLite database file, created if missing.
+            max_queries (int): Number of most recently used queries kept by compaction.
+            task_group (TaskGroup): Owner of the background compaction.
+        """
+        self._db_path = db_path
+        self._max_queries = max_queries
+        self._task_group = task_group or TaskGroup("result_index")
+        self._lock = threading.Lock()
+        self._compact_future: Optional[asyncio.Future] = None
+        self._conn = None
+        try:
+            self._conn = sqlite3.connect(db_path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA foreign_keys=ON")
+            self._conn.executescript(_SCHEMA)
+            self._migrate()
+        except sqlite3.Error as e:
+            logger.error(f"Failed to open result index {db_path}: {e}")
+            self._conn = None
+
+    def _migrate(self):
+        """Adds columns introduced after the index was first created."""
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(results)")}
+        for column, column_type in (("score", "REAL"), ("bbox", "TEXT")):
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE results ADD COLUMN {column} {column_type}")
+
+    def destroy(self):
+        if self._compact_future and not self._compact_future.done():
+            self._compact_future.cancel()
+        with self._lock:
+            if self._conn:
+                self._conn.close()
+                self._conn = None
+
+    @staticmethod
+    def _match_expression(text: str) -> Optional[str]:
+        """Builds an FTS prefix query that matches every token of `text`."""
+        tokens = re.findall(r"\w+", text.lower())
+        if not tokens:
+            return None
+        return " ".join(f'"{token}"*' for token in tokens)
+
+    def suggest(self, text: str, limit: int = 8) -> List[str]:
+        """
+        Type-ahead suggestions from past queries and asset names, most recently used first.
+
+        Args:
+            text (str): What the user has typed so far.
+            limit (int): Maximum number of suggestions.
+
+        Returns:
+            List[str]: Suggestions, not including `text` itself.
+        """
+        expression = self._match_expression(text)
+        if not self._conn or expression is None:
+            return []
+        with self._lock:
+            try:
+                rows = self._conn.execute(
+                    """
+                    SELECT suggestions.text, MAX(queries.last_used) AS last_used FROM suggestions
+                    JOIN queries ON queries.id = suggestions.query_id
+                    WHERE suggestions MATCH ?
+                    GROUP BY suggestions.text COLLATE NOCASE
+                    ORDER BY last_used DESC
+                    LIMIT ?
+                    """,
+                    (expression, limit + 1),
+                ).fetchall()
+            except sqlite3.Error as e:
+                logger.warning(f"Result index suggestion lookup failed: {e}")
+                return []
+        stripped = text.strip().lower()
+        return [row[0] for row in rows if row[0].lower() != stripped][:limit]
+
+    def recent_queries(self, limit: int = 10) -> List[str]:
+        if not self._conn:
+            return []
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT DISTINCT query FROM queries ORDER BY last_used DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    @staticmethod
+    def _to_models(rows) -> ResultSet:
+        results = ResultSet(len(rows))
+        for url, _, image, score, bbox in rows:
+            results.append(image, url, score=score, bbox_dimension=json.loads(bbox) if bbox else None)
+        results.set_flag(slice(None), ResultSet.STALE)
+        return results
+
+    def recent_results(self, query: str, scene_url: str = "") -> ResultSet:
+        """
+        Results last seen for a query, in the order the server returned them.
+
+        Args:
+            query (str): The query description.
+            scene_url (str): Scene the query was restricted to, empty for a global search.
+
+        Returns:
+            ResultSet: Cached results marked as stale, empty if the query was never run.
+        """
+        if not self._conn:
+            return ResultSet()
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT results.url, results.name, results.image, results.score, results.bbox FROM results
+                JOIN queries ON queries.id = results.query_id
+                WHERE queries.query = ? AND queries.scene_url = ?
+                ORDER BY results.rank
+                """,
+                (query, scene_url),
+            ).fetchall()
+        return self._to_models(rows)
+
+    def find_results(self, text: str, scene_url: str = "", limit: int = 100) -> ResultSet:
+        """
+        Cached results of every past query matching `text`, or whose results have matching asset names, for
+        searching without the service. Results of the most recently used queries come first.
+
+        Args:
+            text (str): The query description.
+            scene_url (str): Scene the queries were restricted to, empty for global searches.
+            limit (int): Maximum number of results.
+
+        Returns:
+            ResultSet: Cached results marked as stale, each asset once.
+        """
+        expression = self._match_expression(text)
+        if not self._conn or expression is None:
+            return ResultSet()
+        with self._lock:
+            try:
+                rows = self._conn.execute(
+                    """
+                    SELECT results.url, results.name, results.image, results.score, results.bbox FROM results
+                    JOIN queries ON queries.id = results.query_id
+                    WHERE queries.scene_url = ? AND queries.id IN (
+                        SELECT query_id FROM suggestions WHERE suggestions MATCH ?
+                    )
+                    ORDER BY queries.last_used DESC, results.rank
+                    """,
+                    (scene_url, expression),
+                ).fetchall()
+            except sqlite3.Error as e:
+                logger.warning(f"Result index lookup failed: {e}")
+                return ResultSet()
+        unique = {}
+        for row in rows:
+            unique.setdefault(row[0], row)
+        return self._to_models(list(unique.values())[:limit])
+
+    def _record(self, query: str, scene_url: str, models: Sequence[USDSearchModel]):
+        with self._lock:
+            if not self._conn:
+                return 0
+            with self._conn:
+                self._conn.execute(
+                    """
+                    INSERT INTO queries (query, scene_url, last_used) VALUES (?, ?, ?)
+                    ON CONFLICT (query, scene_url) DO UPDATE SET last_used = excluded.last_used, hits = hits + 1
+                    """,
+                    (query, scene_url, time.time()),
+                )
+                query_id = self._conn.execute(
+                    "SELECT id FROM queries WHERE query = ? AND scene_url = ?", (query, scene_url)
+                ).fetchone()[0]
+                self._conn.execute("DELETE FROM results WHERE query_id = ?", (query_id,))
+                self._conn.execute("DELETE FROM suggestions WHERE query_id = ?", (query_id,))
+                self._conn.executemany(
+                    "INSERT INTO results (query_id, rank, url, name, image, score, bbox) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        (
+                            query_id, rank, m.asset_url, m.asset_name, m.image_url, m.score,
+                            json.dumps(list(m.bbox_dimension)) if m.bbox_dimension is not None else None,
+                        )
+                        for rank, m in enumerate(models)
+                    ],
+                )
+                names = {m.asset_name.rsplit(".", 1)[0] for m in models}
+                self._conn.executemany(
+                    "INSERT INTO suggestions (text, query_id) VALUES (?, ?)",
+                    [(text, query_id) for text in [query, *sorted(names)]],
+                )
+            return self._conn.execute("SELECT COUNT(*) FROM queries").fetchone()[0]
+
+    async def record_async(self, query: str, scene_url: str, models: Sequence[USDSearchModel]):
+        """
+        Stores the results of a query, replacing any previous results for it. Schedules a background compaction
+        once the index grows past its bound.
+        """
+        loop = asyncio.get_event_loop()
+        try:
+            count = await loop.run_in_executor(None, self._record, query, scene_url, models)
+        except sqlite3.Error as e:
+            logger.warning(f"Failed to record results for '{query}': {e}")
+            return
+        # Let the index overshoot a little so compaction runs in batches rather than on every search.
+        if count > self._max_queries * 1.1 and (self._compact_future is None or self._compact_future.done()):
+            self._compact_future = self._task_group.create_task(self.compact_async(), "compact_result_index")
+
+    def _compact(self):
+        with self._lock:
+            if not self._conn:
+                return
+            with self._conn:
+                stale = self._conn.execute(
+                    "SELECT id FROM queries ORDER BY last_used DESC LIMIT -1 OFFSET ?", (self._max_queries,)
+                ).fetchall()
+                self._conn.executemany("DELETE FROM suggestions WHERE query_id = ?", stale)
+                self._conn.executemany("DELETE FROM queries WHERE id = ?", stale)
+                self._conn.execute("INSERT INTO suggestions (suggestions) VALUES ('optimize')")
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            logger.info(f"Compacted result index, removed {len(stale)} queries")
+
+    async def compact_async(self):
+        """Drops the least recently used queries beyond the bound and optimizes the full-text index."""
+        loop = asyncio.get_event_loop()
+        try:
+            await loop.run_in_executor(None, self._compact)
+        except sqlite3.Error as e:
+            logger.warning(f"Result index compaction failed: {e}")
@@ -0,0 +1,314 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: LicenseRef-NvidiaProprietary
+#
+# NVIDIA CORPORATION, its affiliates and licensors retain all intellectual
+# property and proprietary rights in and to this material, related
+# documentation and any modifications thereto. Any use, reproduction,
+# disclosure or distribution of this material and related documentation
+# without an express license agreement from NVIDIA CORPORATION or
+# its affiliates is strictly prohibited.
+
+__all__ = ["ResultSet", "ResultView"]
+
+import logging
+from collections import abc
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from .search_models import USDSearchModel
+
+logger = logging.getLogger(__name__)
+
+
+def _grow(array: np.ndarray, capacity: int, fill) -> np.ndarray:
+    grown = np.full((capacity,) + array.shape[1:], fill, dtype=array.dtype)
+    grown[:len(array)] = array
+    return grown
+
+
+class ResultSet:
+    """
+    Columnar store of search results, addressed by row.
+
+    Asset URLs are split into an interned directory prefix and a file name, since the results of a search share
+    a handful of directories. Scores, bounding boxes, sizes, load estimates, thumbnail hashes and flags are NumPy
+    columns, so filtering, sorting and grouping work on whole arrays rather than walking objects. A USDSearchModel
+    is a view of one row and a ResultView an ordered selection of rows, ie: the results on display.
+
+    Unknown numbers are NaN in the columns and None through USDSearchModel.
+    """
+    # Bits of the flags column
+    STALE = 1
+    LOCAL = 2
+    HASHED = 4
+    SELECTED = 8
+
+    def __init__(self, capacity: int = 64):
+        """
+        Args:
+            capacity (int): Rows allocated up front, the columns grow as needed.
+        """
+        capacity = max(1, capacity)
+        self._count = 0
+        self._prefixes: List[str] = []
+        self._prefix_ids: Dict[str, int] = {}
+        self.names: List[str] = []
+        self.images: List[Optional[str]] = []
+        self._prefix = np.zeros(capacity, dtype=np.int32)
+        self._scores = np.full(capacity, np.nan, dtype=np.float64)
+        self._bboxes = np.full((capacity, 3), np.nan, dtype=np.float64)
+        self._sizes = np.full(capacity, np.nan, dtype=np.float64)
+        self._load_seconds = np.full(capacity, np.nan, dtype=np.float64)
+        self._hashes = np.zeros(capacity, dtype=np.uint64)
+        self._flags = np.zeros(capacity, dtype=np.uint8)
+        self._variant_counts = np.zeros(capacity, dtype=np.int32)
+
+    @classmethod
+    def from_models(cls, models: Sequence[USDSearchModel]) -> "ResultSet":
+        """
+        Copies results that may belong to different result sets, ie: standalone ones created with the
+        USDSearchModel constructor.
+
+        Returns:
+            ResultSet: A new result set, one row per model in order.
+        """
+        results = cls(len(models))
+        for model in models:
+            row = results.append(model.image_url, model.asset_url, model.score, model.bbox_dimension).row
+            results._sizes[row] = model.results.sizes[model.row]
+            results._load_seconds[row] = model.results.load_seconds[model.row]
+            results._hashes[row] = model.results.image_hashes[model.row]
+            results._flags[row] = model.results.flags[model.row] & ~np.uint8(cls.SELECTED)
+        return results
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, row: int) -> USDSearchModel:
+        if not 0 <= row < self._count:
+            raise IndexError(row)
+        return USDSearchModel._view(self, int(row))
+
+    def __iter__(self) -> Iterator[USDSearchModel]:
+        return (USDSearchModel._view(self, row) for row in range(self._count))
+
+    def __add__(self, other: "ResultSet") -> "ResultSet":
+        return ResultSet(len(self) + len(other)).extend(self).extend(other)
+
+    def _reserve(self, count: int):
+        capacity = len(self._prefix)
+        if count <= capacity:
+            return
+        capacity = max(count, capacity * 2)
+        self._prefix = _grow(self._prefix, capacity, 0)
+        self._scores = _grow(self._scores, capacity, np.nan)
+        self._bboxes = _grow(self._bboxes, capacity, np.nan)
+        self._sizes = _grow(self._sizes, capacity, np.nan)
+        self._load_seconds = _grow(self._load_seconds, capacity, np.nan)
+        self._hashes = _grow(self._hashes, capacity, 0)
+        self._flags = _grow(self._flags, capacity, 0)
+        self._variant_counts = _grow(self._variant_counts, capacity, 0)
+
+    def _intern(self, prefix: str) -> int:
+        prefix_id = self._prefix_ids.get(prefix)
+        if prefix_id is None:
+            prefix_id = self._prefix_ids[prefix] = len(self._prefixes)
+            self._prefixes.append(prefix)
+        return prefix_id
+
+    def append(
+        self, image_url: Optional[str], asset_url: str, score: Optional[float] = None,
+        bbox_dimension: Optional[Sequence[float]] = None,
+    ) -> USDSearchModel:
+        """
+        Args:
+            image_url (str): Thumbnail path, URL or thumbnail pack reference, None if unknown.
+            asset_url (str): Asset URL, its last component is the asset name.
+            score (float): Server score, lower is a closer match.
+            bbox_dimension (Sequence[float]): Bounding box size along x, y and z.
+
+        Returns:
+            USDSearchModel: The new result.
+        """
+        row = self._count
+        self._reserve(row + 1)
+        prefix, _, name = asset_url.rpartition("/")
+        self._prefix[row] = self._intern(prefix + "/" if prefix else "")
+        self.names.append(name)
+        self.images.append(image_url)
+        if score is not None:
+            self._scores[row] = score
+        if bbox_dimension is not None:
+            self._bboxes[row] = bbox_dimension
+        self._count += 1
+        return USDSearchModel._view(self, row)
+
+    def extend(self, other: "ResultSet") -> "ResultSet":
+        """
+        Appends every row of `other`, column by column.
+
+        Returns:
+            ResultSet: This result set.
+        """
+        count = len(other)
+        if count == 0:
+            return self
+        start = self._count
+        end = start + count
+        self._reserve(end)
+        remap = np.array([self._intern(prefix) for prefix in other._prefixes], dtype=np.int32)
+        self._prefix[start:end] = remap[other.prefix_ids]
+        self._scores[start:end] = other.scores
+        self._bboxes[start:end] = other.bboxes
+        self._sizes[start:end] = other.sizes
+        self._load_seconds[start:end] = other.load_seconds
+        self._hashes[start:end] = other.image_hashes
+        # Selection and grouping belong to the display of the other set.
+        self._flags[start:end] = other.flags & ~np.uint8(self.SELECTED)
+        self._variant_counts[start:end] = 0
+        self.names.extend(other.names)
+        self.images.extend(other.images)
+        self._count = end
+        return self
+
+    # Columns, views of the first len(self) rows that stay valid until the next append.
+
+    @property
+    def prefixes(self) -> List[str]:
+        """Interned directory prefixes, ending with a slash."""
+        return self._prefixes
+
+    @property
+    def prefix_ids(self) -> np.ndarray:
+        return self._prefix[:self._count]
+
+    @property
+    def scores(self) -> np.ndarray:
+        return self._scores[:self._count]
+
+    @property
+    def bboxes(self) -> np.ndarray:
+        return self._bboxes[:self._count]
+
+    @property
+    def sizes(self) -> np.ndarray:
+        return self._sizes[:self._count]
+
+    @property
+    def load_seconds(self) -> np.ndarray:
+        return self._load_seconds[:self._count]
+
+    @property
+    def image_hashes(self) -> np.ndarray:
+        return self._hashes[:self._count]
+
+    @property
+    def flags(self) -> np.ndarray:
+        return self._flags[:self._count]
+
+    @property
+    def variant_counts(self) -> np.ndarray:
+        return self._variant_counts[:self._count]
+
+    def asset_url(self, row: int) -> str:
+        return self._prefixes[self._prefix[row]] + self.names[row]
+
+    def asset_urls(self, rows: Optional[Sequence[int]] = None) -> List[str]:
+        """
+        Returns:
+            List[str]: Asset URLs of `rows`, of every row if None.
+        """
+        rows = range(self._count) if rows is None else rows
+        return [self._prefixes[self._prefix[row]] + self.names[row] for row in rows]
+
+    def has_flag(self, row: int, flag: int) -> bool:
+        return bool(self._flags[row] & flag)
+
+    def set_flag(self, rows, flag: int, value: bool = True):
+        """
+        Args:
+            rows: A row, a sequence or array of rows, or a boolean mask.
+            flag (int): STALE, LOCAL, HASHED or SELECTED.
+            value (bool): Whether to set or clear the flag.
+        """
+        if value:
+            self._flags[:self._count][rows] |= np.uint8(flag)
+        else:
+            self._flags[:self._count][rows] &= ~np.uint8(flag)
+
+    def rows_with_flag(self, flag: int) -> np.ndarray:
+        """
+        Returns:
+            np.ndarray: Rows with `flag` set, in row order.
+        """
+        return np.flatnonzero(self.flags & flag)
+
+    def match_prefixes(self, prefixes: Sequence[str]) -> np.ndarray:
+        """
+        Case insensitive test of which asset URLs start with any of `prefixes`, decided once per interned
+        directory where possible and per name only where a prefix ends inside it.
+
+        Returns:
+            np.ndarray: Boolean mask over the rows.
+        """
+        prefixes = [prefix.lower() for prefix in prefixes]
+        directories = [directory.lower() for directory in self._prefixes]
+        whole = np.zeros(len(directories) + 1, dtype=bool)
+        # Directory -> remainders of the prefixes ending inside its file names
+        partial: Dict[int, List[str]] = {}
+        for prefix_id, directory in enumerate(directories):
+            for prefix in prefixes:
+                if directory.startswith(prefix):
+                    whole[prefix_id] = True
+                    break
+                if prefix.startswith(directory):
+                    partial.setdefault(prefix_id, []).append(prefix[len(directory):])
+
+        mask = whole[self.prefix_ids]
+        for prefix_id, remainders in partial.items():
+            if whole[prefix_id]:
+                continue
+            for row in np.flatnonzero(self.prefix_ids == prefix_id):
+                name = self.names[row].lower()
+                mask[row] = any(name.startswith(remainder) for remainder in remainders)
+        return mask
+
+    def view(self, rows: Optional[Sequence[int]] = None) -> "ResultView":
+        """
+        Returns:
+            ResultView: `rows` in the given order, every row if None.
+        """
+        return ResultView(self, np.arange(self._count) if rows is None else rows)
+
+
+class ResultView(abc.Sequence):
+    """
+    Ordered selection of the rows of a ResultSet, ie: the filtered, ranked and grouped results on display. Holds
+    the row numbers only, indexing it gives USDSearchModel views of the shared result set.
+    """
+    def __init__(self, results: ResultSet, rows: Sequence[int]):
+        """
+        Args:
+            results (ResultSet): The result set.
+            rows (Sequence[int]): Rows of `results` in display order.
+        """
+        self.results = results
+        self.rows = np.asarray(rows, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __getitem__(self, index: int) -> USDSearchModel:
+        return USDSearchModel._view(self.results, int(self.rows[index]))
+
+    def __iter__(self) -> Iterator[USDSearchModel]:
+        return (USDSearchModel._view(self.results, int(row)) for row in self.rows)
+
+    def __eq__(self, other) -> bool:
+        return (
+            isinstance(other, ResultView) and other.results is self.results and np.array_equal(other.rows, self.rows)
+        )
+
+    def asset_urls(self) -> List[str]:
+        return self.results.asset_urls(self.rows)
@@ -8,9 +8,148 @@
 # without an express license agreement from NVIDIA CORPORATION or
 # its affiliates is strictly prohibited.
 
+__all__ = ["USDSearchModel"]
+
+import math
+from typing import List, Optional, Sequence
+
 
 class USDSearchModel():
-    def __init__(self, image_url, asset_url, asset_name) -> None:
-        self.image_url = image_url
-        self.asset_url = asset_url
-        self.asset_name = asset_name
+    """
+    One search result, a view of a row of a ResultSet: attributes read and write its columns, so the model holds
+    no data of its own and is cheap to create on demand.
+    """
+    __slots__ = ("results", "row")
+
+    def __init__(
+        self, image_url: Optional[str], asset_url: str, asset_name: Optional[str] = None,
+        score: Optional[float] = None, bbox_dimension: Optional[Sequence[float]] = None,
+    ) -> None:
+        """
+        Creates a standalone result, in a result set of its own. Results of a ResultSet are viewed with the models
+        it returns instead.
+
+        Args:
+            image_url (str): Thumbnail path, URL or thumbnail pack reference, None if unknown.
+            asset_url (str): Asset URL.
+            asset_name (str): Kept for compatibility, the name is always the last component of `asset_url`.
+            score (float): Server score, lower is a closer match.
+            bbox_dimension (Sequence[float]): Bounding box size along x, y and z.
+        """
+        from .result_set import ResultSet
+
+        self.results = ResultSet(1)
+        self.row = self.results.append(image_url, asset_url, score=score, bbox_dimension=bbox_dimension).row
+
+    @classmethod
+    def _view(cls, results, row: int) -> "USDSearchModel":
+        """
+        Args:
+            results (ResultSet): The result set.
+            row (int): Row of the result.
+
+        Returns:
+            USDSearchModel: A model reading and writing the row.
+        """
+        model = cls.__new__(cls)
+        model.results = results
+        model.row = row
+        return model
+
+    @classmethod
+    def from_values(
+        cls, image_url: Optional[str], asset_url: str, asset_name: Optional[str] = None,
+        score: Optional[float] = None, bbox_dimension: Optional[Sequence[float]] = None,
+    ) -> "USDSearchModel":
+        """
+        Same as the constructor.
+
+        Returns:
+            USDSearchModel: The result.
+        """
+        return cls(image_url, asset_url, asset_name, score, bbox_dimension)
+
+    @property
+    def image_url(self) -> Optional[str]:
+        return self.results.images[self.row]
+
+    @image_url.setter
+    def image_url(self, value: Optional[str]):
+        self.results.images[self.row] = value
+
+    @property
+    def asset_url(self) -> str:
+        return self.results.asset_url(self.row)
+
+    @property
+    def asset_name(self) -> str:
+        return self.results.names[self.row]
+
+    # Only available when the server returns them (see return_metadata / return_predictions).
+    @property
+    def score(self) -> Optional[float]:
+        score = self.results.scores[self.row]
+        return None if math.isnan(score) else float(score)
+
+    @score.setter
+    def score(self, value: Optional[float]):
+        self.results.scores[self.row] = math.nan if value is None else value
+
+    @property
+    def bbox_dimension(self) -> Optional[List[float]]:
+        bbox = self.results.bboxes[self.row]
+        return None if math.isnan(bbox[0]) else bbox.tolist()
+
+    # Filled in once the asset has been stat'ed, see AssetStatCache.
+    @property
+    def size(self) -> Optional[int]:
+        size = self.results.sizes[self.row]
+        return None if math.isnan(size) else int(size)
+
+    @size.setter
+    def size(self, value: Optional[int]):
+        self.results.sizes[self.row] = math.nan if value is None else value
+
+    @property
+    def load_seconds(self) -> Optional[float]:
+        load_seconds = self.results.load_seconds[self.row]
+        return None if math.isnan(load_seconds) else float(load_seconds)
+
+    @load_seconds.setter
+    def load_seconds(self, value: Optional[float]):
+        self.results.load_seconds[self.row] = math.nan if value is None else value
+
+    # Served from the local result index rather than fresh from the server.
+    @property
+    def stale(self) -> bool:
+        return self.results.has_flag(self.row, self.results.STALE)
+
+    @stale.setter
+    def stale(self, value: bool):
+        self.results.set_flag(self.row, self.results.STALE, value)
+
+    # Found by name in the local index rather than by the search service, see LocalIndex.
+    @property
+    def local(self) -> bool:
+        return self.results.has_flag(self.row, self.results.LOCAL)
+
+    @local.setter
+    def local(self, value: bool):
+        self.results.set_flag(self.row, self.results.LOCAL, value)
+
+    # Perceptual hash of the thumbnail, see VariantGrouper.
+    @property
+    def image_hash(self) -> Optional[int]:
+        if not self.results.has_flag(self.row, self.results.HASHED):
+            return None
+        return int(self.results.image_hashes[self.row])
+
+    @image_hash.setter
+    def image_hash(self, value: Optional[int]):
+        self.results.image_hashes[self.row] = value or 0
+        self.results.set_flag(self.row, self.results.HASHED, value is not None)
+
+    # Near-identical results grouped under this one while it is shown as their representative.
+    @property
+    def variant_count(self) -> int:
+        return int(self.results.variant_counts[self.row])
@@ -0,0 +1,182 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: LicenseRef-NvidiaProprietary
+#
+# NVIDIA CORPORATION, its affiliates and licensors retain all intellectual
+# property and proprietary rights in and to this material, related
+# documentation and any modifications thereto. Any use, reproduction,
+# disclosure or distribution of this material and related documentation
+# without an express license agreement from NVIDIA CORPORATION or
+# its affiliates is strictly prohibited.
+
+__all__ = ["FileLock", "atomic_write", "get_shared_cache_directory"]
+
+import logging
+import os
+import sys
+import threading
+import time
+from typing import Optional
+
+import carb.settings
+import carb.tokens
+
+logger = logging.getLogger(__name__)
+
+if sys.platform == "win32":
+    import msvcrt
+
+    def _try_lock(fd: int) -> bool:
+        os.lseek(fd, 0, os.SEEK_SET)
+        try:
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+            return True
+        except OSError:
+            return False
+
+    def _unlock(fd: int):
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+else:
+    import fcntl
+
+    def _try_lock(fd: int) -> bool:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except OSError:
+            return False
+
+    def _unlock(fd: int):
+        fcntl.flock(fd, fcntl.LOCK_UN)
+
+
+def _platform_cache_directory() -> str:
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~/AppData/Local")
+    elif sys.platform == "darwin":
+        base = os.path.expanduser("~/Library/Caches")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(base, "ov")
+
+
+def get_shared_cache_directory(subdirectory: str = "") -> str:
+    """
+    Cache directory of the user, shared by every Kit app running the extension: the cache_directory setting, or
+    usd_search under ${omni_cache}.
+
+    Args:
+        subdirectory (str): Optional directory inside the cache.
+
+    Returns:
+        str: The directory, created if missing.
+    """
+    tokens = carb.tokens.get_tokens_interface()
+    directory = carb.settings.get_settings().get("/exts/omni.kit.window.usd_search/cache_directory") or ""
+    if directory:
+        directory = tokens.resolve(directory)
+    else:
+        base = tokens.resolve("${omni_cache}")
+        if not base or "${" in base:
+            base = _platform_cache_directory()
+        directory = os.path.join(base, "usd_search")
+    directory = os.path.join(directory, subdirectory) if subdirectory else directory
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+class FileLock:
+    """
+    Exclusive lock shared by every process opening the same lock file, and by the threads of this process.
+
+    Reentrant within a thread. The OS releases it if the holder crashes, so there are no stale locks to clean up.
+    """
+    def __init__(self, path: str, timeout: float = 30.0):
+        """
+        Args:
+            path (str): Lock file, created if missing. Never deleted, since removing it would race with lockers.
+            timeout (float): Seconds `with` waits for the lock before raising TimeoutError.
+        """
+        self._path = path
+        self._timeout = timeout
+        self._thread_lock = threading.RLock()
+        self._fd: Optional[int] = None
+        self._depth = 0
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """
+        Args:
+            timeout (float): Seconds to wait, the lock's timeout if None.
+
+        Returns:
+            bool: Whether the lock was acquired.
+        """
+        timeout = self._timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        if not self._thread_lock.acquire(timeout=timeout):
+            return False
+        if self._depth > 0:
+            self._depth += 1
+            return True
+        try:
+            fd = os.open(self._path, os.O_RDWR | os.O_CREAT, 0o666)
+        except OSError:
+            self._thread_lock.release()
+            raise
+        delay = 0.001
+        while not _try_lock(fd):
+            if time.monotonic() >= deadline:
+                os.close(fd)
+                self._thread_lock.release()
+                return False
+            time.sleep(delay)
+            delay = min(delay * 2, 0.05)
+        self._fd = fd
+        self._depth = 1
+        return True
+
+    def release(self):
+        self._depth -= 1
+        if self._depth == 0:
+            try:
+                _unlock(self._fd)
+            finally:
+                os.close(self._fd)
+                self._fd = None
+        self._thread_lock.release()
+
+    def __enter__(self):
+        if not self.acquire():
+            raise TimeoutError(f"Timed out waiting for {self._path}")
+        return self
+
+    def __exit__(self, *args):
+        self.release()
+
+
+def atomic_write(path: str, data: bytes):
+    """
+    Writes a file so other processes see either the previous content or all of `data`, never a partial file.
+
+    Args:
+        path (str): Destination file.
+        data (bytes): Its new content.
+    """
+    temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(temp_path, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        for attempt in range(5):
+            try:
+                os.replace(temp_path, path)
+                return
+            except PermissionError:
+                # On Windows the destination can't be replaced while another process has it open.
+                if attempt == 4:
+                    raise
+                time.sleep(0.05 * (attempt + 1))
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
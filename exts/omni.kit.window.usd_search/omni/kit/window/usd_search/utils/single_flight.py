@@ -0,0 +1,93 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: LicenseRef-NvidiaProprietary
+#
+# NVIDIA CORPORATION, its affiliates and licensors retain all intellectual
+# property and proprietary rights in and to this material, related
+# documentation and any modifications thereto. Any use, reproduction,
+# disclosure or distribution of this material and related documentation
+# without an express license agreement from NVIDIA CORPORATION or
+# its affiliates is strictly prohibited.
+
+__all__ = ["SingleFlight"]
+
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, Hashable
+
+logger = logging.getLogger(__name__)
+
+
+class _Flight:
+    def __init__(self, task: asyncio.Future):
+        self.task = task
+        self.refs = 0
+        self.release_handle = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key into one in-flight operation.
+
+    Every caller awaits the same result. The operation is reference counted: a caller being cancelled only
+    detaches that caller, the operation itself is cancelled once no caller is left. So that a cancel-and-restart
+    of the same search (ie: Search button and Enter both firing) rejoins the running request instead of starting
+    over, an unused operation is kept alive for a short grace period before it is cancelled.
+    """
+    def __init__(self, grace_period: float = 0.5):
+        """
+        Args:
+            grace_period (float): Seconds an operation without callers keeps running before it is cancelled.
+        """
+        self._grace_period = grace_period
+        self._flights: Dict[Hashable, _Flight] = {}
+
+    @property
+    def in_flight(self) -> int:
+        """
+        Returns:
+            int: Number of operations currently running.
+        """
+        return len(self._flights)
+
+    def _on_done(self, key: Hashable, flight: _Flight):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        if flight.release_handle:
+            flight.release_handle.cancel()
+
+    def _release(self, key: Hashable, flight: _Flight):
+        flight.release_handle = None
+        if flight.refs == 0 and not flight.task.done():
+            # Forget it right away so nobody joins an operation that is being cancelled.
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+            flight.task.cancel()
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable]):
+        """
+        Runs `fn()` unless an operation with the same key is already running, and returns its result.
+
+        Args:
+            key (Hashable): Identifies identical operations.
+            fn (Callable): Starts the operation, only called when none is running for `key`.
+        """
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(fn()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _, key=key, flight=flight: self._on_done(key, flight))
+        else:
+            logger.info(f"Joining in-flight request ({flight.refs} waiting)")
+
+        if flight.release_handle:
+            flight.release_handle.cancel()
+            flight.release_handle = None
+
+        flight.refs += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.refs -= 1
+            if flight.refs == 0 and not flight.task.done():
+                loop = asyncio.get_event_loop()
+                flight.release_handle = loop.call_later(self._grace_period, self._release, key, flight)
@@ -0,0 +1,114 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: LicenseRef-NvidiaProprietary
+#
+# NVIDIA CORPORATION, its affiliates and licensors retain all intellectual
+# property and proprietary rights in and to this material, related
+# documentation and any modifications thereto. Any use, reproduction,
+# disclosure or distribution of this material and related documentation
+# without an express license agreement from NVIDIA CORPORATION or
+# its affiliates is strictly prohibited.
+
+__all__ = ["TaskGroup"]
+
+import asyncio
+import logging
+from collections import Counter
+from typing import Awaitable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class TaskGroup:
+    """
+    Owns background coroutines: every task is named and tracked until it finishes, and all of them are cancelled
+    together when the owner goes away.
+
+    Unlike a bare `asyncio.ensure_future`, an exception raised by a task nobody awaits is logged instead of being
+    silently dropped, and counters tell how many tasks of each name are alive, to spot leaks.
+    """
+    def __init__(self, name: str):
+        """
+        Args:
+            name (str): Prefix of the task names, ie: the owner.
+        """
+        self.name = name
+        self._tasks: Dict[asyncio.Future, str] = {}
+        self._closed = False
+        self.created = 0
+        self.completed = 0
+        self.cancelled = 0
+        self.failed = 0
+
+    def destroy(self):
+        """Cancels every live task, later `create_task` calls are refused."""
+        self.cancel()
+        self._closed = True
+        logger.info(f"{self.name} tasks: {self.stats}")
+
+    def create_task(self, coro: Awaitable, name: str) -> Optional[asyncio.Future]:
+        """
+        Schedules `coro` as a tracked task.
+
+        Args:
+            coro (Awaitable): The coroutine to run.
+            name (str): What the task does, used to count and cancel tasks.
+
+        Returns:
+            asyncio.Future: The task, None if the group is destroyed.
+        """
+        if self._closed:
+            coro.close()
+            logger.warning(f"{self.name} is destroyed, not starting {name}")
+            return None
+        task = asyncio.ensure_future(coro)
+        if hasattr(task, "set_name"):
+            task.set_name(f"{self.name}.{name}")
+        self._tasks[task] = name
+        self.created += 1
+        task.add_done_callback(self._on_done)
+        return task
+
+    def _on_done(self, task: asyncio.Future):
+        name = self._tasks.pop(task, None)
+        if task.cancelled():
+            self.cancelled += 1
+            return
+        error = task.exception()
+        if error is not None:
+            self.failed += 1
+            logger.error(f"{self.name}.{name} failed: {error!r}")
+        else:
+            self.completed += 1
+
+    def cancel(self, name: Optional[str] = None):
+        """
+        Args:
+            name (str): Only cancel tasks with this name, all tasks if None.
+        """
+        for task, task_name in list(self._tasks.items()):
+            if (name is None or task_name == name) and not task.done():
+                task.cancel()
+
+    def live(self, name: Optional[str] = None) -> int:
+        """
+        Returns:
+            int: Number of unfinished tasks, of the given name if any.
+        """
+        if name is None:
+            return len(self._tasks)
+        return sum(1 for task_name in self._tasks.values() if task_name == name)
+
+    @property
+    def stats(self) -> dict:
+        """
+        Returns:
+            dict: live, created, completed, cancelled and failed task counts, plus live tasks by name.
+        """
+        return {
+            "live": len(self._tasks),
+            "created": self.created,
+            "completed": self.completed,
+            "cancelled": self.cancelled,
+            "failed": self.failed,
+            "live_by_name": dict(Counter(self._tasks.values())),
+        }
@@ -0,0 +1,102 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: LicenseRef-NvidiaProprietary
+#
+# NVIDIA CORPORATION, its affiliates and licensors retain all intellectual
+# property and proprietary rights in and to this material, related
+# documentation and any modifications thereto. Any use, reproduction,
+# disclosure or distribution of this material and related documentation
+# without an express license agreement from NVIDIA CORPORATION or
+# its affiliates is strictly prohibited.
+
+__all__ = ["ThroughputEstimator"]
+
+import logging
+from typing import Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class ThroughputEstimator:
+    """
+    Rolling estimate of how fast an endpoint answers: EWMA of the latency until the response headers arrive
+    (network round-trip plus server search time), of the bandwidth while the body downloads, and of the size of a
+    result with and without its inline image.
+
+    The initial guesses describe a fast link, so the first search is never degraded before anything is measured.
+    """
+    # Bodies smaller than this download too quickly to measure bandwidth.
+    MIN_BANDWIDTH_SAMPLE_BYTES = 16 * 1024
+
+    def __init__(
+        self, alpha: float = 0.3, latency: float = 0.5, bandwidth: float = 5e6, bytes_per_image_result: float = 20e3,
+        bytes_per_result: float = 500.0,
+    ):
+        """
+        Args:
+            alpha (float): EWMA smoothing factor, higher values react faster.
+            latency (float): Initial seconds until the response starts.
+            bandwidth (float): Initial bytes per second.
+            bytes_per_image_result (float): Initial size of a result with its inline image.
+            bytes_per_result (float): Initial size of a result without image.
+        """
+        self._alpha = alpha
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.bytes_per_image_result = bytes_per_image_result
+        self.bytes_per_result = bytes_per_result
+        self.samples = 0
+        # Responses large enough to measure bandwidth, until then `bandwidth` is the initial guess.
+        self.bandwidth_samples = 0
+
+    def _average(self, current: float, value: float) -> float:
+        return current + self._alpha * (value - current)
+
+    def record(self, latency: float, nbytes: int, transfer: float, results: int, inline_images: bool):
+        """
+        Args:
+            latency (float): Seconds until the response headers arrived.
+            nbytes (int): Size of the response body.
+            transfer (float): Seconds downloading the body.
+            results (int): Number of results in the body.
+            inline_images (bool): Whether the results had their images inline.
+        """
+        self.samples += 1
+        self.latency = self._average(self.latency, latency)
+        if nbytes >= self.MIN_BANDWIDTH_SAMPLE_BYTES and transfer > 0:
+            self.bandwidth = self._average(self.bandwidth, nbytes / transfer)
+            self.bandwidth_samples += 1
+        if results > 0:
+            if inline_images:
+                self.bytes_per_image_result = self._average(self.bytes_per_image_result, nbytes / results)
+            else:
+                self.bytes_per_result = self._average(self.bytes_per_result, nbytes / results)
+
+    def plan(
+        self, target: float, max_limit: int, min_limit: int = 1, inline_images: Optional[bool] = None
+    ) -> Tuple[int, bool]:
+        """
+        Picks the page size, and whether to inline images, so results arrive within `target` seconds.
+
+        Images are only left out when even `min_limit` results with images would not make it in time; tiles then
+        show thumbnails fetched separately. Thumbnail resolution is not part of the plan: the search API returns
+        inline images at the size they were indexed at and takes no size parameter, and the thumbnails fetched
+        instead come in the single size Nucleus generates. Leaving images out is the only lever on image bytes.
+
+        Args:
+            target (float): Time-to-first-results goal in seconds.
+            max_limit (int): Largest page size to ask for.
+            min_limit (int): Smallest page size to ask for.
+            inline_images (bool): Force images on or off, None to decide.
+
+        Returns:
+            Tuple[int, bool]: Page size and whether to inline images.
+        """
+        budget = max(0.0, target - self.latency) * self.bandwidth
+
+        def fit(bytes_per_result: float) -> int:
+            return max(min_limit, min(max_limit, int(budget // max(bytes_per_result, 1.0))))
+
+        if inline_images is not False:
+            if budget >= min_limit * self.bytes_per_image_result or inline_images:
+                return fit(self.bytes_per_image_result), True
+        return fit(self.bytes_per_result), False
@@ -0,0 +1,233 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: LicenseRef-NvidiaProprietary
+#
+# NVIDIA CORPORATION, its affiliates and licensors retain all intellectual
+# property and proprietary rights in and to this material, related
+# documentation and any modifications thereto. Any use, reproduction,
+# disclosure or distribution of this material and related documentation
+# without an express license agreement from NVIDIA CORPORATION or
+# its affiliates is strictly prohibited.
+
+__all__ = ["ThumbnailAtlas"]
+
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import omni.kit.app
+import omni.ui as ui
+from PIL import Image
+
+from .image_handler import ImageHandler
+from .task_group import TaskGroup
+
+logger = logging.getLogger(__name__)
+
+Resampling = getattr(Image, "Resampling", Image)
+
+
+class _Page:
+    """One atlas texture: a byte image provider and the pixels uploaded to it."""
+    def __init__(self, size: int):
+        self.provider = ui.ByteImageProvider()
+        self.pixels = np.zeros((size, size, 4), dtype=np.uint8)
+        self.dirty = True
+
+
+class ThumbnailAtlas:
+    """
+    Packs the thumbnails of result tiles into a few large textures instead of one texture per tile.
+
+    Each page is a grid of square cells uploaded through one ui.ByteImageProvider, and a tile shows its cell by
+    clipping the page image to a sub-rectangle. Thumbnails are decoded, scaled and copied into their cell on a
+    worker thread; pages changed during a frame are uploaded once on the next one. A provider can only replace
+    its whole texture, so pages are kept small enough for that upload to be cheap, and sent straight from their
+    NumPy buffer.
+
+    Cells belong to a tile key (the asset URL) and survive grid rebuilds until `retain` drops the key, so
+    re-filtering or regrouping results re-uses the pixels already uploaded. When every cell of every page is
+    taken, `build_image` returns None and the tile falls back to its own texture.
+    """
+    def __init__(
+        self, image_handler: ImageHandler, cell_pixels: int, page_pixels: int = 1024, max_pages: int = 16,
+        task_group: Optional[TaskGroup] = None,
+    ):
+        """
+        Args:
+            image_handler (ImageHandler): Decodes thumbnails from the thumbnail pack.
+            cell_pixels (int): Size in pixels of a cell, the thumbnail size inside a tile.
+            page_pixels (int): Size in pixels of an atlas page, rounded down to a whole number of cells.
+            max_pages (int): Atlas textures created at most.
+            task_group (TaskGroup): Owner of the decode and upload tasks.
+        """
+        self._image_handler = image_handler
+        self._cell_pixels = cell_pixels
+        self._cells_per_row = max(1, page_pixels // cell_pixels)
+        self._page_pixels = self._cells_per_row * cell_pixels
+        self._max_pages = max_pages
+        self._task_group = task_group or TaskGroup("thumbnail_atlas")
+        self._pages: List[_Page] = []
+        # tile key -> (page, cell)
+        self._slots: Dict[str, Tuple[int, int]] = OrderedDict()
+        self._free: List[Tuple[int, int]] = []
+        # tile key -> thumbnail currently in (or being copied into) its cell
+        self._contents: Dict[str, str] = {}
+        # Worker threads copy into pages while the main thread uploads them.
+        self._lock = threading.Lock()
+        self._upload_future: Optional[asyncio.Future] = None
+        self.uploads = 0
+
+    @staticmethod
+    def is_supported() -> bool:
+        """
+        Returns:
+            bool: True if byte image providers take NumPy arrays, without which uploading pages is too slow.
+        """
+        return hasattr(ui.ByteImageProvider, "set_data_array")
+
+    def destroy(self):
+        self._task_group.cancel("atlas_decode")
+        self._task_group.cancel("atlas_upload")
+        self._slots.clear()
+        self._contents.clear()
+        self._free = []
+        self._pages = []
+
+    @property
+    def page_count(self) -> int:
+        """
+        Returns:
+            int: Number of atlas textures.
+        """
+        return len(self._pages)
+
+    @property
+    def capacity(self) -> int:
+        """
+        Returns:
+            int: Number of thumbnails all pages can hold.
+        """
+        return self._max_pages * self._cells_per_row * self._cells_per_row
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def retain(self, keys: Iterable[str]):
+        """
+        Frees the cells of every tile key not in `keys`, ie: results no longer shown after a new search.
+        """
+        keep = set(keys)
+        for key in [key for key in self._slots if key not in keep]:
+            self._free.append(self._slots.pop(key))
+            self._contents.pop(key, None)
+
+    def _allocate(self, key: str) -> Optional[Tuple[int, int]]:
+        slot = self._slots.get(key)
+        if slot is not None:
+            return slot
+        if not self._free:
+            if len(self._pages) >= self._max_pages:
+                return None
+            self._pages.append(_Page(self._page_pixels))
+            page = len(self._pages) - 1
+            # Cells in reading order, popped from the end.
+            self._free = [(page, cell) for cell in reversed(range(self._cells_per_row * self._cells_per_row))]
+        slot = self._free.pop()
+        self._slots[key] = slot
+        page, cell = slot
+        row, column = divmod(cell, self._cells_per_row)
+        y, x = row * self._cell_pixels, column * self._cell_pixels
+        with self._lock:
+            # A reused cell would show the previous asset until the new thumbnail is copied in.
+            pixels = self._pages[page].pixels[y:y + self._cell_pixels, x:x + self._cell_pixels]
+            if pixels.any():
+                pixels[:] = 0
+                self._pages[page].dirty = True
+                self._schedule_upload()
+        return slot
+
+    def build_image(self, key: str, width: float, height: float) -> Optional[ui.Widget]:
+        """
+        Builds the widget showing the cell of a tile, in the current omni.ui container.
+
+        Args:
+            key (str): Tile key, the asset URL.
+            width (float): Tile thumbnail width in points.
+            height (float): Tile thumbnail height in points.
+
+        Returns:
+            ui.Widget: The widget, None if the atlas is full.
+        """
+        slot = self._allocate(key)
+        if slot is None:
+            return None
+        page, cell = slot
+        row, column = divmod(cell, self._cells_per_row)
+        frame = ui.Frame(width=width, height=height, horizontal_clipping=True, vertical_clipping=True)
+        with frame:
+            with ui.Placer(offset_x=-column * width, offset_y=-row * height):
+                ui.ImageWithProvider(
+                    self._pages[page].provider,
+                    width=self._cells_per_row * width,
+                    height=self._cells_per_row * height,
+                    fill_policy=ui.IwpFillPolicy.IWP_STRETCH,
+                )
+        return frame
+
+    def set_image(self, key: str, image: str):
+        """
+        Copies a thumbnail into the cell of a tile in the background, the tile shows it after the next upload.
+
+        Args:
+            key (str): Tile key, the asset URL.
+            image (str): Thumbnail pack reference, see ImageHandler.generate_image_from_string.
+        """
+        slot = self._slots.get(key)
+        if slot is None or self._contents.get(key) == image:
+            return
+        self._contents[key] = image
+        self._task_group.create_task(self._copy_async(key, slot, image), "atlas_decode")
+
+    async def _copy_async(self, key: str, slot: Tuple[int, int], image: str):
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(None, self._copy, key, slot, image)
+        self._schedule_upload()
+
+    def _copy(self, key: str, slot: Tuple[int, int], image: str):
+        thumbnail = self._image_handler.load_thumbnail(image)
+        # Fit the cell like IWP_PRESERVE_ASPECT_FIT, centered on a transparent background.
+        cell = Image.new("RGBA", (self._cell_pixels, self._cell_pixels))
+        if thumbnail is not None:
+            scale = self._cell_pixels / max(thumbnail.size)
+            size = (max(1, round(thumbnail.width * scale)), max(1, round(thumbnail.height * scale)))
+            if size != thumbnail.size:
+                thumbnail = thumbnail.resize(size, Resampling.BILINEAR)
+            cell.paste(thumbnail, ((self._cell_pixels - size[0]) // 2, (self._cell_pixels - size[1]) // 2))
+
+        page, index = slot
+        row, column = divmod(index, self._cells_per_row)
+        y, x = row * self._cell_pixels, column * self._cell_pixels
+        with self._lock:
+            # The cell changed hands, or was given a newer thumbnail, while decoding.
+            if self._slots.get(key) != slot or self._contents.get(key) != image or page >= len(self._pages):
+                return
+            self._pages[page].pixels[y:y + self._cell_pixels, x:x + self._cell_pixels] = np.asarray(cell)
+            self._pages[page].dirty = True
+
+    def _schedule_upload(self):
+        if self._upload_future is None or self._upload_future.done():
+            self._upload_future = self._task_group.create_task(self._upload_async(), "atlas_upload")
+
+    async def _upload_async(self):
+        # Everything copied until the next frame goes up in one upload per page.
+        await omni.kit.app.get_app().next_update_async()
+        with self._lock:
+            for page in self._pages:
+                if not page.dirty:
+                    continue
+                page.provider.set_data_array(page.pixels, [self._page_pixels, self._page_pixels])
+                page.dirty = False
+                self.uploads += 1
@@ -0,0 +1,414 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: LicenseRef-NvidiaProprietary
+#
+# NVIDIA CORPORATION, its affiliates and licensors retain all intellectual
+# property and proprietary rights in and to this material, related
+# documentation and any modifications thereto. Any use, reproduction,
+# disclosure or distribution of this material and related documentation
+# without an express license agreement from NVIDIA CORPORATION or
+# its affiliates is strictly prohibited.
+
+__all__ = ["ThumbnailPack"]
+
+import glob
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+import uuid
+import zlib
+from collections import OrderedDict
+from typing import Optional
+
+from .shared_cache import FileLock, atomic_write
+
+logger = logging.getLogger(__name__)
+
+# Pack file: header, then records of (record header, payload).
+_PACK_MAGIC = b"USTPACK1"
+_PACK_HEADER = struct.Struct("<8s16s")  # magic, generation
+_RECORD_MAGIC = b"TREC"
+_RECORD_HEADER = struct.Struct("<4sI20sI")  # magic, crc32 of payload, key digest, payload length
+
+# Index file: header, then (key digest, offset, length) entries for the pack up to `indexed_size`.
+_INDEX_MAGIC = b"USTPIDX1"
+_INDEX_HEADER = struct.Struct("<8s16sQI")  # magic, generation, indexed_size, entry count
+_INDEX_ENTRY = struct.Struct("<20sQI")
+
+
+class ThumbnailPack:
+    """
+    Append-only pack of encoded thumbnails, read through mmap.
+
+    Thumbnails are appended to a single pack file instead of one file each, with an index of key digest to
+    (offset, length). The index is saved atomically now and then; records appended after the last save are
+    recovered on open by scanning the tail of the pack, and a record torn by a crash mid-write fails its CRC and
+    is truncated away. Entries are evicted least recently used first once the pack exceeds `max_bytes`, and the
+    pack is compacted into a new generation file in the background once most of it is dead. Keeping generations
+    in separate files means readers of the old mmap are never invalidated, which also works on Windows where a
+    mapped file cannot be replaced.
+
+    Several processes can share the directory: appends, index saves and compaction swaps hold a lock file, and
+    each process picks up the records others appended, or the generation they compacted to, before writing and
+    when a key is missing.
+    """
+    INDEX_NAME = "index.bin"
+    LOCK_NAME = "pack.lock"
+    # Compaction output younger than this may still be written by another process.
+    COMPACT_TEMP_MAX_AGE = 3600.0
+    # Puts between index saves.
+    SAVE_INTERVAL = 64
+    # Dead bytes below this never trigger a compaction.
+    MIN_COMPACT_BYTES = 4 * 1024 * 1024
+
+    def __init__(self, directory: str, max_bytes: int = 128 * 1024 * 1024):
+        """
+        Args:
+            directory (str): Folder holding the pack and index files, created if missing.
+            max_bytes (int): Bound on live thumbnail bytes.
+        """
+        self._directory = directory
+        self._max_bytes = max_bytes
+        self._lock = threading.RLock()
+        # digest -> (offset, length), in least recently used order
+        self._entries = OrderedDict()
+        self._live_bytes = 0
+        self._dead_bytes = 0
+        self._unsaved = 0
+        self._generation = None
+        self._writer = None
+        self._size = 0
+        self._mmap = None
+        self._compact_thread = None
+        # Identity of the index file last loaded or saved, a different one means another process saved it.
+        self._index_stat = None
+        os.makedirs(directory, exist_ok=True)
+        self._file_lock = FileLock(os.path.join(directory, self.LOCK_NAME))
+        try:
+            with self._file_lock, self._lock:
+                self._open()
+        except (OSError, TimeoutError) as e:
+            logger.error(f"Failed to open thumbnail pack in {directory}: {e}")
+            self._writer = None
+
+    @staticmethod
+    def _digest(key: str) -> bytes:
+        return hashlib.sha1(key.encode("utf-8")).digest()
+
+    def _pack_path(self, generation: str) -> str:
+        return os.path.join(self._directory, f"pack-{generation}.dat")
+
+    def _index_path(self) -> str:
+        return os.path.join(self._directory, self.INDEX_NAME)
+
+    def _open(self):
+        """Opens the pack named by the index, call with the file lock held."""
+        self._entries.clear()
+        self._generation = None
+        indexed_size = self._load_index()
+        if self._generation is None or not os.path.exists(self._pack_path(self._generation)):
+            # No usable index, recover from the most recent pack.
+            self._entries.clear()
+            packs = sorted(glob.glob(os.path.join(self._directory, "pack-*.dat")), key=os.path.getmtime)
+            self._generation = os.path.basename(packs[-1])[5:-4] if packs else None
+            indexed_size = 0
+
+        if self._generation is None:
+            self._generation = uuid.uuid4().hex
+            with open(self._pack_path(self._generation), "wb") as f:
+                f.write(_PACK_HEADER.pack(_PACK_MAGIC, bytes.fromhex(self._generation)))
+
+        path = self._pack_path(self._generation)
+        self._writer = open(path, "r+b")
+        self._mmap = None
+        self._live_bytes = sum(length for _, length in self._entries.values())
+        self._dead_bytes = 0
+        self._recover(max(indexed_size, _PACK_HEADER.size))
+        self._remove_stale_packs()
+        self._evict()
+
+    def _load_index(self) -> int:
+        """Loads the saved index, returns the pack size it covers."""
+        try:
+            self._index_stat = self._stat_index()
+            with open(self._index_path(), "rb") as f:
+                data = f.read()
+            magic, generation, indexed_size, count = _INDEX_HEADER.unpack_from(data, 0)
+            if magic != _INDEX_MAGIC or len(data) != _INDEX_HEADER.size + count * _INDEX_ENTRY.size:
+                raise ValueError("corrupt index")
+        except (OSError, ValueError, struct.error) as e:
+            if not isinstance(e, FileNotFoundError):
+                logger.warning(f"Ignoring thumbnail pack index: {e}")
+            return 0
+        self._generation = generation.hex()
+        for digest, offset, length in _INDEX_ENTRY.iter_unpack(data[_INDEX_HEADER.size:]):
+            self._entries[digest] = (offset, length)
+        return indexed_size
+
+    def _stat_index(self) -> Optional[tuple]:
+        try:
+            stat = os.stat(self._index_path())
+        except OSError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _recover(self, start: int):
+        """
+        Indexes records appended after `start`, by this process before a crash or by other processes, truncating
+        a torn record at the end. Call with the file lock held, so no other process is writing.
+        """
+        self._writer.seek(0, os.SEEK_END)
+        file_size = self._writer.tell()
+        offset = start
+        recovered = 0
+        while offset + _RECORD_HEADER.size <= file_size:
+            self._writer.seek(offset)
+            magic, crc, digest, length = _RECORD_HEADER.unpack(self._writer.read(_RECORD_HEADER.size))
+            payload_offset = offset + _RECORD_HEADER.size
+            if magic != _RECORD_MAGIC or payload_offset + length > file_size:
+                break
+            if zlib.crc32(self._writer.read(length)) != crc:
+                break
+            previous = self._entries.pop(digest, None)
+            if previous is not None:
+                self._live_bytes -= previous[1]
+                self._dead_bytes += previous[1]
+            self._entries[digest] = (payload_offset, length)
+            self._live_bytes += length
+            offset = payload_offset + length
+            recovered += 1
+        if offset < file_size:
+            logger.warning(f"Truncating {file_size - offset} bytes of incomplete thumbnail records")
+            self._writer.truncate(offset)
+        if recovered:
+            logger.info(f"Recovered {recovered} thumbnails not in the saved index")
+            self._unsaved += recovered
+        self._size = offset
+
+    def _remove_stale_packs(self):
+        active = self._pack_path(self._generation)
+        for path in glob.glob(os.path.join(self._directory, "pack-*.dat*")):
+            if os.path.normcase(path) == os.path.normcase(active):
+                continue
+            try:
+                if path.endswith(".tmp") and time.time() - os.path.getmtime(path) < self.COMPACT_TEMP_MAX_AGE:
+                    # Another process may be compacting into it.
+                    continue
+                os.remove(path)
+            except OSError:
+                # Still mapped by a reader, removed on a later open.
+                pass
+
+    def _sync(self):
+        """
+        Picks up records other processes appended and the generation they compacted to. Call with the file lock
+        held.
+        """
+        if self._writer is None:
+            return
+        index_stat = self._stat_index()
+        if index_stat != self._index_stat:
+            self._index_stat = index_stat
+            try:
+                with open(self._index_path(), "rb") as f:
+                    magic, generation, _, _ = _INDEX_HEADER.unpack(f.read(_INDEX_HEADER.size))
+            except (OSError, struct.error):
+                magic = None
+            if magic == _INDEX_MAGIC and generation.hex() != self._generation:
+                # Another process compacted the pack, switch to its generation.
+                logger.info("Thumbnail pack compacted by another process, reopening it")
+                self._writer.close()
+                self._writer = None
+                self._open()
+                return
+        self._writer.flush()
+        if os.fstat(self._writer.fileno()).st_size != self._size:
+            self._recover(self._size)
+            self._evict()
+
+    def close(self):
+        if self._compact_thread is not None and self._compact_thread is not threading.current_thread():
+            self._compact_thread.join()
+        with self._file_lock, self._lock:
+            if self._writer is None:
+                return
+            self.save_index()
+            self._writer.close()
+            self._writer = None
+            # mmap is left to the garbage collector, memoryviews handed out may still reference it.
+            self._mmap = None
+
+    def __contains__(self, key: str) -> bool:
+        digest = self._digest(key)
+        with self._lock:
+            if digest in self._entries:
+                return True
+        # Maybe another process added it.
+        with self._file_lock, self._lock:
+            self._sync()
+            return digest in self._entries
+
+    @property
+    def live_bytes(self) -> int:
+        return self._live_bytes
+
+    def get(self, key: str) -> Optional[memoryview]:
+        """
+        Args:
+            key (str): Thumbnail key.
+
+        Returns:
+            memoryview: Zero-copy view of the encoded thumbnail, None if not in the pack.
+        """
+        digest = self._digest(key)
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None or self._writer is None:
+                return None
+            self._entries.move_to_end(digest)
+            offset, length = entry
+            if self._mmap is None or len(self._mmap) < offset + length:
+                # The pack grew since it was mapped, map it again. The old map stays valid for its readers.
+                self._writer.flush()
+                self._mmap = mmap.mmap(self._writer.fileno(), 0, access=mmap.ACCESS_READ)
+            return memoryview(self._mmap)[offset:offset + length]
+
+    def put(self, key: str, data: bytes):
+        """
+        Appends an encoded thumbnail, replacing any previous one with the same key.
+
+        Args:
+            key (str): Thumbnail key.
+            data (bytes): Encoded thumbnail.
+        """
+        digest = self._digest(key)
+        with self._file_lock, self._lock:
+            if self._writer is None:
+                return
+            # Append after the records of other processes, not over them.
+            self._sync()
+            self._writer.seek(self._size)
+            self._writer.write(_RECORD_HEADER.pack(_RECORD_MAGIC, zlib.crc32(data), digest, len(data)))
+            self._writer.write(data)
+            # Other processes read the record as soon as the lock is released.
+            self._writer.flush()
+            offset = self._size + _RECORD_HEADER.size
+            self._size = offset + len(data)
+
+            previous = self._entries.pop(digest, None)
+            if previous is not None:
+                self._live_bytes -= previous[1]
+                self._dead_bytes += previous[1]
+            self._entries[digest] = (offset, len(data))
+            self._live_bytes += len(data)
+            self._evict()
+
+            self._unsaved += 1
+            if self._unsaved >= self.SAVE_INTERVAL:
+                self.save_index()
+        self._maybe_compact()
+
+    def _evict(self):
+        while self._live_bytes > self._max_bytes and len(self._entries) > 1:
+            _, (_, length) = self._entries.popitem(last=False)
+            self._live_bytes -= length
+            self._dead_bytes += length
+
+    def save_index(self):
+        """Atomically saves the index covering everything appended so far, by every process."""
+        with self._file_lock, self._lock:
+            if self._writer is None:
+                return
+            self._sync()
+            if self._writer is None:
+                return
+            self._writer.flush()
+            os.fsync(self._writer.fileno())
+            header = _INDEX_HEADER.pack(_INDEX_MAGIC, bytes.fromhex(self._generation), self._size, len(self._entries))
+            entries = b"".join(
+                _INDEX_ENTRY.pack(digest, offset, length) for digest, (offset, length) in self._entries.items()
+            )
+            atomic_write(self._index_path(), header + entries)
+            self._index_stat = self._stat_index()
+            self._unsaved = 0
+
+    def _maybe_compact(self):
+        if self._dead_bytes < max(self.MIN_COMPACT_BYTES, self._live_bytes):
+            return
+        if self._compact_thread is not None and self._compact_thread.is_alive():
+            return
+        # Puts come from the main loop and decode workers alike, so compaction gets its own thread.
+        self._compact_thread = threading.Thread(target=self.compact, name="ThumbnailPack.compact", daemon=True)
+        self._compact_thread.start()
+
+    def compact(self):
+        """Rewrites live thumbnails into a new pack generation, dropping dead bytes."""
+        with self._file_lock, self._lock:
+            if self._writer is None:
+                return
+            self._sync()
+            self._writer.flush()
+            entries = list(self._entries.items())
+            source = mmap.mmap(self._writer.fileno(), 0, access=mmap.ACCESS_READ) if self._size else None
+            source_generation = self._generation
+            generation = uuid.uuid4().hex
+
+        # Copy without holding the locks, the old pack is append-only so the snapshot stays valid. The new pack
+        # gets its final name once it is complete, so other processes opening the directory leave it alone.
+        path = self._pack_path(generation)
+        temp_path = path + ".tmp"
+        new_entries = {}
+        with open(temp_path, "wb") as f:
+            f.write(_PACK_HEADER.pack(_PACK_MAGIC, bytes.fromhex(generation)))
+            offset = _PACK_HEADER.size
+            for digest, (old_offset, length) in entries:
+                data = source[old_offset:old_offset + length]
+                f.write(_RECORD_HEADER.pack(_RECORD_MAGIC, zlib.crc32(data), digest, length))
+                f.write(data)
+                new_entries[digest] = (offset + _RECORD_HEADER.size, length)
+                offset += _RECORD_HEADER.size + length
+            f.flush()
+            os.fsync(f.fileno())
+
+        with self._file_lock, self._lock:
+            self._sync()
+            if self._writer is None or self._generation != source_generation:
+                # Closed meanwhile, or another process compacted first and its pack won.
+                os.remove(temp_path)
+                return
+            os.replace(temp_path, path)
+            old_writer = self._writer
+            self._writer = open(path, "r+b")
+            self._size = offset
+            # Entries still live keep their new location, thumbnails put during the copy are appended again.
+            snapshot = dict(entries)
+            remapped = OrderedDict()
+            for digest, location in self._entries.items():
+                if snapshot.get(digest) == location:
+                    remapped[digest] = new_entries[digest]
+                    continue
+                old_offset, length = location
+                old_writer.seek(old_offset)
+                data = old_writer.read(length)
+                self._writer.seek(self._size)
+                self._writer.write(_RECORD_HEADER.pack(_RECORD_MAGIC, zlib.crc32(data), digest, length))
+                self._writer.write(data)
+                remapped[digest] = (self._size + _RECORD_HEADER.size, length)
+                self._size += _RECORD_HEADER.size + length
+            old_generation = self._generation
+            self._entries = remapped
+            self._generation = generation
+            self._dead_bytes = 0
+            self._mmap = None
+            # The new pack only becomes active once the index naming it is in place.
+            self.save_index()
+            old_writer.close()
+        source = None
+        try:
+            os.remove(self._pack_path(old_generation))
+        except OSError:
+            pass
+        logger.info(f"Compacted thumbnail pack to {self._live_bytes} bytes in {len(new_entries)} entries")
@@ -0,0 +1,246 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: LicenseRef-NvidiaProprietary
+#
+# NVIDIA CORPORATION, its affiliates and licensors retain all intellectual
+# property and proprietary rights in and to this material, related
+# documentation and any modifications thereto. Any use, reproduction,
+# disclosure or distribution of this material and related documentation
+# without an express license agreement from NVIDIA CORPORATION or
+# its affiliates is strictly prohibited.
+
+__all__ = [
+    "AiohttpTransport",
+    "FakeTransport",
+    "Http2Transport",
+    "Transport",
+    "TransportError",
+    "TransportResponse",
+    "create_transport",
+]
+
+import asyncio
+import json
+import logging
+import time
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+
+class TransportError(Exception):
+    """An HTTP error status returned by the server."""
+    def __init__(self, status: int, url: str, reason: str = ""):
+        super().__init__(f"{status} {reason}, url='{url}'")
+        self.status = status
+        self.url = url
+
+
+class TransportResponse:
+    """
+    A fully read HTTP response, with the timings needed to estimate throughput.
+    """
+    def __init__(self, url: str, status: int, headers: Dict[str, str], body: bytes, latency: float, transfer: float):
+        """
+        Args:
+            url (str): Requested URL.
+            status (int): HTTP status code.
+            headers (Dict[str, str]): Response headers, names lower case.
+            body (bytes): Response body.
+            latency (float): Seconds until the response headers arrived.
+            transfer (float): Seconds downloading the body.
+        """
+        self.url = url
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.latency = latency
+        self.transfer = transfer
+
+    def raise_for_status(self):
+        if self.status >= 400:
+            raise TransportError(self.status, self.url)
+
+    def json(self):
+        return json.loads(self.body)
+
+
+class Transport:
+    """
+    Sends HTTP requests for NgcConnect. Timeouts raise asyncio.TimeoutError whatever the backend.
+    """
+    name = ""
+
+    async def request(
+        self, method: str, url: str, headers: Optional[dict] = None, data: Union[str, bytes, None] = None,
+        timeout: Optional[float] = None,
+    ) -> TransportResponse:
+        """
+        Args:
+            method (str): HTTP method.
+            url (str): Request URL.
+            headers (dict): Request headers.
+            data (Union[str, bytes]): Request body.
+            timeout (float): Optional total timeout in seconds, the backend default if None.
+
+        Returns:
+            TransportResponse: The response, whatever its status.
+        """
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+
+class AiohttpTransport(Transport):
+    """
+    HTTP/1.1 over a pooled aiohttp session, a few connections per host.
+    """
+    name = "aiohttp"
+
+    def __init__(self, connections_per_host: int = 4):
+        self._connections_per_host = connections_per_host
+        self._session = None
+
+    def _get_session(self):
+        import aiohttp
+
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit_per_host=self._connections_per_host)
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    async def request(self, method, url, headers=None, data=None, timeout=None):
+        import aiohttp
+
+        kwargs = {"timeout": aiohttp.ClientTimeout(total=timeout)} if timeout else {}
+        start = time.monotonic()
+        async with self._get_session().request(method, url, headers=headers, data=data, **kwargs) as response:
+            headers_received = time.monotonic()
+            body = await response.read()
+            return TransportResponse(
+                url, response.status, {k.lower(): v for k, v in response.headers.items()}, body,
+                latency=headers_received - start, transfer=time.monotonic() - headers_received,
+            )
+
+    async def close(self):
+        if self._session and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+
+class Http2Transport(Transport):
+    """
+    HTTP/2 through httpx: many small requests (ie: per tile) are multiplexed over one connection per host instead
+    of queuing behind a small connection pool. Servers without HTTP/2 are spoken to in HTTP/1.1.
+
+    Requires the optional `httpx[http2]` package.
+    """
+    name = "http2"
+
+    def __init__(self):
+        # Fails early when httpx or its h2 dependency is not installed.
+        self._client = None
+        self._get_client()
+
+    def _get_client(self):
+        import httpx
+
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(http2=True, timeout=None)
+        return self._client
+
+    async def request(self, method, url, headers=None, data=None, timeout=None):
+        import httpx
+
+        start = time.monotonic()
+        try:
+            request = self._get_client().build_request(method, url, headers=headers, content=data, timeout=timeout)
+            response = await self._get_client().send(request, stream=True)
+            try:
+                headers_received = time.monotonic()
+                body = await response.aread()
+            finally:
+                await response.aclose()
+        except httpx.TimeoutException as e:
+            raise asyncio.TimeoutError() from e
+        return TransportResponse(
+            url, response.status_code, {k.lower(): v for k, v in response.headers.items()}, body,
+            latency=headers_received - start, transfer=time.monotonic() - headers_received,
+        )
+
+    async def close(self):
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+
+
+FakeHandler = Callable[[str, str, dict, Union[str, bytes, None]], Tuple]
+
+
+class FakeTransport(Transport):
+    """
+    In-process transport for tests and benchmarks: requests are answered by a handler, after an optional
+    simulated latency, without touching the network. Every request is recorded.
+    """
+    name = "fake"
+
+    def __init__(self, handler: FakeHandler, latency: float = 0.0, bandwidth: Optional[float] = None):
+        """
+        Args:
+            handler (FakeHandler): Called with method, url, headers and data, returns a status, a body and
+                optionally a dict of extra response headers. A body that is not bytes or str is sent as JSON.
+            latency (float): Simulated seconds until the response headers arrive.
+            bandwidth (float): Simulated bytes per second for the body, unlimited if None.
+        """
+        self._handler = handler
+        self._latency = latency
+        self._bandwidth = bandwidth
+        self.requests: List[Tuple[str, str, dict, Union[str, bytes, None]]] = []
+
+    async def request(self, method, url, headers=None, data=None, timeout=None):
+        self.requests.append((method, url, dict(headers or {}), data))
+
+        async def respond():
+            start = time.monotonic()
+            if self._latency:
+                await asyncio.sleep(self._latency)
+            status, body, *extra_headers = self._handler(method, url, headers or {}, data)
+            content_type = "application/octet-stream"
+            if isinstance(body, str):
+                body = body.encode("utf-8")
+            elif not isinstance(body, bytes):
+                body = json.dumps(body).encode("utf-8")
+                content_type = "application/json"
+            headers_received = time.monotonic()
+            if self._bandwidth:
+                await asyncio.sleep(len(body) / self._bandwidth)
+            response_headers = {"content-type": content_type, "content-length": str(len(body))}
+            for extra in extra_headers:
+                response_headers.update({k.lower(): v for k, v in extra.items()})
+            return TransportResponse(
+                url, status, response_headers, body,
+                latency=headers_received - start, transfer=time.monotonic() - headers_received,
+            )
+
+        if timeout:
+            return await asyncio.wait_for(respond(), timeout)
+        return await respond()
+
+
+def create_transport(name: str, connections_per_host: int = 4) -> Transport:
+    """
+    Args:
+        name (str): "aiohttp" or "http2", see the transport setting.
+        connections_per_host (int): Pool size of the aiohttp transport.
+
+    Returns:
+        Transport: The transport, aiohttp if HTTP/2 support is not installed.
+    """
+    if name == Http2Transport.name:
+        try:
+            return Http2Transport()
+        except ImportError:
+            logger.warning("httpx[http2] is not installed, falling back to the aiohttp transport")
+    elif name != AiohttpTransport.name:
+        logger.warning(f"Unknown transport '{name}', using aiohttp")
+    return AiohttpTransport(connections_per_host)
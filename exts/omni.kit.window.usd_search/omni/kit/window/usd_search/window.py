@@ -10,16 +10,30 @@
 
 
 from .utils.animate_widget import AnimateWindget
+from .utils.asset_stat import AssetStatCache, format_seconds, format_size
+from .utils.contact_sheet import ContactSheet
+from .utils.dedup import VariantGrouper, dhash
+from .utils.frame_scheduler import FrameScheduler
 from .utils.image_handler import ImageHandler
 from .utils.image_widget import USDSearchImageWidget
-from .utils.ngc_connect import NgcConnect
+from .utils.local_index import LocalIndex
+from .utils.ngc_connect import NgcConnect, estimate_link
+from .utils.rate_limiter import Priority
+from .utils.result_filter import ResultFilter
+from .utils.result_index import ResultIndex
+from .utils.result_set import ResultSet, ResultView
 from .utils.search_models import USDSearchModel
+from .utils.shared_cache import FileLock
+from .utils.task_group import TaskGroup
+from .utils.thumbnail_atlas import ThumbnailAtlas
 
 __all__ = ["UsdSearchWindow"]
 
 import asyncio
+import base64
 import logging
-from typing import Optional
+import os
+from typing import List, Optional
 
 import carb
 import omni.client
@@ -35,14 +49,16 @@ class FieldState:
     Manages the state of a field (input box) in the UI.
     """
 
-    def __init__(self, on_enter_pressed: callable):
+    def __init__(self, on_enter_pressed: callable, task_group: Optional[TaskGroup] = None):
         """
         Initializes a new instance of FieldState.
 
         Args:
             on_enter_pressed (function): A callback function when enter pressed.
+            task_group (TaskGroup): Owner of the key polling task.
         """
         self._on_enter_pressed = on_enter_pressed
+        self._task_group = task_group or TaskGroup("field_state")
 
         app_window = omni.appwindow.get_default_app_window()
         self._key_input = carb.input.acquire_input_interface()
@@ -67,6 +83,7 @@ class FieldState:
 
         if self._loop_task is not None:
             self._loop_task.cancel()
+            self._loop_task = None
 
         self._on_enter_pressed = None
 
@@ -95,7 +112,7 @@ class FieldState:
 
             self._loop_event = asyncio.Event()
 
-            self._loop_task = asyncio.ensure_future(self._loop(self._loop_event))
+            self._loop_task = self._task_group.create_task(self._loop(self._loop_event), "key_input")
         elif not value and self._loop_task is not None:
             self._loop_event.set()
             self._loop_event = None
@@ -140,18 +157,58 @@ class FieldState:
 class UsdSearchWindow(ui.Window):
     """The class that represents the window"""
 
-    def __init__(self, title: str, search_models=[], **kwargs):
+    def __init__(
+        self, title: str, search_models: Optional[List[USDSearchModel]] = None, results: Optional[ResultSet] = None,
+        **kwargs
+    ):
+        """
+        Args:
+            title (str): Window title.
+            search_models (List[USDSearchModel]): Initial results, kept for compatibility, `results` is preferred.
+            results (ResultSet): Initial results.
+        """
         super().__init__(title, **kwargs)
 
         self._settings = carb.settings.get_settings()
+        # Every background coroutine of the window, cancelled together on destroy.
+        self._tasks = TaskGroup("UsdSearchWindow")
+        self._rebuild_future: Optional[asyncio.Future] = None
         # This setting is pulled from config/extension.toml
         settings_path = "exts/omni.kit.window.usd_search/host_url"
         self._service_url = self._settings.get(settings_path)
-        self._search_models = search_models
+        # Server results before local filtering; self._shown is the filtered, ranked and grouped view of them.
+        if results is None:
+            results = ResultSet.from_models(search_models or [])
+        self._results = results
+        self._shown = self._results.view()
+        self._result_filter = ResultFilter()
+        # Near-identical results (format copies, LODs, material variants) shown as one tile.
+        self._variant_grouper = VariantGrouper(
+            self._settings.get("exts/omni.kit.window.usd_search/variant_max_hash_distance") or 6
+        )
+        self._group_variants_model = ui.SimpleBoolModel(
+            bool(self._settings.get("exts/omni.kit.window.usd_search/group_variants"))
+        )
+        # Asset URLs of the groups whose variants are shown
+        self._expanded_groups = set()
+        # Asset URL -> (model, image string) of hidden variants, decoded once they are shown
+        self._deferred_thumbnails = {}
 
         self._default_prompt = ""
         self._visibility_changed_listener = None
-        self._image_handler = ImageHandler()
+        thumbnail_pack_max_mb = self._settings.get("exts/omni.kit.window.usd_search/thumbnail_pack_max_mb")
+        self._image_handler = ImageHandler(
+            thumbnail_pack_max_mb * 1024 * 1024 if thumbnail_pack_max_mb else ImageHandler.THUMBNAIL_PACK_MAX_BYTES
+        )
+        # Thumbnails of all tiles share a few textures rather than one each.
+        self._thumbnail_atlas: Optional[ThumbnailAtlas] = None
+        atlas_page_pixels = self._settings.get("exts/omni.kit.window.usd_search/thumbnail_atlas_page_pixels")
+        if (atlas_page_pixels is None or atlas_page_pixels > 0) and ThumbnailAtlas.is_supported():
+            self._thumbnail_atlas = ThumbnailAtlas(
+                self._image_handler, USDSearchImageWidget.get_image_pixel_size(), page_pixels=atlas_page_pixels or 1024,
+                max_pages=self._settings.get("exts/omni.kit.window.usd_search/thumbnail_atlas_max_pages") or 16,
+                task_group=self._tasks,
+            )
         self._query_model = ui.SimpleStringModel()
         self._ngc_connect = NgcConnect()
         self._status = None
@@ -159,10 +216,67 @@ class UsdSearchWindow(ui.Window):
         self._last_query = None
         self._last_scene_url = None
         self._query_future: Optional[asyncio.Future] = None
+        self._thumbnail_futures: List[asyncio.Future] = []
+        self._stat_futures: List[asyncio.Future] = []
+        # Download size of result assets, to estimate how long each one takes to load.
+        self._asset_stats = AssetStatCache(
+            max_concurrent=self._settings.get("exts/omni.kit.window.usd_search/asset_stat_max_concurrent") or 8,
+            discover_dependencies=bool(self._settings.get("exts/omni.kit.window.usd_search/asset_stat_dependencies")),
+        )
+        self._image_widget = None
+        self._animate_widget = None
+        self._contact_sheet: Optional[ContactSheet] = None
+        # Spreads tile construction over frames so large result sets don't hitch.
+        self._frame_scheduler = FrameScheduler(
+            self._settings.get("exts/omni.kit.window.usd_search/frame_budget_ms") or 4.0, task_group=self._tasks
+        )
         self._search_in_scene_model = ui.SimpleBoolModel(False)
+        # No network at all, searches are answered from the local result index.
+        offline_mode = self._settings.get("/persistent/exts/omni.kit.window.usd_search/offline_mode")
+        self._offline_model = ui.SimpleBoolModel(bool(offline_mode))
         self._scene_url_model = ui.SimpleStringModel()
-
-        self._field_state = FieldState(self._query)
+        self._filter_prefix_model = ui.SimpleStringModel()
+        self._filter_score_model = ui.SimpleFloatModel(0.0)
+        self._filter_size_model = ui.SimpleFloatModel(0.0)
+        self._filter_load_model = ui.SimpleFloatModel(0.0)
+        self._sort_by_load_model = ui.SimpleBoolModel(False)
+        self._scene_url_field = None
+        # Model callbacks are registered once here, not on every rebuild, and removed on destroy.
+        self._model_callbacks = []
+        self._add_model_callback(self._filter_prefix_model, "end_edit", lambda _: self._on_filter_changed())
+        for model in (self._filter_score_model, self._filter_size_model, self._filter_load_model, self._sort_by_load_model):
+            self._add_model_callback(model, "value_changed", lambda _: self._on_filter_changed())
+        self._add_model_callback(self._search_in_scene_model, "value_changed", self._on_search_in_scene_changed)
+        self._add_model_callback(self._offline_model, "value_changed", self._on_offline_changed)
+        self._add_model_callback(self._group_variants_model, "value_changed", lambda _: self._apply_filter())
+        self._add_model_callback(self._query_model, "begin_edit", self._on_begin_edit)
+        self._add_model_callback(self._query_model, "end_edit", self._on_end_edit)
+
+        self._field_state = FieldState(self._query, task_group=self._tasks)
+
+        # Past queries and their results, for type-ahead suggestions and instant recent results.
+        max_queries = self._settings.get("exts/omni.kit.window.usd_search/result_index_max_queries") or 500
+        self._result_index = ResultIndex(
+            os.path.join(self._image_handler.get_cache_directory(), "result_index.db"), max_queries=max_queries,
+            task_group=self._tasks,
+        )
+        self._suggestions = []
+        self._suggestions_frame = None
+        self._add_model_callback(self._query_model, "value_changed", self._on_query_text_changed)
+
+        # Asset names under local_index_roots, to find assets by name without the search service.
+        self._local_index: Optional[LocalIndex] = None
+        local_roots = list(self._settings.get("exts/omni.kit.window.usd_search/local_index_roots") or [])
+        if local_roots:
+            self._local_index = LocalIndex(
+                os.path.join(self._image_handler.get_cache_directory(), "local_index.db"), local_roots,
+                max_concurrent_lists=self._settings.get("exts/omni.kit.window.usd_search/local_index_max_concurrent_lists") or 8,
+                max_subscriptions=self._settings.get("exts/omni.kit.window.usd_search/local_index_max_subscriptions") or 256,
+                max_depth=self._settings.get("exts/omni.kit.window.usd_search/local_index_max_depth") or 32,
+                task_group=self._tasks,
+            )
+            rescan_interval = self._settings.get("exts/omni.kit.window.usd_search/local_index_rescan_interval") or 0
+            self._tasks.create_task(self._local_index.run_async(rescan_interval), "local_index")
 
         # These are default parameters for USD Search API
         self._payload = {
@@ -170,9 +284,9 @@ class UsdSearchWindow(ui.Window):
             "limit": 30,
             "cutoff_threshold": 1.05,
             "return_images": True,
-            "return_metadata": False,
+            "return_metadata": bool(self._settings.get("exts/omni.kit.window.usd_search/return_metadata")),
             "return_root_prims": False, # There will be "Internal Server Error" for proper instance if True
-            "return_predictions": False,
+            "return_predictions": bool(self._settings.get("exts/omni.kit.window.usd_search/return_predictions")),
             "file_extension_include": "usd*",
         }
 
@@ -184,15 +298,53 @@ class UsdSearchWindow(ui.Window):
         # Set function that will be called when window is visible
         self.frame.set_build_fn(self._build_fn)
 
-    def update_payload(self, query: str, scene_url: str):
-        self._payload["description"] = query
+    def _add_model_callback(self, model: ui.AbstractValueModel, event: str, fn: callable):
+        """
+        Registers `fn` on `model` for `event` ("value_changed", "begin_edit" or "end_edit"), removed on destroy.
+        """
+        callback_id = getattr(model, f"add_{event}_fn")(fn)
+        self._model_callbacks.append((callback_id, getattr(model, f"remove_{event}_fn")))
+
+    @property
+    def model_callback_count(self) -> int:
+        """
+        Returns:
+            int: Number of callbacks the window has registered on its models.
+        """
+        return len(self._model_callbacks)
+
+    def update_payload(self, query: str, scene_url: str, image_string: Optional[str] = None):
+        self._payload["description"] = query or None
         self._payload["search_in_scene"] = scene_url
+        if image_string:
+            self._payload["image_similarity_search"] = [image_string]
+        else:
+            self._payload.pop("image_similarity_search", None)
         return
 
     def destroy(self):
         self._visibility_changed_listener = None
-        if self._query_future and not self._query_future.done():
-            self._query_future.cancel()
+        for callback_id, remove_fn in self._model_callbacks:
+            remove_fn(callback_id)
+        self._model_callbacks = []
+        self._field_state.destroy()
+        self._animate_widget = None
+        self._tasks.destroy()
+        self._thumbnail_futures = []
+        self._stat_futures = []
+        if self._contact_sheet:
+            self._contact_sheet.destroy()
+            self._contact_sheet = None
+        self._ngc_connect.destroy()
+        if self._local_index:
+            self._local_index.destroy()
+            self._local_index = None
+        self._result_index.destroy()
+        self._frame_scheduler.destroy()
+        if self._thumbnail_atlas:
+            self._thumbnail_atlas.destroy()
+            self._thumbnail_atlas = None
+        self._image_handler.destroy()
         # Will destroy all children
         super().destroy()
 
@@ -208,11 +360,21 @@ class UsdSearchWindow(ui.Window):
 
     def rebuild_ui(self):
         # Defer window updates until queries are completed.
-        asyncio.ensure_future(self._rebuild_ui_async())
+        # Several requests in the same frame make a single rebuild.
+        if self._rebuild_future is None or self._rebuild_future.done():
+            self._rebuild_future = self._tasks.create_task(self._rebuild_ui_async(), "rebuild_ui")
 
     async def _rebuild_ui_async(self):
         # Wait for next update
         await omni.kit.app.get_app().next_update_async()
+        # Work queued for the widgets about to be replaced is obsolete.
+        self._frame_scheduler.cancel()
+        self._tasks.cancel("delay_unselect")
+        searching = False
+        if self._animate_widget:
+            # The spinner is rebuilt below, stop the old one's rotation.
+            searching = self._animate_widget.visible
+            self._animate_widget.visible = False
 
         # Triggered by search button.
         def on_click_request():
@@ -228,16 +390,21 @@ class UsdSearchWindow(ui.Window):
                 self._query_future.cancel()
             self._last_scene_url = None
             self._last_query = None
+            self._expanded_groups.clear()
             self._query_model.set_value(self._default_prompt)
-            self._search_models = []
+            self._suggestions = []
+            self._results = ResultSet()
+            self._shown = self._results.view()
             self._status = self._default_status
             self._scene_url_model.set_value("")
             self._search_in_scene_model.set_value(False)
+            self._filter_prefix_model.set_value("")
+            self._filter_score_model.set_value(0.0)
+            self._filter_size_model.set_value(0.0)
+            self._filter_load_model.set_value(0.0)
+            self._sort_by_load_model.set_value(False)
             self.rebuild_ui()
 
-        self._query_model.add_begin_edit_fn(self._on_begin_edit)
-        self._query_model.add_end_edit_fn(self._on_end_edit)
-
         with self.frame:
             with ui.VStack():
                 with ui.HStack(height=22, spacing=0):
@@ -250,6 +417,10 @@ class UsdSearchWindow(ui.Window):
                     ui.Spacer(width=2)
                     ui.Button("Search", height=18, width=70, clicked_fn=on_click_request)
                     ui.Button("Reset", height=18, width=70, clicked_fn=on_reset)
+                    tooltip = "Search for assets that look like the active viewport"
+                    ui.Button("Viewport", height=18, width=70, tooltip=tooltip, clicked_fn=self._query_by_viewport)
+
+                self._suggestions_frame = ui.Frame(height=0, build_fn=self._build_suggestions)
 
                 with ui.HStack(height=22, spacing=0):
                     ui.Spacer(width=4)
@@ -262,6 +433,48 @@ class UsdSearchWindow(ui.Window):
                     ui.Spacer(width=4)
                     self._scene_url_field = ui.StringField(self._scene_url_model, height=22, visible=self._search_in_scene_model.as_bool, name="scene_url")
                     ui.Spacer(width=4)
+                    with ui.VStack(width=0):
+                        ui.Spacer()
+                        ui.CheckBox(self._offline_model, height=0)
+                        ui.Spacer()
+                    ui.Spacer(width=4)
+                    tooltip = "Search and browse results of previous searches only, without network access"
+                    ui.Label("Offline", width=0, tooltip=tooltip, mouse_pressed_fn=lambda x, y, btn, flag: self._offline_model.set_value(not self._offline_model.as_bool))
+                    ui.Spacer(width=8)
+                    with ui.VStack(width=0):
+                        ui.Spacer()
+                        ui.CheckBox(self._group_variants_model, height=0)
+                        ui.Spacer()
+                    ui.Spacer(width=4)
+                    tooltip = "Show near-identical results (format copies, LODs, material variants) as one tile"
+                    ui.Label("Group variants", width=0, tooltip=tooltip, mouse_pressed_fn=lambda x, y, btn, flag: self._group_variants_model.set_value(not self._group_variants_model.as_bool))
+                    ui.Spacer(width=4)
+
+                with ui.HStack(height=22, spacing=4):
+                    ui.Spacer(width=0)
+                    ui.Label("Filter", width=0)
+                    tooltip = "Only show assets whose URL starts with one of these comma separated prefixes"
+                    ui.StringField(self._filter_prefix_model, height=22, tooltip=tooltip)
+                    ui.Label("Score", width=0)
+                    tooltip = "Hide results scoring above this cutoff (0 = off)"
+                    ui.FloatField(self._filter_score_model, width=40, height=22, tooltip=tooltip)
+                    ui.Label("Size", width=0)
+                    tooltip = "Hide assets with a bounding box dimension above this size (0 = off, needs return_metadata)"
+                    ui.FloatField(self._filter_size_model, width=50, height=22, tooltip=tooltip)
+                    ui.Label("Load s", width=0)
+                    tooltip = "Hide assets estimated to take longer than this many seconds to load (0 = off)"
+                    ui.FloatField(self._filter_load_model, width=40, height=22, tooltip=tooltip)
+                    with ui.VStack(width=0):
+                        ui.Spacer()
+                        ui.CheckBox(self._sort_by_load_model, height=0)
+                        ui.Spacer()
+                    ui.Label(
+                        "Lightest first", width=0, tooltip="Sort results by estimated load time",
+                        mouse_pressed_fn=lambda x, y, btn, flag: self._sort_by_load_model.set_value(not self._sort_by_load_model.as_bool)
+                    )
+                    tooltip = "Lay out all results in the stage, each asset loads as the camera gets close to it"
+                    ui.Button("Lay out", height=18, width=70, tooltip=tooltip, clicked_fn=self.lay_out_results)
+                    ui.Spacer(width=0)
 
                 ui.Spacer(height=5)
                 ui.Separator(height=1)
@@ -274,29 +487,27 @@ class UsdSearchWindow(ui.Window):
                         with ui.VStack():
                             query = self._query_model.get_value_as_string()
                             with ui.VStack():
-                                images = []
-                                usd_paths = []
-                                for model in self._search_models:
-                                    images.append(model.image_url)
-                                    usd_paths.append(model.asset_url)
-                                    # dont want to deal with bounding boxes for now
-                                    # bounding_boxes = [item.get("bbox_dimension", None) for item in data]
-                                USDSearchImageWidget(query, self._service_url, images, usd_paths, status=self._status)
-                    self._animate_widget = AnimateWindget(visible=False)
-
-        def on_search_in_scene_changed(model):
+                                # The grid reads the shown rows of the result set, nothing is copied.
+                                self._image_widget = USDSearchImageWidget(
+                                    query, self._get_endpoints_label(), self._shown, status=self._status,
+                                    scheduler=self._frame_scheduler, image_handler=self._image_handler,
+                                    info_fn=self._get_load_info, task_group=self._tasks,
+                                    on_toggle_variants=self._on_toggle_variants, atlas=self._thumbnail_atlas
+                                )
+                    self._animate_widget = AnimateWindget(visible=searching, task_group=self._tasks)
+
+    def _on_search_in_scene_changed(self, model):
+        if self._scene_url_field:
             self._scene_url_field.visible = model.as_bool
-            if model.as_bool:
-                if not self._scene_url_model.as_string:
-                    usd_context = omni.usd.get_context()
-                    if usd_context and not usd_context.is_new_stage():
-                        self._scene_url_model.set_value(usd_context.get_stage_url())
+        if model.as_bool:
+            if not self._scene_url_model.as_string:
+                usd_context = omni.usd.get_context()
+                if usd_context and not usd_context.is_new_stage():
+                    self._scene_url_model.set_value(usd_context.get_stage_url())
 
-            if self._query_future and not self._query_future.done():
-                # If searching in progress, restart
-                self._query()
-
-        self._search_in_scene_model.add_value_changed_fn(on_search_in_scene_changed)
+        if self._query_future and not self._query_future.done():
+            # If searching in progress, restart
+            self._query()
 
     def download_s3_asset(self, model):
         """Example of how one would download an S3 asset (unused)."""
@@ -305,8 +516,16 @@ class UsdSearchWindow(ui.Window):
         logger.info("Downloading Asset URL" + model.asset_url)
         local_path = self._image_handler.get_asset_directory() + model.asset_name
         local_path = local_path.replace("\\", "/")
-        # Start the download
-        omni.client.copy(model.asset_url, local_path)
+        # The asset directory is shared by every Kit instance, only one of them downloads each asset.
+        with FileLock(local_path + ".lock"):
+            if not os.path.exists(local_path):
+                # Start the download, others only ever see a complete file.
+                temp_path = f"{local_path}.{os.getpid()}.tmp"
+                result = omni.client.copy(model.asset_url, temp_path, behavior=omni.client.CopyBehavior.OVERWRITE)
+                if result != omni.client.Result.OK:
+                    logger.error(f"Failed to download {model.asset_url}: {result}")
+                    return None
+                os.replace(temp_path, local_path)
         # Shutdown the client
         # omni.client.shutdown()
         return local_path
@@ -332,6 +551,23 @@ class UsdSearchWindow(ui.Window):
             usd_context=omni.usd.get_context(),
         )
 
+    def lay_out_results(self):
+        """Build a contact sheet of the current results as unloaded payloads, loaded on demand."""
+        stage = omni.usd.get_context().get_stage()
+        if not stage or not self._shown:
+            return
+
+        if self._contact_sheet is None:
+            settings_path = "exts/omni.kit.window.usd_search/contact_sheet_"
+            self._contact_sheet = ContactSheet(
+                load_distance=self._settings.get(settings_path + "load_distance") or 500.0,
+                max_concurrent_loads=self._settings.get(settings_path + "max_concurrent_loads") or 4,
+                default_size=self._settings.get(settings_path + "default_size") or 100.0,
+                task_group=self._tasks,
+            )
+        self._contact_sheet.build(stage, self._shown)
+        self._contact_sheet.start_streaming()
+
     async def on_send_server_request_async(self):
         query = self._query_model.get_value_as_string()
         scene_url = self._scene_url_model.as_string if self._search_in_scene_model.as_bool else ""
@@ -345,35 +581,488 @@ class UsdSearchWindow(ui.Window):
             self.rebuild_ui()
             return
 
-        self._result_frame.visible = False
+        self._suggestions = []
+        self._expanded_groups.clear()
+        if self._offline_model.as_bool:
+            await self._search_offline_async(query, scene_url)
+            return
+
+        # Stale-while-revalidate: show what this query returned last time while the server is asked again.
+        cached_models = self._result_index.recent_results(query, scene_url)
+        if cached_models:
+            self._results = cached_models
+            self._shown = self._get_display_view(cached_models)
+            self._status = f'Recent results for "{query}", refreshing...'
+            await self._rebuild_ui_async()
+        else:
+            self._result_frame.visible = False
+            self._suggestions_frame.rebuild()
         self._animate_widget.visible = True
 
         # clear status to allow search results to take over
         self._status = None
 
         self.update_payload(query, scene_url)
+        await self._search_async(query, scene_url, cached_models)
+
+    async def _search_offline_async(self, query: str, scene_url: str):
+        """Answer a query from the local result index only, without any network request."""
+        models = self._result_index.recent_results(query, scene_url) or self._result_index.find_results(query, scene_url)
+        local_models = self._search_local(query, scene_url, {model.asset_url for model in models})
+        models.extend(local_models)
+        self._results = models
+        self._shown = self._get_display_view(models)
+        if models:
+            kind = "cached and local" if local_models else "cached"
+            self._status = f'Offline, {len(self._shown)} {kind} results for "{query}"'
+        else:
+            self._status = f'Offline, no cached results for "{query}"'
+        self._last_query = query
+        self._last_scene_url = scene_url
+        await self._rebuild_ui_async()
+
+    def _on_offline_changed(self, model):
+        self._settings.set("/persistent/exts/omni.kit.window.usd_search/offline_mode", model.as_bool)
+        # Run the current query again in the new mode.
+        self._last_query = None
+        self._last_scene_url = None
+        if self._query_model.as_string:
+            self._query()
+
+    async def on_send_image_request_async(self):
+        """Search for assets that look like the active viewport, narrowed by the query text if any."""
+        if self._offline_model.as_bool:
+            self._status = "Offline, searching by viewport needs the search service."
+            await self._rebuild_ui_async()
+            return
+        self._suggestions = []
+        self._result_frame.visible = False
+        self._suggestions_frame.rebuild()
+        self._animate_widget.visible = True
+
+        max_bytes = self._settings.get("exts/omni.kit.window.usd_search/image_query_max_bytes")
+        timeout = self._settings.get("exts/omni.kit.window.usd_search/image_query_capture_timeout")
+        image_string = await self._image_handler.capture_query_image_async(
+            max_bytes or ImageHandler.MAX_PAYLOAD_BYTES, timeout or ImageHandler.CAPTURE_TIMEOUT
+        )
+        if image_string is None:
+            self._status = "Failed to capture the viewport, make sure a viewport is open and rendering."
+            self._animate_widget.visible = False
+            await self._rebuild_ui_async()
+            return
+
+        query = self._query_model.get_value_as_string()
+        scene_url = self._scene_url_model.as_string if self._search_in_scene_model.as_bool else ""
+        self._status = None
+        self.update_payload(query, scene_url, image_string)
+        await self._search_async(query, scene_url, image_query=True)
+
+    def _search_local(self, query: str, scene_url: str, exclude=()) -> ResultSet:
+        """
+        Assets named like the query in the local index, leaving out the URLs in `exclude`. Empty if no roots are
+        indexed, or for searches restricted to a scene, which the index knows nothing about.
+        """
+        results = ResultSet()
+        if self._local_index is None or not query or scene_url:
+            return results
+        limit = self._settings.get("exts/omni.kit.window.usd_search/local_index_max_results") or 100
+        for asset_url in self._local_index.search(query, limit).asset_urls():
+            if asset_url not in exclude:
+                results.append(self._image_handler.get_asset_thumbnail_url(asset_url), asset_url)
+        results.set_flag(slice(None), ResultSet.LOCAL)
+        return results
+
+    def _get_endpoints(self) -> List[str]:
+        """The host_url endpoint followed by any additional host_urls, all queried together."""
+        endpoints = [self._service_url] + list(self._settings.get("exts/omni.kit.window.usd_search/host_urls") or [])
+        return list(dict.fromkeys(url for url in endpoints if url))
+
+    def _get_endpoints_label(self) -> str:
+        endpoints = self._get_endpoints()
+        if len(endpoints) > 1:
+            return f"{endpoints[0]} and {len(endpoints) - 1} more"
+        return self._service_url
+
+    def _cancel_result_loads(self):
+        """Cancel thumbnail decodes and asset stats still running for the previous results."""
+        for future in self._thumbnail_futures + self._stat_futures:
+            if not future.done():
+                future.cancel()
+        self._thumbnail_futures = []
+        self._stat_futures = []
+        self._deferred_thumbnails = {}
+
+    async def _search_async(
+        self, query: str, scene_url: str, cached_models: Optional[ResultSet] = None, image_query: bool = False
+    ):
+        """Send the current payload to every endpoint, merging results into the grid as each endpoint answers."""
         self._ngc_connect.set_payload(self._payload)
+        self._cancel_result_loads()
+
+        endpoints = self._get_endpoints()
+        timeout = self._settings.get("exts/omni.kit.window.usd_search/endpoint_timeout") or None
+        # asset url -> model, the same asset can be indexed by several endpoints
+        merged = {}
+        results = ResultSet()
+        answered = 0
+        pending = len(endpoints)
+
+        # Text queries are sent as GET requests the HTTP cache can answer, image queries need a POST body.
+        async for url, data in self._ngc_connect.send_federated_request_async(
+            endpoints, priority=Priority.INTERACTIVE, timeout=timeout, use_url=not image_query
+        ):
+            pending -= 1
+            if isinstance(data, dict) and "error" in data:
+                logger.error(f"{url}: {data['error']}")
+                continue
+            answered += 1
+
+            new_models, decode_models, image_strings, fetch_models = self._add_results(data, results, merged)
+            await self._decode_placeholders_async(decode_models, image_strings)
+            # Results are ranked by score across endpoints by the result filter.
+            self._results = results
+            self._shown = self._get_display_view(results)
+            # Regrouping with the new results may reveal variants hidden so far.
+            self._load_deferred_thumbnails()
+            if image_query:
+                self._status = (
+                    f"Found {len(self._shown)} Assets similar to the viewport\nfrom {self._get_endpoints_label()}"
+                )
+            await self._rebuild_ui_async()
+            # Keep the spinner up while other endpoints are still searching.
+            self._animate_widget.visible = pending > 0
+            self._thumbnail_futures.append(
+                self._tasks.create_task(self._load_thumbnails_async(decode_models, image_strings), "load_thumbnails")
+            )
+            if fetch_models:
+                self._thumbnail_futures.append(
+                    self._tasks.create_task(self._fetch_thumbnails_async(fetch_models), "fetch_thumbnails")
+                )
+            self._stat_futures.append(self._tasks.create_task(self._stat_assets_async(new_models), "stat_assets"))
+
+        if answered == 0:
+            await self._show_fallback_async(query, scene_url, cached_models, image_query)
+            return
 
-        # Query via API (requires key) change to _url_ for URL queries (TODO).
-        data = await self._ngc_connect.send_api_request_async(self._service_url)
+        server_count = len(results)
+        local_index_mode = self._settings.get("exts/omni.kit.window.usd_search/local_index_mode") or "fallback"
+        if not image_query and local_index_mode == "merge":
+            await self._merge_local_async(query, scene_url, results, merged.keys())
 
-        self._search_models = []
-        for bundle in data:
-            # Log errors if found
-            if bundle == "error":
-                logger.error(data["error"])
-            # Skip generation of thumbnail if image key is missing (for errors).
-            if "image" not in bundle:
+        if image_query:
+            # Image results are not repeatable from the query text alone.
+            self._last_query = None
+            self._last_scene_url = None
+        else:
+            # To prevent repeating identical queries.
+            self._last_query = query
+            self._last_scene_url = scene_url
+            if merged:
+                # A failed thumbnail task must not keep the results out of the index, it was logged by the task group.
+                await asyncio.gather(*self._thumbnail_futures, return_exceptions=True)
+                await self._result_index.record_async(query, scene_url, results.view(range(server_count)))
+
+    def _add_results(self, data: Optional[list], results: ResultSet, merged: dict) -> tuple:
+        """
+        Appends the results of one endpoint to `results`, merging assets other endpoints already returned.
+
+        Args:
+            data (list): Result bundles of the endpoint.
+            results (ResultSet): Results of every endpoint so far.
+            merged (dict): Asset URL -> model of the results so far, updated.
+
+        Returns:
+            tuple: The new models, the models with inline images and those images, and (model, thumbnail URL) pairs
+                of the thumbnails to fetch.
+        """
+        new_models = []
+        decode_models = []
+        image_strings = []
+        fetch_models = []
+        for bundle in data or []:
+            # Skip bundles without asset (for errors).
+            if "url" not in bundle:
                 continue
-            image = self._image_handler.generate_image_from_string(bundle['image'])
             asset = bundle['url']
-            name = asset.split("/")[-1]
-            self._search_models.append(USDSearchModel(image, asset, name))
-        # To prevent repeating identical queries.
-        self._last_query = query
-        self._last_scene_url = scene_url
+            score = bundle.get("score")
+            existing = merged.get(asset)
+            if existing is not None:
+                # Keep the best score any endpoint gave the asset.
+                if score is not None and (existing.score is None or score < existing.score):
+                    existing.score = score
+                continue
+            thumbnail_url = None
+            if "image" in bundle:
+                # Tiles first show a tiny placeholder, then full thumbnails decoded in the background.
+                image = ""
+            elif asset.startswith(("http://", "https://")):
+                # Images were left out to keep up with a slow link, fetch thumbnails over the shared transport.
+                image = ""
+                thumbnail_url = self._image_handler.get_asset_thumbnail_url(asset)
+            else:
+                # Or let the tile load the Nucleus thumbnail through omni.client.
+                image = self._image_handler.get_asset_thumbnail_url(asset)
+            model = results.append(image, asset, score=score, bbox_dimension=bundle.get("bbox_dimension"))
+            merged[asset] = model
+            new_models.append(model)
+            if "image" in bundle:
+                decode_models.append(model)
+                image_strings.append(bundle['image'])
+            elif thumbnail_url:
+                fetch_models.append((model, thumbnail_url))
+        return new_models, decode_models, image_strings, fetch_models
+
+    async def _show_fallback_async(
+        self, query: str, scene_url: str, cached_models: Optional[ResultSet], image_query: bool
+    ):
+        """Show cached and local results when no endpoint answered."""
+        self._animate_widget.visible = False
+        local_models = []
+        if not image_query:
+            if not cached_models:
+                # Fall back to results of similar past queries,
+                cached_models = self._result_index.find_results(query, scene_url)
+            # and to assets named like the query.
+            local_models = self._search_local(query, scene_url, set(cached_models.asset_urls()))
+            cached_models = cached_models + local_models
+            self._results = cached_models
+            self._shown = self._get_display_view(cached_models)
+        if cached_models:
+            kind = "cached and local" if local_models else "cached"
+            self._status = f'Search service unavailable, showing {kind} results for "{query}"'
+        else:
+            self._results = ResultSet()
+            self._shown = self._results.view()
         await self._rebuild_ui_async()
 
+    async def _merge_local_async(self, query: str, scene_url: str, results: ResultSet, exclude):
+        """
+        Appends assets named like the query that the service did not return, ranked after its results since they
+        have no score. Appended in place, so models of server results held by thumbnail and stat tasks stay valid.
+        """
+        local_models = self._search_local(query, scene_url, exclude)
+        if local_models:
+            results.extend(local_models)
+            self._shown = self._get_display_view(results)
+            await self._rebuild_ui_async()
+
+    async def _decode_placeholders_async(self, search_models: list, image_strings: list):
+        """Decode the tiny placeholders shown until full thumbnails are ready, on worker threads."""
+        placeholders = await asyncio.gather(
+            *[self._image_handler.generate_placeholder_from_string_async(s) for s in image_strings],
+            return_exceptions=True,
+        )
+        for model, placeholder in zip(search_models, placeholders):
+            if isinstance(placeholder, BaseException):
+                logger.info(f"Failed to decode thumbnail of {model.asset_url}: {placeholder}")
+            else:
+                model.image_url = placeholder
+
+    async def _load_thumbnails_async(self, search_models: list, image_strings: list):
+        """Replace placeholders with thumbnails decoded at tile size, as each one becomes ready."""
+        size = USDSearchImageWidget.get_image_pixel_size()
+
+        async def decode(model, image_string):
+            try:
+                model.image_url = await self._image_handler.generate_image_from_string_async(image_string, size)
+            except Exception as e:
+                # The tile keeps its placeholder.
+                logger.info(f"Failed to decode thumbnail of {model.asset_url}: {e}")
+                return None
+            return model
+
+        # Variants hidden in a group keep their placeholder until the group is expanded.
+        displayed = set(self._shown.rows.tolist()) if self._shown.results is self._results else set()
+        decodes = []
+        for model, image_string in zip(search_models, image_strings):
+            if model.row in displayed:
+                decodes.append(decode(model, image_string))
+            else:
+                self._deferred_thumbnails[model.asset_url] = (model, image_string)
+
+        for future in asyncio.as_completed(decodes):
+            model = await future
+            if model is not None and self._image_widget:
+                self._image_widget.refresh_image(model)
+
+    async def _fetch_thumbnails_async(self, fetches: list):
+        """Fetch thumbnails of results that came without inline images, then show them like inline ones."""
+        size = USDSearchImageWidget.get_image_pixel_size()
+
+        async def fetch(model, url):
+            data = await self._ngc_connect.fetch_async(url)
+            if data is None:
+                return None
+            image_string = base64.b64encode(data).decode("ascii")
+            try:
+                model.image_url = await self._image_handler.generate_image_from_string_async(image_string, size)
+            except Exception as e:
+                logger.info(f"Failed to decode thumbnail {url}: {e}")
+                return None
+            return model
+
+        for future in asyncio.as_completed([fetch(model, url) for model, url in fetches]):
+            model = await future
+            if model is not None and self._image_widget:
+                self._image_widget.refresh_image(model)
+
+    async def _stat_assets_async(self, search_models: list):
+        """Show download size and estimated load time on each tile, re-sorting once all are known if needed."""
+        models_by_url = {}
+        for model in search_models:
+            models_by_url.setdefault(model.asset_url, []).append(model)
+        # Defaults until the link to the asset servers has been measured.
+        bandwidth = (self._settings.get("exts/omni.kit.window.usd_search/asset_load_bandwidth_mbps") or 50.0) * 125000
+        rtt = (self._settings.get("exts/omni.kit.window.usd_search/asset_load_rtt_ms") or 50.0) / 1000.0
+
+        def on_stat(stat):
+            load_seconds = stat.estimate_load_seconds(*estimate_link(stat.url, bandwidth, rtt))
+            for model in models_by_url.get(stat.url, []):
+                model.size = stat.total_size
+                model.load_seconds = load_seconds
+                if self._image_widget:
+                    self._image_widget.refresh_info(model)
+
+        await self._asset_stats.stat_all_async(models_by_url.keys(), on_stat)
+        if self._result_filter.max_load_seconds is not None or self._result_filter.sort_by_load_cost:
+            self._apply_filter()
+
+    @staticmethod
+    def _get_load_info(model) -> str:
+        if model.size is None:
+            return ""
+        return f"{format_size(model.size)}  {format_seconds(model.load_seconds)}"
+
+    def _on_query_text_changed(self, model):
+        """Update type-ahead suggestions from the local result index while typing."""
+        if not self._field_state.edit:
+            return
+        self._suggestions = self._result_index.suggest(model.as_string, limit=5)
+        if self._suggestions_frame:
+            self._suggestions_frame.rebuild()
+
+    def _build_suggestions(self):
+        with ui.VStack(height=0):
+            for suggestion in self._suggestions:
+                with ui.HStack(height=18):
+                    ui.Spacer(width=8)
+                    ui.Label(
+                        suggestion, name="suggestion",
+                        mouse_pressed_fn=lambda x, y, btn, flag, s=suggestion: self._on_suggestion_clicked(s)
+                    )
+
+    def _on_suggestion_clicked(self, suggestion: str):
+        self._query_model.set_value(suggestion)
+        self._query()
+
+    def _on_filter_changed(self):
+        """Re-apply the local result filter to the last server results, without a new request."""
+        prefixes = self._filter_prefix_model.as_string
+        self._result_filter.path_prefixes = [prefix.strip() for prefix in prefixes.split(",") if prefix.strip()]
+        score = self._filter_score_model.as_float
+        self._result_filter.max_score = score if score > 0 else None
+        size = self._filter_size_model.as_float
+        self._result_filter.bbox_max = (size, size, size) if size > 0 else None
+        load_seconds = self._filter_load_model.as_float
+        self._result_filter.max_load_seconds = load_seconds if load_seconds > 0 else None
+        self._result_filter.sort_by_load_cost = self._sort_by_load_model.as_bool
+        self._apply_filter()
+
+    def _get_display_view(self, results: ResultSet) -> ResultView:
+        """
+        Filter and rank results, then with variant grouping on, show each group as its best ranked result
+        followed by its variants only if the group is expanded.
+        """
+        rows = self._result_filter.apply(results)
+        results.variant_counts[:] = 0
+        if not self._group_variants_model.as_bool:
+            return results.view(rows)
+
+        # Grouping uses the hashes known so far and is redone once the missing ones are computed.
+        self._hash_thumbnails(results.view(rows))
+        urls = results.asset_urls(rows)
+        known = (results.flags[rows] & ResultSet.HASHED) != 0
+        hashes = [int(h) if k else None for h, k in zip(results.image_hashes[rows], known)]
+        display_rows = []
+        for group in self._variant_grouper.group(urls, hashes):
+            representative = rows[group[0]]
+            results.variant_counts[representative] = len(group) - 1
+            display_rows.append(representative)
+            if urls[group[0]] in self._expanded_groups:
+                display_rows.extend(rows[group[1:]])
+        return results.view(display_rows)
+
+    def _hash_thumbnails(self, models: ResultView):
+        """
+        Perceptual hashes of the thumbnails not hashed yet, in one batch on a worker thread, since reading the pack
+        and decoding would stall the UI. Placeholders are large enough.
+        """
+        pending = [
+            model for model in models
+            if model.image_hash is None and self._image_handler.is_thumbnail(model.image_url)
+        ]
+        if pending:
+            self._tasks.cancel("hash_thumbnails")
+            self._tasks.create_task(self._hash_thumbnails_async(pending), "hash_thumbnails")
+
+    async def _hash_thumbnails_async(self, models: list):
+        images = [model.image_url for model in models]
+
+        def hash_all():
+            hashed = []
+            thumbnails = []
+            for i, image in enumerate(images):
+                thumbnail = self._image_handler.load_thumbnail(image)
+                if thumbnail is not None:
+                    hashed.append(i)
+                    thumbnails.append(thumbnail)
+            return hashed, dhash(thumbnails)
+
+        loop = asyncio.get_event_loop()
+        hashed, hashes = await loop.run_in_executor(None, hash_all)
+        for i, image_hash in zip(hashed, hashes):
+            models[i].image_hash = int(image_hash)
+        # Regroup with the new hashes, unless a newer search replaced the results meanwhile.
+        if hashed and models[0].results is self._results:
+            self._apply_filter()
+
+    def _on_toggle_variants(self, asset_url: str):
+        if asset_url in self._expanded_groups:
+            self._expanded_groups.discard(asset_url)
+        else:
+            self._expanded_groups.add(asset_url)
+        self._shown = self._get_display_view(self._results)
+        self._load_deferred_thumbnails()
+        self.rebuild_ui()
+
+    def _load_deferred_thumbnails(self):
+        """Decode thumbnails of variants that are now shown."""
+        shown = [
+            self._deferred_thumbnails.pop(model.asset_url)
+            for model in self._shown if model.asset_url in self._deferred_thumbnails
+        ]
+        if shown:
+            models, image_strings = zip(*shown)
+            self._thumbnail_futures.append(
+                self._tasks.create_task(self._load_thumbnails_async(list(models), list(image_strings)), "load_thumbnails")
+            )
+
+    def _apply_filter(self):
+        shown = self._get_display_view(self._results)
+        if shown == self._shown:
+            return
+        self._shown = shown
+        self._load_deferred_thumbnails()
+        self.rebuild_ui()
+
+    @property
+    def task_stats(self) -> dict:
+        """
+        Returns:
+            dict: Counters of the window's background tasks, see TaskGroup.stats.
+        """
+        return self._tasks.stats
+
     def set_visible(self, value):
         # Good place for visibility/refresh related functionality.
         self.visible = value
@@ -385,7 +1074,12 @@ class UsdSearchWindow(ui.Window):
     def _query(self):
         if self._query_future and not self._query_future.done():
             self._query_future.cancel()
-        self._query_future = asyncio.ensure_future(self.on_send_server_request_async())
+        self._query_future = self._tasks.create_task(self.on_send_server_request_async(), "query")
+
+    def _query_by_viewport(self):
+        if self._query_future and not self._query_future.done():
+            self._query_future.cancel()
+        self._query_future = self._tasks.create_task(self.on_send_image_request_async(), "image_query")
 
     def _on_begin_edit(self, *args):
         self._field_state.model = self._query_model